@@ -0,0 +1,148 @@
+"""
+@file batch.py
+@ingroup client_side
+@brief Vectorized engine that plays large batches of games in lockstep with NumPy.
+
+A batch of B games is held as two arrays of B board masks (X and O cells, bit
+i for cell i, as in board.Board). Every ply is a handful of whole-array
+operations instead of one Python call per game: win detection is a single
+gather from the WINNING table of board.py, and a strategy picks the moves of
+all games still running at once through 512-entry tables indexed by a mask.
+greedy_moves() applies the priority order of the firmware's calculateAIMove()
+(win, block, center, corners, first free cell) to masks of candidate cells,
+so its games match engine.greedy_move() and the board move for move. Random
+games draw from a NumPy generator, so they follow the same distribution as
+engine.random_move() but not the same sequence.
+
+tournament.py plays its matches with this engine when given --batch.
+"""
+import numpy as np
+
+from board import FULL, WINNING
+
+CELL_BITS = (1 << np.arange(9)).astype(np.int16)
+CORNERS = 0b101000101
+WINS = np.frombuffer(WINNING, dtype=np.uint8).astype(bool)
+# WINNING_CELLS[mask] holds the empty cells that would complete a line for the owner of mask.
+WINNING_CELLS = np.array([sum(1 << i for i in range(9) if not mask >> i & 1 and WINNING[mask | 1 << i])
+                          for mask in range(512)], dtype=np.int16)
+# LOWEST_CELL[mask] is the lowest cell in mask, -1 for an empty mask.
+LOWEST_CELL = np.array([(mask & -mask).bit_length() - 1 for mask in range(512)], dtype=np.int8)
+# NTH_CELL[mask][n] is the n-th cell of mask in ascending order, -1 past the last one.
+NTH_CELL = np.array([[i for i in range(9) if mask >> i & 1] + [-1] * (9 - bin(mask).count("1"))
+                     for mask in range(512)], dtype=np.int8)
+# CELL_COUNT[mask] is the number of cells in mask.
+CELL_COUNT = np.array([bin(mask).count("1") for mask in range(512)], dtype=np.int8)
+
+
+def greedy_moves(own, opp, rng=None):
+    """
+    @brief Moves of the firmware heuristic for a batch of positions.
+
+    Each rule yields a mask of candidate cells and only applies to the games
+    no earlier rule has decided, which reproduces the order of the checks in
+    calculateAIMove(); the lowest candidate cell is then played. Corners are
+    tried in ascending order, so the lowest free corner is the firmware's.
+    @param own Masks of the cells owned by the player to move.
+    @param opp Masks of the cells owned by the opponent.
+    @param rng Unused; present so that every batch strategy has the same signature.
+    @return Array of cell indices, -1 where the board is full.
+    """
+    free = ~(own | opp) & FULL
+    candidates = WINNING_CELLS[own] & free
+    for rule in (WINNING_CELLS[opp] & free, free & 1 << 4, free & CORNERS, free):
+        candidates = np.where(candidates == 0, rule, candidates)
+    return LOWEST_CELL[candidates]
+
+
+def random_moves(own, opp, rng):
+    """
+    @brief Uniformly random empty cells for a batch of positions.
+    @param own Masks of the cells owned by the player to move.
+    @param opp Masks of the cells owned by the opponent.
+    @param rng numpy.random.Generator to draw from.
+    @return Array of cell indices, -1 where the board is full.
+    """
+    free = ~(own | opp) & FULL
+    counts = CELL_COUNT[free]
+    picks = (rng.random(len(free), dtype=np.float32) * counts).astype(np.int8)
+    return NTH_CELL[free, np.minimum(picks, counts - 1)]
+
+
+_perfect_moves = None
+
+
+def perfect_moves(own, opp, rng=None):
+    """
+    @brief Moves of the perfect-play table of solver.py for a batch of positions.
+
+    The table is expanded on first use into a dense array indexed like
+    engine.greedy_move()'s cache (own << 9 | opp), so a batch is one gather.
+    @param own Masks of the cells owned by the player to move.
+    @param opp Masks of the cells owned by the opponent.
+    @param rng Unused; present so that every batch strategy has the same signature.
+    @return Array of cell indices, -1 where the game is over.
+    """
+    global _perfect_moves
+    if _perfect_moves is None:
+        from engine import perfect_move
+        from solver import reachable_positions
+        table = np.full(1 << 18, -1, dtype=np.int8)
+        for x, o in reachable_positions():
+            if not (WINNING[x] or WINNING[o] or x | o == FULL):
+                table[x << 9 | o] = perfect_move(x, o)
+                table[o << 9 | x] = perfect_move(o, x)
+        _perfect_moves = table
+    return _perfect_moves[own.astype(np.int32) << 9 | opp]
+
+
+BATCH_STRATEGIES = {
+    "random": random_moves,
+    "greedy": greedy_moves,
+    "perfect": perfect_moves,
+}
+
+
+def play_batch(x_strategy, o_strategy, games, rng=None):
+    """
+    @brief Play a batch of games in lockstep, X moving first as in the firmware AI vs AI loop.
+    @param x_strategy Batch strategy function for X.
+    @param o_strategy Batch strategy function for O.
+    @param games Number of games.
+    @param rng numpy.random.Generator handed to the strategies; a fresh unseeded one by default.
+    @return Array with the outcome of every game: 1 if X wins, 2 if O wins, 0 for a draw.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    x = np.zeros(games, dtype=np.int16)
+    o = np.zeros(games, dtype=np.int16)
+    outcome = np.zeros(games, dtype=np.int8)
+    running = np.arange(games)
+    for ply in range(9):
+        if not len(running):
+            break
+        own, opp = (x, o) if ply % 2 == 0 else (o, x)
+        moves = (x_strategy if ply % 2 == 0 else o_strategy)(own[running], opp[running], rng)
+        own[running] |= CELL_BITS[moves]
+        won = WINS[own[running]]
+        outcome[running[won]] = 1 if ply % 2 == 0 else 2
+        running = running[~won]
+    return outcome
+
+
+def play_batches(x_strategy, o_strategy, games, rng=None, batch_size=1 << 20):
+    """
+    @brief Play any number of games in batches of bounded memory.
+    @param x_strategy Batch strategy function for X.
+    @param o_strategy Batch strategy function for O.
+    @param games Number of games.
+    @param rng numpy.random.Generator handed to the strategies.
+    @param batch_size Most games held in memory at once.
+    @return List [draws, X wins, O wins], as returned by engine.play_games().
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    results = np.zeros(3, dtype=np.int64)
+    for start in range(0, games, batch_size):
+        outcome = play_batch(x_strategy, o_strategy, min(batch_size, games - start), rng)
+        results += np.bincount(outcome, minlength=3)
+    return [int(count) for count in results]
+
@@ -0,0 +1,224 @@
+"""
+@file board.py
+@ingroup client_side
+@brief Compact bitboard representation of a Tic-Tac-Toe position.
+
+A position is two 9-bit masks, one per player; bit i stands for cell i (row
+major, cell 0 top left). Every line of three is a precomputed mask, and the
+WINNING table answers "does this mask contain a line" for all 512 masks, so
+win and draw detection are constant time.
+"""
+
+FULL = 0x1FF
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# WINNING[mask] is 1 if the cells in mask contain a complete line.
+WINNING = bytes(int(any(mask & line == line for line in WIN_MASKS)) for mask in range(512))
+
+# FREE_CELLS[occupied] lists the empty cells in ascending order.
+FREE_CELLS = tuple(tuple(i for i in range(9) if not occupied >> i & 1) for occupied in range(512))
+
+# The eight symmetries of the square as cell permutations: SYMMETRIES[t][i] is
+# the cell that cell i moves to under transformation t (t = 0 is the identity).
+_ROTATE = (6, 3, 0, 7, 4, 1, 8, 5, 2)
+_MIRROR = (2, 1, 0, 5, 4, 3, 8, 7, 6)
+
+
+def _compose(first, then):
+    return tuple(then[first[i]] for i in range(9))
+
+
+def _symmetries():
+    rotations = [tuple(range(9))]
+    for _ in range(3):
+        rotations.append(_compose(rotations[-1], _ROTATE))
+    return tuple(rotations + [_compose(rotation, _MIRROR) for rotation in rotations])
+
+
+SYMMETRIES = _symmetries()
+INVERSE_SYMMETRIES = tuple(tuple(perm.index(i) for i in range(9)) for perm in SYMMETRIES)
+
+
+def _cell_sums(values):
+    # table[mask] = sum of values[i] over the cells of mask, built from the mask
+    # without its lowest cell so that import stays cheap
+    table = [0] * 512
+    for mask in range(1, 512):
+        low = mask & -mask
+        table[mask] = table[mask ^ low] + values[low.bit_length() - 1]
+    return tuple(table)
+
+
+# TRANSFORMED[t][mask] is mask with every cell moved by symmetry t.
+TRANSFORMED = tuple(_cell_sums([1 << cell for cell in perm]) for perm in SYMMETRIES)
+
+# BASE3[mask] is the base-3 number with a 1 digit for every cell in mask.
+BASE3 = _cell_sums([3 ** i for i in range(9)])
+
+
+def position_key(first, second):
+    """
+    @brief Base-3 index of a position (digit 1: cell of first, digit 2: cell of second).
+    @param first Mask of the first player's cells.
+    @param second Mask of the second player's cells.
+    @return Index in the range 0-19682.
+    """
+    return BASE3[first] + 2 * BASE3[second]
+
+
+def canonical(first, second):
+    """
+    @brief Reduce a position by the eight board symmetries.
+    @param first Mask of the first player's cells.
+    @param second Mask of the second player's cells.
+    @return Tuple (key, t): the smallest position_key() over all symmetries and
+            the symmetry t that produces it.
+    """
+    best_key, best = position_key(first, second), 0
+    for t in range(1, 8):
+        table = TRANSFORMED[t]
+        key = BASE3[table[first]] + 2 * BASE3[table[second]]
+        if key < best_key:
+            best_key, best = key, t
+    return best_key, best
+
+
+def iter_cells(mask):
+    """
+    @brief Iterate over the cells set in a mask, lowest first.
+    @param mask 9-bit cell mask.
+    @return Generator of cell indices.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Board:
+    """
+    @ingroup client_side
+    @class Board
+    @brief Immutable position made of an X mask and an O mask.
+    """
+    __slots__ = ("x", "o")
+
+    def __init__(self, x=0, o=0):
+        """
+        @brief Create a position.
+        @param x Mask of the cells taken by X.
+        @param o Mask of the cells taken by O.
+        """
+        self.x = x
+        self.o = o
+
+    @classmethod
+    def from_string(cls, state):
+        """
+        @brief Build a position from the protocol form.
+        @param state Board state string of 9 characters (0: empty, 1: X, 2: O).
+        @return Board.
+        """
+        x = o = 0
+        for i, cell in enumerate(state):
+            if cell == "1":
+                x |= 1 << i
+            elif cell == "2":
+                o |= 1 << i
+        return cls(x, o)
+
+    def to_string(self):
+        """
+        @brief Convert the position to the protocol form.
+        @return Board state string of 9 characters.
+        """
+        return "".join(str(self.cell(i)) for i in range(9))
+
+    def cell(self, index):
+        """
+        @brief Owner of a cell.
+        @param index Cell index (0-8).
+        @return 0 if empty, 1 for X, 2 for O.
+        """
+        if self.x >> index & 1:
+            return 1
+        if self.o >> index & 1:
+            return 2
+        return 0
+
+    @property
+    def occupied(self):
+        """
+        @brief Mask of the non-empty cells.
+        """
+        return self.x | self.o
+
+    def free_cells(self):
+        """
+        @brief Empty cells in ascending order.
+        @return Tuple of cell indices.
+        """
+        return FREE_CELLS[self.x | self.o]
+
+    def to_move(self):
+        """
+        @brief Player whose turn it is, assuming X moved first.
+        @return 1 for X, 2 for O.
+        """
+        return 1 if bin(self.x).count("1") == bin(self.o).count("1") else 2
+
+    def play(self, index, player):
+        """
+        @brief Position after a move.
+        @param index Cell index (0-8); must be empty.
+        @param player 1 for X, 2 for O.
+        @return New Board.
+        """
+        if player == 1:
+            return Board(self.x | 1 << index, self.o)
+        return Board(self.x, self.o | 1 << index)
+
+    def winner(self):
+        """
+        @brief Winner of the position.
+        @return 1 if X has a line, 2 if O has a line, otherwise 0.
+        """
+        if WINNING[self.x]:
+            return 1
+        if WINNING[self.o]:
+            return 2
+        return 0
+
+    def is_full(self):
+        """
+        @brief True if no cell is empty.
+        """
+        return self.x | self.o == FULL
+
+    def is_over(self):
+        """
+        @brief True if the game is won or drawn.
+        """
+        return self.is_full() or WINNING[self.x] or WINNING[self.o]
+
+    def diff(self, other):
+        """
+        @brief Cells whose owner differs between two positions.
+        @param other Board to compare with.
+        @return Tuple of cell indices in ascending order.
+        """
+        return tuple(iter_cells((self.x ^ other.x) | (self.o ^ other.o)))
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.x == other.x and self.o == other.o
+
+    def __hash__(self):
+        return hash((self.x, self.o))
+
+    def __repr__(self):
+        return f"Board({self.to_string()!r})"
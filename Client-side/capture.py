@@ -0,0 +1,410 @@
+"""
+@file capture.py
+@ingroup client_side
+@brief Wire-level capture of the serial traffic and an offline analyzer for capture files.
+
+A SerialCapture keeps every chunk of bytes read from or written to the board,
+with its time.monotonic() timestamp and direction, in a ring buffer bounded
+by a byte budget: once the budget is used up the oldest chunks are dropped.
+The serial worker wraps its connection in a CapturedSerial, which records
+the traffic and otherwise behaves like the serial.Serial it wraps. Markers
+note when a port was opened and which protocol was negotiated, so that the
+analyzer can decode the stream even when the start of a session was dropped.
+
+A capture file is a header ("TTC1", the wall-clock and monotonic time when
+the capture started, the number of chunks dropped) followed by one record
+per chunk: timestamp, direction and length, then the bytes. The GUI keeps a
+capture when the [Capture] section of tictactoe.ini enables it and writes it
+whenever the connection is lost and on exit:
+
+    [Capture]
+    enabled = true
+    path = serial.ttc
+    max_size = 1048576
+
+The analyzer pairs every command with its reply (by sequence number, or in
+order for unsequenced commands), reports the latency distribution of every
+command type, and lists malformed BOARD frames and commands left unanswered
+for longer than the timeout:
+
+    python capture.py serial.ttc
+    python capture.py serial.ttc --timeout 0.5 --json
+"""
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+
+from metrics import command_kind, summarize
+from protocol import (BOARD_STATUS, MAX_FRAME_PAYLOAD, OP_LOAD, OP_MODE, OP_MOVE, OP_NOP, OP_RESET, OP_SAVE,
+                      OP_SEQUENCE, OP_TEST_CONNECTION, BinaryCodec, TextCodec, crc8)
+
+CAPTURE_MAGIC = b"TTC1"
+HEADER = struct.Struct("<4sddI")
+RECORD = struct.Struct("<dBH")
+
+OUT = 0
+IN = 1
+OPENED = 2
+PROTOCOL = 3
+
+DIRECTION_NAMES = {OUT: "out", IN: "in", OPENED: "opened", PROTOCOL: "protocol"}
+
+Chunk = namedtuple("Chunk", "time direction data")
+
+
+class SerialCapture:
+    """
+    @ingroup client_side
+    @class SerialCapture
+    @brief Ring buffer of the chunks that crossed the wire, written to a capture file on demand.
+
+    Chunks are recorded from the reader and writer threads of the serial
+    worker, so the buffer is guarded by a lock. When a marker is dropped from
+    the buffer it is kept aside and written before the remaining chunks, so a
+    saved capture always starts with the port and protocol in use.
+    """
+
+    def __init__(self, path, max_size=1 << 20, clock=time.monotonic):
+        """
+        @brief Create an empty capture.
+        @param path Capture file written by save().
+        @param max_size Most bytes of records kept in the buffer.
+        @param clock Function returning the timestamp of a chunk in seconds.
+        """
+        self.path = path
+        self.max_size = max_size
+        self.clock = clock
+        self.started = (time.time(), clock())
+        self.chunks = deque()
+        self.size = 0
+        self.dropped = 0
+        self._markers = {}
+        self._lock = threading.Lock()
+
+    def record(self, direction, data):
+        """
+        @brief Add a chunk, dropping the oldest ones if the buffer is over its budget.
+        @param direction OUT, IN, OPENED or PROTOCOL.
+        @param data Bytes of the chunk; empty chunks are ignored.
+        """
+        now = self.clock()
+        with self._lock:
+            for start in range(0, len(data), 0xFFFF):
+                self.chunks.append(Chunk(now, direction, bytes(data[start:start + 0xFFFF])))
+                self.size += RECORD.size + len(self.chunks[-1].data)
+            while self.size > self.max_size and len(self.chunks) > 1:
+                chunk = self.chunks.popleft()
+                self.size -= RECORD.size + len(chunk.data)
+                self.dropped += 1
+                if chunk.direction == OPENED:
+                    self._markers.clear()
+                if chunk.direction in (OPENED, PROTOCOL):
+                    self._markers[chunk.direction] = chunk
+
+    def opened(self, port):
+        """
+        @brief Mark the start of a session on a port.
+        @param port Serial port name.
+        """
+        self.record(OPENED, port.encode())
+
+    def negotiated(self, protocol):
+        """
+        @brief Mark the protocol the session speaks from now on.
+        @param protocol "text" or "binary".
+        """
+        self.record(PROTOCOL, protocol.encode())
+
+    def wrap(self, connection):
+        """
+        @brief Wrap an open connection so that its traffic is recorded.
+        @param connection Open serial connection.
+        @return CapturedSerial.
+        """
+        return CapturedSerial(connection, self)
+
+    def save(self, path=None):
+        """
+        @brief Write the capture, replacing the file atomically.
+        @param path Output file; defaults to the path given at creation.
+        @throws OSError If the file cannot be written.
+        """
+        path = path or self.path
+        with self._lock:
+            chunks = sorted(self._markers.values()) + list(self.chunks)
+            dropped = self.dropped
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(CAPTURE_MAGIC, self.started[0], self.started[1], dropped))
+            for chunk in chunks:
+                f.write(RECORD.pack(chunk.time, chunk.direction, len(chunk.data)))
+                f.write(chunk.data)
+        os.replace(temporary, path)
+
+
+class CapturedSerial:
+    """
+    @ingroup client_side
+    @class CapturedSerial
+    @brief serial.Serial stand-in that records what is read and written through it.
+    """
+
+    def __init__(self, connection, capture):
+        """
+        @brief Wrap a connection.
+        @param connection Open serial connection.
+        @param capture SerialCapture to record to.
+        """
+        self.connection = connection
+        self.capture = capture
+
+    @property
+    def baudrate(self):
+        """
+        @brief Baud rate of the wrapped connection; setting it switches the connection.
+        """
+        return self.connection.baudrate
+
+    @baudrate.setter
+    def baudrate(self, rate):
+        self.connection.baudrate = rate
+
+    def read(self, size=1):
+        """
+        @brief Read from the connection and record the bytes.
+        @param size Most bytes to read.
+        @return Bytes read.
+        """
+        data = self.connection.read(size)
+        if data:
+            self.capture.record(IN, data)
+        return data
+
+    def write(self, data):
+        """
+        @brief Write to the connection and record the bytes.
+        @param data Bytes to write.
+        @return Number of bytes written.
+        """
+        written = self.connection.write(data)
+        self.capture.record(OUT, data)
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+def read_capture(path):
+    """
+    @brief Read a capture file.
+    @param path Capture file.
+    @return Tuple (chunks, dropped): list of Chunk with wall-clock times, and the number of chunks dropped.
+    @throws ValueError If the file is not a capture.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size or data[:4] != CAPTURE_MAGIC:
+        raise ValueError(f"{path} is not a serial capture")
+    _, wall, monotonic, dropped = HEADER.unpack_from(data)
+    chunks = []
+    offset = HEADER.size
+    while offset + RECORD.size <= len(data):
+        timestamp, direction, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        chunks.append(Chunk(wall + timestamp - monotonic, direction, data[offset:offset + length]))
+        offset += length
+    return chunks, dropped
+
+
+def decode_command(payload):
+    """
+    @brief Text form of a binary command payload, the inverse of protocol.parse_command().
+    @param payload Payload bytes (without length and CRC).
+    @return Tuple (command, seq); command is None for keepalives and unknown opcodes.
+    """
+    opcode, argument, seq = payload[0], payload[1:], None
+    if opcode & OP_SEQUENCE and argument:
+        argument, seq = argument[:-1], argument[-1]
+    opcode &= ~OP_SEQUENCE
+    if opcode in (OP_MODE, OP_MOVE) and argument:
+        return ("MODE" if opcode == OP_MODE else "MOVE") + str(argument[0]), seq
+    if opcode == OP_LOAD and argument:
+        return f"LOAD{int.from_bytes(argument, 'little'):06X}", seq
+    names = {OP_RESET: "RESET", OP_TEST_CONNECTION: "<test_connection/>", OP_SAVE: "SAVE", OP_LOAD: "LOAD"}
+    return names.get(opcode) if opcode != OP_NOP else None, seq
+
+
+class CommandReader:
+    """
+    @ingroup client_side
+    @class CommandReader
+    @brief Splits the bytes written to the board back into commands.
+    """
+
+    def __init__(self, protocol="text"):
+        """
+        @brief Create a reader with an empty buffer.
+        @param protocol "text" or "binary".
+        """
+        self.protocol = protocol
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        @brief Feed written bytes and return every complete command.
+        @param data Bytes written to the board.
+        @return List of (command, seq) tuples.
+        """
+        self._buffer += data
+        commands = []
+        while self._buffer:
+            if self.protocol == "text":
+                end = self._buffer.find(b"\n")
+                if end < 0:
+                    break
+                line = self._buffer[:end].decode(errors="replace").strip()
+                del self._buffer[:end + 1]
+                number, _, rest = line[1:].partition(" ")
+                if line.startswith("#") and number.isdigit():
+                    commands.append((rest, int(number)))
+                elif line:
+                    commands.append((line, None))
+                continue
+            length = self._buffer[0]
+            if length == 0 or length > MAX_FRAME_PAYLOAD:
+                del self._buffer[0]
+                continue
+            if len(self._buffer) < length + 2:
+                break
+            frame = bytes(self._buffer[:length + 2])
+            if crc8(frame[:-1]) != frame[-1]:
+                del self._buffer[0]
+                continue
+            del self._buffer[:length + 2]
+            command, seq = decode_command(frame[1:-1])
+            if command is not None:
+                commands.append((command, seq))
+        return commands
+
+
+def analyze(chunks, timeout=1.0):
+    """
+    @brief Pair commands with their replies and collect latencies, malformed frames and timeouts.
+
+    Replies carrying a sequence number answer the command sent with it, and
+    any command sent before that one is counted as lost, as in
+    pipeline.CommandPipeline. A reply without a sequence number answers the
+    oldest unsequenced command; without one it is unsolicited (AI vs AI).
+    A command is a timeout if its reply came later than @c timeout seconds,
+    or never came before the end of its session. A BOARD reply whose status
+    is not CONTINUE, WIN or DRAW counts as malformed.
+    @param chunks Chunks in time order, as returned by read_capture().
+    @param timeout Seconds after which the client gives up on a reply.
+    @return Dictionary with "pairs", "latency" (per command type), "malformed", "timeouts",
+            "unsolicited" and "sessions".
+    """
+    pairs, malformed, timeouts = [], [], []
+    result = {"pairs": pairs, "malformed": malformed, "timeouts": timeouts, "unsolicited": 0, "sessions": 0}
+    in_flight = []
+    reader, codec = CommandReader(), TextCodec()
+
+    def lost(entry, reason):
+        command, _, sent = entry
+        timeouts.append({"time": sent, "command": command, "reason": reason})
+
+    for chunk in chunks:
+        if chunk.direction == OPENED:
+            for entry in in_flight:
+                lost(entry, "session ended")
+            in_flight = []
+            reader, codec = CommandReader(), TextCodec()
+            result["sessions"] += 1
+        elif chunk.direction == PROTOCOL:
+            protocol = chunk.data.decode()
+            reader, codec = CommandReader(protocol), BinaryCodec() if protocol == "binary" else TextCodec()
+        elif chunk.direction == OUT:
+            in_flight.extend((command, seq, chunk.time) for command, seq in reader.feed(chunk.data))
+        elif chunk.direction == IN:
+            for response in codec.feed(chunk.data):
+                # parse_response() takes any status text, so an unknown one is caught here
+                if response.kind == "MALFORMED" or (response.kind == "BOARD" and response.status not in BOARD_STATUS):
+                    malformed.append({"time": chunk.time, "raw": response.raw})
+                if response.seq is not None:
+                    index = next((i for i, entry in enumerate(in_flight) if entry[1] == response.seq), None)
+                    if index is not None:
+                        # Replies arrive in order, so sequenced commands sent before this one were lost
+                        earlier = [entry for entry in in_flight[:index] if entry[1] is not None]
+                        for entry in earlier:
+                            lost(entry, "no reply")
+                            in_flight.remove(entry)
+                        index -= len(earlier)
+                else:
+                    index = next((i for i, entry in enumerate(in_flight) if entry[1] is None), None)
+                if index is None:
+                    result["unsolicited"] += 1
+                    continue
+                command, seq, sent = in_flight.pop(index)
+                latency = chunk.time - sent
+                pairs.append({"time": sent, "command": command, "seq": seq, "reply": response.raw,
+                              "latency": latency})
+                if latency > timeout:
+                    timeouts.append({"time": sent, "command": command, "reason": f"reply after {latency:.3f} s"})
+    for entry in in_flight:
+        lost(entry, "no reply")
+    latencies = {}
+    for pair in pairs:
+        latencies.setdefault(command_kind(pair["command"]), []).append(pair["latency"])
+    result["latency"] = {kind: summarize(samples) for kind, samples in sorted(latencies.items())}
+    timeouts.sort(key=lambda entry: entry["time"])
+    return result
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Analyze a serial capture written by the Tic-Tac-Toe client.")
+    parser.add_argument('capture', type=str, help="Capture file.")
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help="Seconds after which a command counts as timed out (default: 1).")
+    parser.add_argument('--pairs', action='store_true', help="Print every command with its reply.")
+    parser.add_argument('--json', action='store_true', help="Print the analysis as JSON.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    chunks, dropped = read_capture(args.capture)
+    result = analyze(chunks, args.timeout)
+    if args.json:
+        result["dropped_chunks"] = dropped
+        print(json.dumps(result, indent=4))
+        return
+
+    def stamp(t):
+        return time.strftime('%H:%M:%S', time.localtime(t)) + f".{int(t % 1 * 1000):03d}"
+
+    sent = sum(len(chunk.data) for chunk in chunks if chunk.direction == OUT)
+    received = sum(len(chunk.data) for chunk in chunks if chunk.direction == IN)
+    print(f"{result['sessions']} session(s), {sent} bytes out, {received} bytes in, {len(result['pairs'])} "
+          f"command(s) answered, {result['unsolicited']} unsolicited replies"
+          + (f", {dropped} oldest chunk(s) dropped" if dropped else ""))
+    if args.pairs:
+        for pair in result["pairs"]:
+            print(f"{stamp(pair['time'])}  {pair['command']:<20} {pair['reply']:<32} "
+                  f"{pair['latency'] * 1000:8.3f} ms")
+    print(f"\n{'command':<16}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for kind, summary in result["latency"].items():
+        print(f"{kind:<16}{summary['count']:>7}" + "".join(f"{summary[key]:>10.3f}"
+                                                         for key in ("mean", "p50", "p95", "p99", "max")))
+    print(f"\n{len(result['malformed'])} malformed frame(s)")
+    for frame in result["malformed"]:
+        print(f"{stamp(frame['time'])}  {frame['raw']}")
+    print(f"\n{len(result['timeouts'])} timeout(s)")
+    for entry in result["timeouts"]:
+        print(f"{stamp(entry['time'])}  {entry['command']:<20} {entry['reason']}")
+
+
+if __name__ == "__main__":
+    main()
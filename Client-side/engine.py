@@ -0,0 +1,255 @@
+"""
+@file engine.py
+@ingroup client_side
+@brief Fast in-process Tic-Tac-Toe engine used for headless AI vs AI play.
+
+Positions are the raw X and O masks of a board.Board, so win detection is a
+single WINNING lookup and no line scan is needed while playing.
+greedy_move() reproduces calculateAIMove() of the firmware move for move.
+Player wraps a strategy so the GUI can play one side of a game on the host.
+"""
+import random
+import time
+
+from board import FREE_CELLS, FULL, INVERSE_SYMMETRIES, SYMMETRIES, WINNING, canonical
+from transposition import EXACT, LOWER_BOUND, UPPER_BOUND, TranspositionTable
+
+CORNERS = (0, 2, 6, 8)
+
+# Game modes of the board by name, and the sides (1: X, 2: O) an AI plays in each
+MODES = {'Man vs Man': 1, 'Man vs AI': 2, 'AI vs AI': 3}
+AI_SIDES = {'Man vs Man': (), 'Man vs AI': (2,), 'AI vs AI': (1, 2)}
+
+
+def _greedy(own, opp):
+    free = FREE_CELLS[own | opp]
+    for i in free:
+        if WINNING[own | 1 << i]:
+            return i
+    for i in free:
+        if WINNING[opp | 1 << i]:
+            return i
+    if 4 in free:
+        return 4
+    for i in CORNERS:
+        if i in free:
+            return i
+    return free[0] if free else -1
+
+
+_GREEDY_CACHE = {}
+
+
+def greedy_move(own, opp, rng=None):
+    """
+    @brief Win-maximizing heuristic of the firmware: win, block, center, corner, first free cell.
+    @param own Mask of the cells owned by the player to move.
+    @param opp Mask of the cells owned by the opponent.
+    @param rng Unused; present so that every strategy has the same signature.
+    @return Index of the chosen cell, or -1 if the board is full.
+    """
+    key = own << 9 | opp
+    move = _GREEDY_CACHE.get(key)
+    if move is None:
+        move = _GREEDY_CACHE[key] = _greedy(own, opp)
+    return move
+
+
+def random_move(own, opp, rng=random):
+    """
+    @brief Pick a uniformly random empty cell.
+    @param own Mask of the cells owned by the player to move.
+    @param opp Mask of the cells owned by the opponent.
+    @param rng random.Random instance (or the random module) to draw from.
+    @return Index of the chosen cell, or -1 if the board is full.
+    """
+    free = FREE_CELLS[own | opp]
+    return rng.choice(free) if free else -1
+
+
+_PERFECT_CACHE = {}
+_perfect_table = None
+
+
+def perfect_move(own, opp, rng=None):
+    """
+    @brief Optimal move looked up in the perfect-play table of solver.py (solved on first use).
+    @param own Mask of the cells owned by the player to move.
+    @param opp Mask of the cells owned by the opponent.
+    @param rng Unused; present so that every strategy has the same signature.
+    @return Index of the chosen cell, or -1 if the board is full.
+    """
+    global _perfect_table
+    key = own << 9 | opp
+    move = _PERFECT_CACHE.get(key)
+    if move is None:
+        if _perfect_table is None:
+            from solver import MoveTable
+            _perfect_table = MoveTable.build()
+        move = _perfect_table.move(own, opp)
+        if move < 0:
+            move = greedy_move(own, opp)
+        _PERFECT_CACHE[key] = move
+    return move
+
+
+SEARCH_TABLE = TranspositionTable(capacity=8192)
+
+
+def _negamax(own, opp, alpha, beta, depth, table):
+    free = FREE_CELLS[own | opp]
+    if WINNING[opp]:
+        return -(1 + len(free)), -1
+    if not free or depth == 0:
+        return 0, -1
+
+    key, t = canonical(own, opp)
+    entry = table.get(key)
+    first = -1
+    if entry is not None:
+        entry_depth, flag, score, move = entry
+        first = INVERSE_SYMMETRIES[t][move]
+        if entry_depth >= depth and (flag == EXACT or
+                                     (flag == LOWER_BOUND and score >= beta) or
+                                     (flag == UPPER_BOUND and score <= alpha)):
+            return score, first
+
+    original_alpha = alpha
+    best, best_move = -100, -1
+    moves = free if first < 0 else (first,) + tuple(i for i in free if i != first)
+    for i in moves:
+        score = -_negamax(opp, own | 1 << i, -beta, -alpha, depth - 1, table)[0]
+        if score > best:
+            best, best_move = score, i
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+    if best <= original_alpha:
+        flag = UPPER_BOUND
+    elif best >= beta:
+        flag = LOWER_BOUND
+    else:
+        flag = EXACT
+    table.put(key, (depth, flag, best, SYMMETRIES[t][best_move]))
+    return best, best_move
+
+
+def search_move(own, opp, table=None, depth=9):
+    """
+    @brief Alpha-beta search backed by a transposition table.
+    @param own Mask of the cells owned by the player to move.
+    @param opp Mask of the cells owned by the opponent.
+    @param table TranspositionTable to use; defaults to the shared SEARCH_TABLE.
+    @param depth Maximum number of plies to search (9 searches to the end of the game).
+    @return Index of the chosen cell, or -1 if the game is over.
+    """
+    return _negamax(own, opp, -100, 100, depth, SEARCH_TABLE if table is None else table)[1]
+
+
+def calculate_ai_move(board, player, table=None, depth=9):
+    """
+    @brief Search-based counterpart of calculateAIMove() in the firmware.
+    @param board Current board.Board.
+    @param player The player for which the move is calculated (1: X, 2: O).
+    @param table TranspositionTable to use; defaults to the shared SEARCH_TABLE.
+    @param depth Maximum number of plies to search.
+    @return The index of the calculated move, or -1 if no move is possible.
+    """
+    own, opp = (board.x, board.o) if player == 1 else (board.o, board.x)
+    return search_move(own, opp, table, depth)
+
+
+def _search_strategy(own, opp, rng=None):
+    return search_move(own, opp)
+
+
+STRATEGIES = {
+    "random": random_move,
+    "greedy": greedy_move,
+    "perfect": perfect_move,
+    "search": _search_strategy,
+}
+
+
+class Player:
+    """
+    @ingroup client_side
+    @class Player
+    @brief One side of a game played by a strategy from STRATEGIES, timing every move.
+    """
+
+    def __init__(self, name, seed=None):
+        """
+        @brief Create a player.
+        @param name Strategy name, a key of STRATEGIES.
+        @param seed Optional seed of the player's own random generator, for reproducible games.
+        @throws KeyError If there is no strategy of that name.
+        """
+        self.name = name
+        self.strategy = STRATEGIES[name]
+        self.rng = random.Random(seed)
+        self.moves = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def move(self, board, player):
+        """
+        @brief Choose a move and record how long the strategy took.
+        @param board Current board.Board.
+        @param player The side to move (1: X, 2: O).
+        @return Index of the chosen cell, or -1 if no move is possible.
+        """
+        own, opp = (board.x, board.o) if player == 1 else (board.o, board.x)
+        start = time.perf_counter()
+        move = self.strategy(own, opp, self.rng)
+        self.last_time = time.perf_counter() - start
+        self.moves += 1
+        self.total_time += self.last_time
+        self.max_time = max(self.max_time, self.last_time)
+        return move
+
+    def timing(self):
+        """
+        @brief Summary of the compute time per move.
+        @return Text such as "search: 12 moves, last 0.05 ms, mean 0.31 ms, max 3.20 ms".
+        """
+        mean = self.total_time / self.moves if self.moves else 0.0
+        return (f"{self.name}: {self.moves} moves, last {self.last_time * 1000:.2f} ms, "
+                f"mean {mean * 1000:.2f} ms, max {self.max_time * 1000:.2f} ms")
+
+
+def play_game(x_strategy, o_strategy, rng=random):
+    """
+    @brief Play one game to the end, X moving first as in the firmware AI vs AI loop.
+    @param x_strategy Strategy function for X.
+    @param o_strategy Strategy function for O.
+    @param rng Random generator handed to the strategies.
+    @return 1 if X wins, 2 if O wins, 0 for a draw.
+    """
+    x = o = 0
+    while True:
+        x |= 1 << x_strategy(x, o, rng)
+        if WINNING[x]:
+            return 1
+        if x | o == FULL:
+            return 0
+        o |= 1 << o_strategy(o, x, rng)
+        if WINNING[o]:
+            return 2
+
+
+def play_games(x_strategy, o_strategy, games, rng=random):
+    """
+    @brief Play a series of games.
+    @param x_strategy Strategy function for X.
+    @param o_strategy Strategy function for O.
+    @param games Number of games.
+    @param rng Random generator handed to the strategies.
+    @return List [draws, X wins, O wins].
+    """
+    results = [0, 0, 0]
+    for _ in range(games):
+        results[play_game(x_strategy, o_strategy, rng)] += 1
+    return results
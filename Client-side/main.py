@@ -3,16 +3,65 @@
 @brief Documentation for the client-side application.
 @{
 """
+import time
+STARTUP_MARKS = [("start", time.perf_counter())]
+
 import sys
 import configparser
-import serial
-import serial.tools.list_ports
 import os
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout,
                              QHBoxLayout, QWidget, QComboBox, QLabel, QMessageBox,
-                             QGridLayout)
+                             QGridLayout, QListWidget, QFileDialog)
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QPalette, QColor
+STARTUP_MARKS.append(("import PyQt5", time.perf_counter()))
+
+# pyserial, the serial worker and the game log are imported on first use, after the window is shown
+from board import Board
+from engine import AI_SIDES, MODES, STRATEGIES, Player
+from playback import FRAME_INTERVAL_MS, SPEEDS, FrameBuffer, Playback, is_outcome
+from reconnect import ReconnectSupervisor
+from savegame import Snapshot
+STARTUP_MARKS.append(("import client modules", time.perf_counter()))
+
+BOARD_AI = 'Board AI'
+HISTORY_LIMIT = 100000
+RESULTS_SHOWN = 200
+CONNECTION_CHECK_MS = 1000
+
+
+class StartupProfile:
+    """
+    @ingroup client_side
+    @class StartupProfile
+    @brief Time taken by each startup step, printed by --profile-startup.
+    """
+
+    def __init__(self, marks):
+        """
+        @brief Continue a list of (step, time.perf_counter()) marks.
+        @param marks Marks taken so far; the first one is the start of the program.
+        """
+        self.marks = marks
+
+    def mark(self, step):
+        """
+        @brief Record that a step has just finished.
+        @param step Name of the step.
+        """
+        self.marks.append((step, time.perf_counter()))
+
+    def report(self):
+        """
+        @brief Format the time spent in each step.
+        @return Report text with one line per step, in milliseconds.
+        """
+        lines = ["Startup profile (ms):"]
+        for (_, previous), (step, finished) in zip(self.marks, self.marks[1:]):
+            lines.append(f"  {step:<32}{(finished - previous) * 1000:8.1f}")
+        lines.append(f"  {'total':<32}{(self.marks[-1][1] - self.marks[0][1]) * 1000:8.1f}")
+        return "\n".join(lines)
 
 
 class TicTacToeGUI(QMainWindow):
@@ -21,14 +70,23 @@ class TicTacToeGUI(QMainWindow):
     @class TicTacToeGUI
     @brief GUI for the Tic Tac Toe game using PyQt5.
     """
-    def __init__(self):
+    def __init__(self, profile=None):
         """
         @brief Initialize the Tic Tac Toe GUI application.
+
+        Only what the first paint needs is done here; opening the game log and
+        enumerating the serial ports wait for finish_startup().
+
+        @param profile Optional StartupProfile that records the startup steps.
         """
         super().__init__()
+        self.profile = profile
         self.init_ui()
+        self.mark_startup("build window")
         self.init_game_state()
         self.init_timers()
+        self.mark_startup("game state and timers")
+        QTimer.singleShot(0, self.finish_startup)
 
     def init_ui(self):
         """
@@ -41,7 +99,6 @@ class TicTacToeGUI(QMainWindow):
                 background-color: #f0f0f0;
                 border: 2px solid #999;
                 border-radius: 5px;
-                color: #000000
             }
             QPushButton:hover {
                 background-color: #e0e0e0;
@@ -75,6 +132,9 @@ class TicTacToeGUI(QMainWindow):
         # Add game mode controls
         mode_layout = self.create_game_mode_controls()
         layout.addLayout(mode_layout)
+        self.ai_timing_label = QLabel("")
+        self.ai_timing_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.ai_timing_label)
 
         # Add game board
         layout.addLayout(self.create_game_board())
@@ -95,6 +155,18 @@ class TicTacToeGUI(QMainWindow):
         self.reset_btn.clicked.connect(self.reset_game)
         layout.addWidget(self.reset_btn)
 
+        # Add save and load buttons
+        layout.addLayout(self.create_save_controls())
+
+        # Add replay controls and the results panel
+        layout.addLayout(self.create_playback_controls())
+        self.results_label = QLabel("X wins: 0   O wins: 0   Draws: 0")
+        self.results_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.results_label)
+        self.results_list = QListWidget()
+        self.results_list.setMaximumHeight(100)
+        layout.addWidget(self.results_list)
+
     def create_connection_controls(self):
         """
         @brief Create controls for serial connection settings.
@@ -103,23 +175,18 @@ class TicTacToeGUI(QMainWindow):
         conn_layout = QHBoxLayout()
         conn_layout.setSpacing(10)
 
-        # Port selection
+        # Port selection, filled in and kept up to date by a background watcher (see watch_ports())
         self.port_combo = QComboBox()
-        self.refresh_ports()
+        self.port_scanner = None
         conn_layout.addWidget(QLabel("Port:"))
         conn_layout.addWidget(self.port_combo)
 
-        # Refresh button
-        refresh_btn = QPushButton("🔄")
-        refresh_btn.setToolTip("Refresh Ports")
-        refresh_btn.clicked.connect(self.refresh_ports)
-        conn_layout.addWidget(refresh_btn)
-
         # Baud rate selection
         self.baud_combo = QComboBox()
         self.baud_combo.addItems(['9600', '19200', '38400', '57600', '115200'])
         self.config = self.load_config()
         self.baud_combo.setCurrentText(self.config.get('Serial', 'baud_rate', fallback='9600'))
+        self.baud_combo.setToolTip("Highest baud rate to negotiate with the board")
         conn_layout.addWidget(QLabel("Baud:"))
         conn_layout.addWidget(self.baud_combo)
 
@@ -132,7 +199,7 @@ class TicTacToeGUI(QMainWindow):
 
     def create_game_mode_controls(self):
         """
-        @brief Create controls for selecting the game mode.
+        @brief Create controls for selecting the game mode and the AI strategy of each side.
         @return QHBoxLayout containing the game mode controls.
         """
         mode_layout = QHBoxLayout()
@@ -142,8 +209,55 @@ class TicTacToeGUI(QMainWindow):
         self.mode_combo.currentIndexChanged.connect(self.change_mode)
         mode_layout.addWidget(QLabel("Game Mode:"))
         mode_layout.addWidget(self.mode_combo)
+
+        # Strategy per side: the board's own AI, or a strategy of engine.py played by the client
+        self.strategy_combos = {}
+        for side, name in ((1, 'X'), (2, 'O')):
+            combo = QComboBox()
+            combo.addItems([BOARD_AI] + sorted(STRATEGIES))
+            combo.setCurrentText(self.config.get('AI', f'{name.lower()}_strategy', fallback=BOARD_AI))
+            combo.setToolTip(f"AI strategy for {name}")
+            combo.currentIndexChanged.connect(self.change_mode)
+            mode_layout.addWidget(QLabel(f"{name}:"))
+            mode_layout.addWidget(combo)
+            self.strategy_combos[side] = combo
+        self.update_strategy_controls()
         return mode_layout
 
+    def create_save_controls(self):
+        """
+        @brief Create the Save Game and Load Game buttons.
+        @return QHBoxLayout containing the buttons.
+        """
+        save_layout = QHBoxLayout()
+        save_btn = QPushButton("Save Game")
+        save_btn.clicked.connect(self.save_game)
+        save_layout.addWidget(save_btn)
+        load_btn = QPushButton("Load Game")
+        load_btn.clicked.connect(self.load_game)
+        save_layout.addWidget(load_btn)
+        return save_layout
+
+    def create_playback_controls(self):
+        """
+        @brief Create the session replay button and the playback speed selection.
+        @return QHBoxLayout containing the playback controls.
+        """
+        playback_layout = QHBoxLayout()
+        self.replay_btn = QPushButton("Replay Session")
+        self.replay_btn.clicked.connect(self.toggle_playback)
+        playback_layout.addWidget(self.replay_btn)
+        self.replay_file_btn = QPushButton("Replay File...")
+        self.replay_file_btn.clicked.connect(self.replay_file)
+        playback_layout.addWidget(self.replay_file_btn)
+        self.speed_combo = QComboBox()
+        self.speed_combo.addItems(list(SPEEDS))
+        self.speed_combo.setCurrentText(self.config.get('Game', 'playback_speed', fallback='1x'))
+        self.speed_combo.currentIndexChanged.connect(self.change_speed)
+        playback_layout.addWidget(QLabel("Speed:"))
+        playback_layout.addWidget(self.speed_combo)
+        return playback_layout
+
     def create_game_board(self):
         """
         @brief Create the Tic Tac Toe game board UI.
@@ -153,6 +267,13 @@ class TicTacToeGUI(QMainWindow):
         board_layout.setSpacing(5)
         self.board_buttons = []
 
+        # One palette per cell state, built once and shared by every button
+        self.cell_palettes = []
+        for color in ("#000000", "#1E3A8A", "#FF9800"):
+            palette = QPalette()
+            palette.setColor(QPalette.ButtonText, QColor(color))
+            self.cell_palettes.append(palette)
+
         for i in range(9):
             btn = QPushButton()
             btn.setFont(QFont('Arial', 32, QFont.Bold))
@@ -167,21 +288,79 @@ class TicTacToeGUI(QMainWindow):
         """
         @brief Initialize the game state variables.
         """
-        self.serial_conn = None
+        self.serial_worker = None
+        self.auto_connecting = False
+        self.reconnector = ReconnectSupervisor(
+            max_delay=self.config.getfloat('Serial', 'reconnect_max_delay', fallback=8.0),
+            max_attempts=self.config.getint('Serial', 'reconnect_attempts', fallback=0))
+        self.reconnect_port = None
+        self.players = self.create_players()
+        self.move_pending = False
+        self.board = Board()
         self.game_active = True
+        self.frames = FrameBuffer()
+        self.history = deque(maxlen=HISTORY_LIMIT)
+        self.live_frame = None
+        self.resume_snapshot = None
+        self.playback = None
+        self.replay_log = None
+        self.recorder = None
+        self.metrics = None
+        self.capture = None
+        self.timer_due = {}
+        self.tally = {"X": 0, "O": 0, "DRAW": 0}
+        self.games_finished = 0
 
     def init_timers(self):
         """
-        @brief Initialize timers for AI moves and connection monitoring.
+        @brief Initialize the connection monitoring and render timers.
         """
-        # Timer for AI moves
-        self.ai_timer = QTimer()
-        self.ai_timer.timeout.connect(self.check_ai_moves)
-
         # Timer for connection monitoring
         self.connection_timer = QTimer()
         self.connection_timer.timeout.connect(self.check_connection)
-        self.connection_timer.start(1000)
+        self.connection_timer.start(CONNECTION_CHECK_MS)
+        self.timer_due["connection"] = time.monotonic() + CONNECTION_CHECK_MS / 1000
+
+        # Next move of a side played by the client
+        self.host_move_timer = QTimer()
+        self.host_move_timer.setSingleShot(True)
+        self.host_move_timer.timeout.connect(self.play_host_move)
+
+        # Next attempt to reopen a lost connection
+        self.reconnect_timer = QTimer()
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self.reconnect)
+
+        # Render timer; runs at display rate only while frames are pending
+        self.render_timer = QTimer()
+        self.render_timer.setInterval(FRAME_INTERVAL_MS)
+        self.render_timer.timeout.connect(self.render_frames)
+
+        # Export of the metrics file, started by open_metrics()
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.export_metrics)
+
+    def mark_startup(self, step):
+        """
+        @brief Record a finished startup step when profiling.
+        @param step Name of the step.
+        """
+        if self.profile is not None:
+            self.profile.mark(step)
+
+    def finish_startup(self):
+        """
+        @brief Startup work that waits until the window is on screen.
+
+        Runs on the first pass of the event loop: opens the game log, enables
+        the metrics and the serial capture and starts watching the serial ports.
+        """
+        self.mark_startup("first event loop pass")
+        self.recorder = self.open_recorder()
+        self.mark_startup("open game log")
+        self.metrics = self.open_metrics()
+        self.capture = self.open_capture()
+        self.watch_ports()
 
     def load_config(self):
         """
@@ -191,225 +370,873 @@ class TicTacToeGUI(QMainWindow):
         config = configparser.ConfigParser()
         try:
             config.read('tictactoe.ini')
-        except:
+        except (configparser.Error, UnicodeDecodeError):
             config['Serial'] = {'baud_rate': '9600'}
             config['Game'] = {'default_mode': 'Man vs Man'}
             with open('tictactoe.ini', 'w') as f:
                 config.write(f)
         return config
 
-    def refresh_ports(self):
+    def open_recorder(self):
+        """
+        @brief Open the game log named in the [Recorder] section of the settings.
+        @return GameRecorder, or None if recording is disabled or the log cannot be opened.
+        """
+        path = self.config.get('Recorder', 'path', fallback='games.ttr')
+        if not path:
+            return None
+        from recorder import GameRecorder
+        try:
+            return GameRecorder(path)
+        except (OSError, ValueError) as e:
+            print(f"Game recording disabled: {e}")
+            return None
+
+    def open_metrics(self):
+        """
+        @brief Enable the metrics if the [Metrics] section of the settings asks for them.
+
+        The metrics are written to [Metrics] path every [Metrics] interval
+        seconds and once more on exit, in the [Metrics] format ("prometheus"
+        or "json"); see metrics.py.
+        @return metrics.Metrics registry, or None if metrics are disabled.
+        """
+        if not self.config.getboolean('Metrics', 'enabled', fallback=False):
+            return None
+        from metrics import Metrics
+        interval = self.config.getfloat('Metrics', 'interval', fallback=10.0)
+        if interval > 0:
+            self.metrics_timer.start(int(interval * 1000))
+        return Metrics()
+
+    def export_metrics(self):
+        """
+        @brief Write the metrics file, with the reconnect counters brought up to date.
+        """
+        if not self.metrics:
+            return
+        reconnect = self.reconnector.metrics()
+        self.metrics.set("reconnects", reconnect["reconnects"])
+        self.metrics.set("reconnect_outages", reconnect["outages"])
+        self.metrics.set("reconnect_failed_attempts", reconnect["failed_attempts"])
+        self.metrics.set("replayed_commands", reconnect["replayed_commands"])
+        self.metrics.set("downtime_seconds", reconnect["downtime_total"])
+        path = self.config.get('Metrics', 'path', fallback='metrics.prom')
+        try:
+            self.metrics.write(path, self.config.get('Metrics', 'format', fallback='prometheus'))
+        except (OSError, ValueError) as e:
+            print(f"Metrics export disabled: {e}")
+            self.metrics_timer.stop()
+
+    def open_capture(self):
+        """
+        @brief Start capturing the serial traffic if the [Capture] section of the settings asks for it.
+
+        The capture keeps the last [Capture] max_size bytes of traffic and is
+        written to [Capture] path when a connection is lost and on exit; read
+        it with "python capture.py <path>".
+        @return capture.SerialCapture, or None if capturing is disabled.
+        """
+        if not self.config.getboolean('Capture', 'enabled', fallback=False):
+            return None
+        from capture import SerialCapture
+        return SerialCapture(self.config.get('Capture', 'path', fallback='serial.ttc'),
+                             self.config.getint('Capture', 'max_size', fallback=1 << 20))
+
+    def save_capture(self):
         """
-        @brief Refresh the list of available serial ports.
+        @brief Write the serial capture to its file.
         """
+        if not self.capture:
+            return
+        try:
+            self.capture.save()
+        except OSError as e:
+            self.note_exception("save_capture", e)
+
+    def note_exception(self, site, error):
+        """
+        @brief Report an exception caught by the GUI and count it by site.
+        @param site Name of the method that caught it.
+        @param error The exception.
+        """
+        print(f"{site}: {type(error).__name__}: {error}")
+        if self.metrics:
+            self.metrics.count("exceptions_total", site=site)
+
+    def note_tick(self, timer, interval=None):
+        """
+        @brief Measure how late a timer fired against the time it was due.
+        @param timer Name of the timer, as used in timer_due.
+        @param interval Seconds until its next tick for a repeating timer; None for a single shot.
+        """
+        now = time.monotonic()
+        due = self.timer_due.pop(timer, None)
+        if interval is not None:
+            self.timer_due[timer] = now + interval
+        if self.metrics and due is not None:
+            self.metrics.observe("timer_jitter_seconds", max(0.0, now - due), timer=timer)
+
+    def start_render_timer(self):
+        """
+        @brief Start the render timer, noting when its first tick is due.
+        """
+        self.render_timer.start()
+        self.timer_due["render"] = time.monotonic() + FRAME_INTERVAL_MS / 1000
+
+    def watch_ports(self):
+        """
+        @brief Enumerate the serial ports in the background and follow boards being plugged in and out.
+
+        Enumerating ports can take hundreds of milliseconds, so it runs on a
+        PortScanner thread: populate_ports() fills in the list, then
+        on_port_added() and on_port_removed() update it one port at a time.
+        """
+        if self.port_scanner is not None:
+            return
+        from port_watcher import PortWatcher
+        from serial_worker import PortScanner
+        self.port_scanner = PortScanner(PortWatcher())
+        self.port_scanner.ports_found.connect(self.populate_ports)
+        self.port_scanner.port_added.connect(self.on_port_added)
+        self.port_scanner.port_removed.connect(self.on_port_removed)
+        self.port_scanner.start()
+
+    def populate_ports(self, ports):
+        """
+        @brief Show the ports found by the background scan, keeping the current selection.
+        @param ports List of port names.
+        """
+        if self.profile is not None:
+            self.mark_startup("scan ports (background)")
+            print(self.profile.report())
+            self.profile = None
+            self.port_scanner.stop()
+            QApplication.quit()
         current_port = self.port_combo.currentText()
         self.port_combo.clear()
-        ports = [port.device for port in serial.tools.list_ports.comports()]
         self.port_combo.addItems(ports)
         if current_port in ports:
             self.port_combo.setCurrentText(current_port)
         elif ports:
             self.port_combo.setCurrentText(ports[0])
 
+    def on_port_added(self, port):
+        """
+        @brief Add a newly plugged port and, if [Serial] auto_connect is on, connect to it.
+
+        A lost board that comes back is reconnected at once instead of on the next backoff attempt.
+        @param port Port name.
+        """
+        if self.port_combo.findText(port) < 0:
+            self.port_combo.addItem(port)
+        if port == self.reconnect_port and self.serial_worker is None:
+            self.reconnect_timer.stop()
+            self.reconnect()
+            return
+        if (self.serial_worker is None and not self.reconnector.down
+                and self.config.getboolean('Serial', 'auto_connect', fallback=False)):
+            self.port_combo.setCurrentText(port)
+            self.auto_connecting = True
+            self.toggle_connection()
+
+    def on_port_removed(self, port):
+        """
+        @brief Drop an unplugged port; a connection to it waits for the board to come back.
+        @param port Port name.
+        """
+        if self.serial_worker is not None and self.serial_worker.port == port:
+            self.on_connection_lost(f"{port} was unplugged")
+        index = self.port_combo.findText(port)
+        if index >= 0:
+            self.port_combo.removeItem(index)
+
     def check_connection(self):
         """
         @brief Check if the serial connection is active.
+
+        Liveness is passive: nothing is written while the board keeps sending.
+        After @c heartbeat seconds of silence a connection test is sent, and
+        after three heartbeats without any byte the connection is dropped.
+        A heartbeat of 0 disables both.
         """
+        self.note_tick("connection", CONNECTION_CHECK_MS / 1000)
         try:
-            if self.serial_conn:
-                try:
-                    self.serial_conn.write(b"\n")
-                    self.status_label.setText("Connected")
-                    self.status_label.setStyleSheet("color: green; font-weight: bold;")
-                except:
-                    self.handle_disconnection()
+            if self.serial_worker and self.serial_worker.isRunning() and self.serial_worker.pipeline:
+                heartbeat = self.config.getfloat('Serial', 'heartbeat', fallback=5.0)
+                idle = self.serial_worker.idle_time()
+                if heartbeat > 0 and idle > 3 * heartbeat:
+                    self.on_connection_lost("No data from the board")
+                    return
+                if heartbeat > 0 and idle > heartbeat:
+                    self.serial_worker.ping()
+                self.show_connected_status()
         except KeyboardInterrupt:
             self.closeEvent(None)  # Викликаємо метод закриття вікна
             QApplication.quit()  # Закриваємо додаток
 
-    def handle_disconnection(self):
+    def handle_disconnection(self, reason=None):
         """
         @brief Handle serial connection disconnection.
+
+        If the connection was lost (rather than closed by the user) during a
+        game, a snapshot of the game is kept and pushed to the board on the
+        next connect, so the game goes on where it stopped.
+
+        @param reason Optional description of why the connection was lost.
         """
-        self.serial_conn = None
+        if reason is not None and self.live_frame is not None and self.game_active:
+            self.resume_snapshot = self.current_snapshot()
+        if self.serial_worker:
+            self.serial_worker.stop()
+        if reason is not None:
+            self.save_capture()
+        self.serial_worker = None
+        self.auto_connecting = False
+        self.reconnect_timer.stop()
+        self.reconnector.give_up()
+        self.reconnect_port = None
+        self.host_move_timer.stop()
+        self.move_pending = False
+        self.connect_btn.setEnabled(True)
         self.connect_btn.setText("Connect")
         self.connect_btn.setStyleSheet("")
         self.port_combo.setEnabled(True)
         self.baud_combo.setEnabled(True)
-        self.status_label.setText("Disconnected")
+        self.status_label.setText("Disconnected" if reason is None else f"Disconnected ({reason})")
         self.status_label.setStyleSheet("color: red; font-weight: bold;")
-        self.ai_timer.stop()
         self.game_active = True
 
+    def on_connection_lost(self, reason):
+        """
+        @brief Keep the session through a lost connection and reopen the port with backoff.
+
+        The game is kept as a resume snapshot (see handle_disconnection()) and
+        the commands the board never answered are kept for replay, followed by
+        the moves, mode changes and resets made during the outage (see
+        send_command()). The same
+        port is then reopened after a delay that doubles with every failed
+        attempt, redoing the baud rate, protocol and pipeline handshake;
+        on_connected() restores the game and replays the commands. With
+        [Serial] reconnect off, or after [Serial] reconnect_attempts failed
+        attempts, the connection is dropped as before.
+
+        @param reason Description of why the connection was lost.
+        """
+        worker = self.serial_worker
+        if worker is None:
+            return
+        if not self.config.getboolean('Serial', 'reconnect', fallback=True):
+            self.handle_disconnection(reason)
+            return
+        if self.live_frame is not None and self.game_active:
+            self.resume_snapshot = self.current_snapshot()
+        worker.stop()
+        self.save_capture()
+        self.serial_worker = None
+        self.reconnect_port = worker.port
+        self.schedule_reconnect(self.reconnector.connection_lost(reason, worker.unacked_commands()))
+
+    def schedule_reconnect(self, delay):
+        """
+        @brief Start the timer for the next reconnect attempt, or give up.
+        @param delay Seconds until the attempt, or None to drop the connection.
+        """
+        if delay is None:
+            self.handle_disconnection(self.reconnector.last_error)
+            return
+        self.connect_btn.setEnabled(True)
+        self.connect_btn.setText("Disconnect")
+        self.port_combo.setEnabled(False)
+        self.baud_combo.setEnabled(False)
+        self.status_label.setText(f"Reconnecting in {delay:g} s (attempt {self.reconnector.attempts}): "
+                                  f"{self.reconnector.last_error}")
+        self.status_label.setStyleSheet("color: #FF9800; font-weight: bold;")
+        self.reconnect_timer.start(int(delay * 1000))
+
+    def reconnect(self):
+        """
+        @brief Reconnect attempt: reopen the port of the lost connection.
+        """
+        if self.serial_worker is None and self.reconnector.down:
+            self.start_worker(self.reconnect_port)
+            self.connect_btn.setEnabled(True)
+
     def toggle_connection(self):
         """
         @brief Toggle the connection state with the Arduino device.
+
+        While a lost connection is being reopened the button cancels the attempts.
         """
-        if self.serial_conn is None:
+        if self.serial_worker is None and not self.reconnector.down:
             try:
                 port = self.port_combo.currentText()
                 if not port:
                     raise ValueError("No port selected")
-
-                baud = int(self.baud_combo.currentText())
-                self.serial_conn = serial.Serial(port, baud, timeout=1)
-                self.connect_btn.setText("Disconnect")
-                self.connect_btn.setStyleSheet("background-color: #ff4444; color: white;")
-                self.port_combo.setEnabled(False)
-                self.baud_combo.setEnabled(False)
-                self.status_label.setText("Connected")
-                self.status_label.setStyleSheet("color: green; font-weight: bold;")
-                self.reset_game()
-
-                if self.mode_combo.currentText() == 'AI vs AI':
-                    self.ai_timer.start(100)
-
+                self.start_worker(port)
             except Exception as e:
-                QMessageBox.critical(self, "Connection Error",
-                                     f"Failed to connect: {str(e)}\n"
-                                     f"Please check if the device is connected and the port is correct.")
-                self.serial_conn = None
+                self.on_connection_failed(str(e))
         else:
-            self.serial_conn.close()
             self.handle_disconnection()
 
+    def start_worker(self, port):
+        """
+        @brief Start a serial worker that opens the port and negotiates the connection.
+        @param port Serial port name.
+        """
+        from serial_worker import SerialWorker
+        baud = int(self.baud_combo.currentText())
+        protocol = self.config.get('Serial', 'protocol', fallback='text')
+        window = self.config.getint('Serial', 'window', fallback=4)
+        cached_baud = self.config.getint('BaudCache', port, fallback=None)
+        self.serial_worker = SerialWorker(port, baud, timeout=1, protocol=protocol, window=window,
+                                          cached_baud=cached_baud, metrics=self.metrics,
+                                          capture=self.capture)
+        self.serial_worker.opened.connect(self.on_connected)
+        self.serial_worker.open_failed.connect(self.on_connection_failed)
+        self.serial_worker.response_received.connect(self.handle_response)
+        self.serial_worker.connection_lost.connect(self.on_connection_lost)
+        self.connect_btn.setEnabled(False)
+        self.port_combo.setEnabled(False)
+        self.baud_combo.setEnabled(False)
+        if not self.reconnector.down:
+            self.status_label.setText("Connecting...")
+            self.status_label.setStyleSheet("font-weight: bold;")
+        self.serial_worker.start()
+
+    def on_connected(self):
+        """
+        @brief Update the UI once the worker has opened the serial port.
+        """
+        if self.serial_worker is None:
+            return  # Disconnected before the queued signal was delivered
+        self.auto_connecting = False
+        self.connect_btn.setEnabled(True)
+        self.connect_btn.setText("Disconnect")
+        self.connect_btn.setStyleSheet("background-color: #ff4444; color: white;")
+        if not self.config.has_section('BaudCache'):
+            self.config.add_section('BaudCache')
+        self.config['BaudCache'][self.serial_worker.port] = str(self.serial_worker.negotiated_baud)
+        reconnected = self.reconnector.down
+        replay = self.reconnector.connected()
+        self.reconnect_port = None
+        self.move_pending = any(command.startswith("MOVE") for command in replay)
+        self.show_connected_status()
+        if self.resume_snapshot is not None:
+            snapshot, self.resume_snapshot = self.resume_snapshot, None
+            self.restore_game(snapshot)
+        else:
+            self.change_mode()
+        # The board is back where the last reply left it; what followed is sent again
+        for command in replay:
+            self.serial_worker.send(command)
+        if reconnected:
+            metrics = self.reconnector.metrics()
+            self.results_list.insertItem(0, f"Reconnected after {metrics['downtime_last']:.1f} s, "
+                                            f"{len(replay)} command(s) replayed")
+            self.status_label.setToolTip(f"Reconnects: {metrics['reconnects']}\n"
+                                         f"Failed attempts: {metrics['failed_attempts']}\n"
+                                         f"Downtime: {metrics['downtime_total']:.1f} s")
+
+    def show_connected_status(self):
+        """
+        @brief Show the connected state, the negotiated baud rate and protocol in the status label.
+
+        Called every second by check_connection(), so the label is only restyled when its text changes.
+        """
+        text = f"Connected at {self.serial_worker.negotiated_baud} baud"
+        if self.serial_worker.codec.name == "binary":
+            text += " (binary)"
+        if self.status_label.text() == text:
+            return
+        self.status_label.setText(text)
+        self.status_label.setStyleSheet("color: green; font-weight: bold;")
+
+    def on_connection_failed(self, error):
+        """
+        @brief Report a failed connection attempt and restore the connection controls.
+        @param error Description of the failure.
+        """
+        if self.serial_worker:
+            self.serial_worker.wait()
+        self.serial_worker = None
+        if self.reconnector.down:
+            self.schedule_reconnect(self.reconnector.attempt_failed(error))
+            return
+        self.connect_btn.setEnabled(True)
+        self.port_combo.setEnabled(True)
+        self.baud_combo.setEnabled(True)
+        self.status_label.setText("Not Connected")
+        self.status_label.setStyleSheet("font-weight: bold;")
+        if self.auto_connecting:
+            # Not every device that is plugged in is a board; no dialog for those
+            self.auto_connecting = False
+            self.status_label.setText(f"Not Connected ({error})")
+            return
+        QMessageBox.critical(self, "Connection Error",
+                             f"Failed to connect: {error}\n"
+                             f"Please check if the device is connected and the port is correct.")
+
     def change_mode(self):
         """
         @brief Change the game mode based on user selection.
+
+        MODE and RESET are queued back to back; both travel in the same pipeline window.
         """
-        if self.serial_conn:
-            mode_map = {'Man vs Man': 1, 'Man vs AI': 2, 'AI vs AI': 3}
-            mode = mode_map[self.mode_combo.currentText()]
-            try:
-                self.serial_conn.write(f"MODE{mode}\n".encode())
-                response = self.serial_conn.readline().decode().strip()
-                if response == "OK:MODE_SET":
-                    self.reset_game()
-                    self.game_active = True
-                    if mode == 3:
-                        self.ai_timer.start(100)
-                    else:
-                        self.ai_timer.stop()
-            except:
-                self.handle_disconnection()
+        self.update_strategy_controls()
+        self.players = self.create_players()
+        self.host_move_timer.stop()
+        self.move_pending = False
+        self.ai_timing_label.setText("")
+        if self.serial_worker or self.reconnector.down:
+            mode = self.board_mode()
+            if self.recorder:
+                self.recorder.set_mode(mode)
+            self.send_command(f"MODE{mode}")
+            self.send_command("RESET")
+
+    def update_strategy_controls(self):
+        """
+        @brief Enable the strategy selection of the sides played by an AI in the selected mode.
+        """
+        ai_sides = AI_SIDES[self.mode_combo.currentText()]
+        for side, combo in self.strategy_combos.items():
+            combo.setEnabled(side in ai_sides)
+
+    def create_players(self):
+        """
+        @brief Create the players for the AI sides whose moves the client computes.
+
+        As soon as one AI side uses a client strategy, the board is driven in
+        Man vs Man mode and the client sends the moves of every AI side; a side
+        left on the board's AI then plays the greedy strategy, which makes the
+        same moves as the firmware. [AI] seed makes random players reproducible.
+        @return Dictionary of side (1: X, 2: O) to engine.Player; empty if the board plays its own AI.
+        """
+        ai_sides = AI_SIDES[self.mode_combo.currentText()]
+        names = {side: self.strategy_combos[side].currentText() for side in ai_sides}
+        if all(name == BOARD_AI for name in names.values()):
+            return {}
+        seed = self.config.getint('AI', 'seed', fallback=None)
+        return {side: Player('greedy' if name == BOARD_AI else name, None if seed is None else seed + side)
+                for side, name in names.items()}
+
+    def board_mode(self):
+        """
+        @brief Mode the board runs in: the selected mode, or Man vs Man while the client plays the AI.
+        @return Mode number (1-3).
+        """
+        return MODES['Man vs Man'] if self.players else MODES[self.mode_combo.currentText()]
+
+    def schedule_host_move(self):
+        """
+        @brief Plan the next move of a side played by the client, if it is that side's turn.
+
+        Man vs AI replies at once; AI vs AI waits [AI] move_delay seconds per
+        move, so a game can be followed on screen as with the board's loop.
+        """
+        if not self.players or self.move_pending or not self.game_active:
+            return
+        if self.live_board().to_move() not in self.players:
+            return
+        delay = self.config.getfloat('AI', 'move_delay', fallback=0.5) if len(self.players) == 2 else 0.0
+        self.host_move_timer.start(int(delay * 1000))
+        self.timer_due["host_move"] = time.monotonic() + delay
+
+    def play_host_move(self):
+        """
+        @brief Compute the move of the side to play and send it to the board.
+        """
+        self.note_tick("host_move")
+        if self.serial_worker is None or self.move_pending or not self.game_active:
+            return
+        board = self.live_board()
+        side = board.to_move()
+        player = self.players.get(side)
+        if player is None:
+            return
+        position = player.move(board, side)
+        if self.metrics:
+            self.metrics.observe("ai_move_seconds", player.last_time, strategy=player.name)
+        if position < 0:
+            return
+        self.move_pending = True
+        self.serial_worker.send(f"MOVE{position}")
+        if self.recorder:
+            self.recorder.note_move(position)
+        self.ai_timing_label.setText("   ".join(f"{'XO'[side - 1]} {player.timing()}"
+                                               for side, player in sorted(self.players.items())))
+
+    def live_board(self):
+        """
+        @brief The live game's board (not a replay on screen).
+        @return Board.
+        """
+        return Board.from_string(self.live_frame.board) if self.live_frame is not None else Board()
 
     def make_move(self, position):
         """
         @brief Handle the player's move at the given position.
         @param position The index of the board position (0-8).
         """
-        if not self.serial_conn:
+        if not self.serial_worker and not self.reconnector.down:
             QMessageBox.warning(self, "Warning",
                                 "Not connected to Arduino.\nPlease connect first.")
             return
 
-        if not self.game_active:
+        if not self.game_active or self.playback is not None:
             return
 
         if self.mode_combo.currentText() == 'AI vs AI':
             return
 
-        try:
-            self.serial_conn.write(f"MOVE{position}\n".encode())
-            self.process_response()
-        except:
-            self.handle_disconnection()
+        if self.players:
+            # The board takes any move as the next side's: wait for the reply and for our turn
+            if self.move_pending or self.live_board().to_move() in self.players:
+                return
+            self.move_pending = True
+
+        self.send_command(f"MOVE{position}")
+        if self.recorder:
+            self.recorder.note_move(position)
 
-    def process_response(self):
+    def send_command(self, command):
+        """
+        @brief Send a command to the board, or keep it for replay while a lost connection is reopened.
+        @param command Command text without the line terminator (e.g. "MOVE4").
+        """
+        if self.serial_worker:
+            self.serial_worker.send(command)
+        elif self.reconnector.down:
+            self.reconnector.queue(command)
+
+    def handle_response(self, command, response):
+        """
+        @brief Dispatch a reply delivered by the serial worker.
+        @param command The command the reply belongs to, or an empty string for unsolicited replies.
+        @param response The parsed Response.
+        """
+        if self.serial_worker is None:
+            return
+
+        if response.kind == "OK" and response.detail == "MODE_SET":
+            self.game_active = True
+        elif response.kind == "OK" and response.detail == "RESET":
+            self.live_frame = None
+            if self.recorder:
+                self.recorder.end_game()
+            if self.playback is None:
+                self.frames.drop_frame()
+                self.clear_board()
+            for btn in self.board_buttons:
+                btn.setEnabled(True)
+            self.game_active = True
+            self.schedule_host_move()
+        elif response.kind == "OK" and response.detail == "SAVED":
+            self.results_list.insertItem(0, "Game saved on the board")
+        elif response.kind == "TIMEOUT":
+            if command.startswith("MOVE"):
+                self.move_pending = False
+                self.schedule_host_move()
+            if command != "<test_connection/>":  # Missed pings are left to check_connection()
+                self.results_list.insertItem(0, f"No reply to {command}")
+        else:
+            if command.startswith("LOAD") and response.kind == "BOARD":
+                self.game_active = True
+            if command.startswith("MOVE"):
+                self.move_pending = False
+            self.process_response(response)
+            if response.kind == "BOARD":
+                self.schedule_host_move()
+
+    def process_response(self, response):
         """
         @brief Process responses from the Arduino device.
+
+        BOARD frames are not drawn here: they are queued in the frame buffer
+        and the render timer draws the newest one at display rate. While a
+        replay is running, live frames are only recorded and their outcomes
+        reported.
+
+        @param response The parsed Response to apply to the board.
         """
         try:
-            response = self.serial_conn.readline().decode().strip()
-            if response.startswith("BOARD:"):
-                parts = response.split(":")
-                board_state = parts[1]
-
-                # Update board buttons
-                for i, state in enumerate(board_state):
-                    button = self.board_buttons[i]
-                    if state == "0":
-                        button.setText("")
-                        button.setStyleSheet("")
-                    elif state == "1":
-                        button.setText("X")
-                        button.setStyleSheet("color: #1E3A8A;")
-                    else:
-                        button.setText("O")
-                        button.setStyleSheet("color: #FF9800;")
-
-                # Handle game end conditions
-                if "WIN" in response:
-                    winner = "X" if parts[3] == "1" else "O"
-                    QMessageBox.information(self, "Game Over",
-                                            f"Player {winner} wins!")
+            if response.kind == "BOARD":
+                self.history.append((time.monotonic(), response))
+                self.live_frame = response
+                if self.recorder:
+                    self.recorder.record_frame(response.board, response.status, response.winner)
+                if is_outcome(response):
                     self.game_active = False
-                    if self.mode_combo.currentText() == 'AI vs AI':
-                        self.ai_timer.stop()
-                elif "DRAW" in response:
-                    QMessageBox.information(self, "Game Over",
-                                            "It's a draw!")
-                    self.game_active = False
-                    if self.mode_combo.currentText() == 'AI vs AI':
-                        self.ai_timer.stop()
+                if self.playback is None:
+                    self.queue_frame(response)
+                elif is_outcome(response):
+                    self.add_result(response)
 
-            elif response.startswith("ERR:"):
+            elif response.kind == "ERR":
                 QMessageBox.warning(self, "Game Error",
-                                    response[4:])
-        except:
-            self.handle_disconnection()
+                                    response.detail)
+        except Exception as e:
+            self.note_exception("process_response", e)
+            self.handle_disconnection(f"{type(e).__name__}: {e}")
 
-    def check_ai_moves(self):
+    def queue_frame(self, response):
         """
-        @brief Check for AI moves in AI vs AI mode.
+        @brief Queue a BOARD frame for the next render tick.
+        @param response The parsed BOARD Response.
         """
-        if self.serial_conn and self.mode_combo.currentText() == 'AI vs AI' and self.game_active:
-            if self.serial_conn.in_waiting:
-                self.process_response()
+        self.frames.push(response)
+        if not self.render_timer.isActive():
+            self.start_render_timer()
+
+    def render_frames(self):
+        """
+        @brief Render tick: draw the newest pending frame and report the finished games.
+        """
+        self.note_tick("render", FRAME_INTERVAL_MS / 1000)
+        if self.playback is not None:
+            for response in self.playback.advance(time.monotonic()):
+                self.frames.push(response)
+        frame, outcomes = self.frames.take()
+        for outcome in outcomes[-RESULTS_SHOWN:]:
+            self.add_result(outcome, replay=self.playback is not None)
+        if frame is not None:
+            start = time.perf_counter()
+            self.draw_board(Board.from_string(frame.board))
+            if self.metrics:
+                self.metrics.observe("render_seconds", time.perf_counter() - start)
+        if self.playback is not None and self.playback.finished:
+            self.stop_playback()
+        elif self.playback is None:
+            self.render_timer.stop()
+
+    def draw_board(self, board):
+        """
+        @brief Show a board, updating only the cells that differ from the one on screen.
+        @param board The Board to show.
+        """
+        for i in board.diff(self.board):
+            self.set_cell(i, board.cell(i))
+        self.board = board
+
+    def add_result(self, response, replay=False):
+        """
+        @brief Report a finished game in the results panel.
+        @param response The BOARD Response that ended the game.
+        @param replay True for games shown by a replay; they are listed but not counted.
+        """
+        if response.status == "WIN":
+            winner = "X" if response.winner == 1 else "O"
+            message = f"Player {winner} wins!"
+        else:
+            winner = "DRAW"
+            message = "It's a draw!"
+        if replay:
+            message = f"Replay: {message}"
+        else:
+            self.games_finished += 1
+            self.tally[winner] += 1
+            message = f"Game {self.games_finished}: {message}"
+            self.results_label.setText(f"X wins: {self.tally['X']}   O wins: {self.tally['O']}   "
+                                       f"Draws: {self.tally['DRAW']}")
+        self.results_list.insertItem(0, message)
+        if self.results_list.count() > RESULTS_SHOWN:
+            self.results_list.takeItem(self.results_list.count() - 1)
+
+    def toggle_playback(self):
+        """
+        @brief Start replaying the frames received this session, or stop the running replay.
+        """
+        if self.playback is not None:
+            self.stop_playback()
+            return
+        if not self.history:
+            QMessageBox.information(self, "Replay", "No games have been played in this session yet.")
+            return
+        self.start_playback(self.history)
+
+    def replay_file(self):
+        """
+        @brief Replay a game log chosen by the user; the records are read from the mapped file on demand.
+        """
+        if self.playback is not None:
+            self.stop_playback()
+        path, _ = QFileDialog.getOpenFileName(self, "Replay Recording", "", "Game logs (*.ttr);;All files (*)")
+        if not path:
+            return
+        from recorder import GameLog
+        try:
+            self.replay_log = GameLog(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Replay", f"Cannot open {path}: {e}")
+            return
+        if not len(self.replay_log):
+            self.replay_log.close()
+            self.replay_log = None
+            QMessageBox.information(self, "Replay", f"{path} contains no games.")
+            return
+        self.start_playback(self.replay_log.frames(), self.replay_log.timestamps())
+
+    def start_playback(self, frames, times=None):
+        """
+        @brief Replace the live board with a replay at the selected speed.
+        @param frames Sequence of (timestamp, Response) tuples in time order.
+        @param times Optional sequence of their timestamps (see Playback).
+        """
+        self.frames.take()
+        self.clear_board()
+        self.playback = Playback(frames, time.monotonic(), SPEEDS[self.speed_combo.currentText()], times)
+        self.replay_btn.setText("Stop Replay")
+        self.start_render_timer()
+
+    def stop_playback(self):
+        """
+        @brief End the replay and show the live board again.
+        """
+        self.playback = None
+        if self.replay_log is not None:
+            self.replay_log.close()
+            self.replay_log = None
+        self.render_timer.stop()
+        self.replay_btn.setText("Replay Session")
+        if self.live_frame is not None:
+            self.draw_board(Board.from_string(self.live_frame.board))
+        else:
+            self.clear_board()
+
+    def change_speed(self):
+        """
+        @brief Apply the selected playback speed to the running replay.
+        """
+        if self.playback is not None:
+            self.playback.set_speed(SPEEDS[self.speed_combo.currentText()], time.monotonic())
+
+    def current_snapshot(self):
+        """
+        @brief Snapshot of the live game (not of a replay on screen).
+        @return Snapshot.
+        """
+        return Snapshot.from_game(self.live_board().to_string(), self.board_mode(), not self.game_active)
+
+    def save_game(self):
+        """
+        @brief Save the game to the save file and, when connected, to the board's EEPROM.
+        """
+        path = self.config.get('Game', 'save_file', fallback='savegame.ini')
+        try:
+            self.current_snapshot().save(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Game", f"Cannot write {path}: {e}")
+            return
+        self.results_list.insertItem(0, f"Game saved to {path}")
+        if self.serial_worker:
+            self.serial_worker.send("SAVE")
+
+    def load_game(self):
+        """
+        @brief Load the game from the save file, or from the board's EEPROM if there is no save file.
+        """
+        if not self.serial_worker:
+            QMessageBox.warning(self, "Warning",
+                                "Not connected to Arduino.\nPlease connect first.")
+            return
+        path = self.config.get('Game', 'save_file', fallback='savegame.ini')
+        snapshot = None
+        if os.path.exists(path):
+            try:
+                snapshot = Snapshot.load(path)
+            except ValueError as e:
+                QMessageBox.warning(self, "Load Game", str(e))
+                return
+        if self.playback is not None:
+            self.stop_playback()
+        self.restore_game(snapshot)
+
+    def restore_game(self, snapshot):
+        """
+        @brief Restore a game on the board in one round trip; the board answers with the restored position.
+        @param snapshot Snapshot to push, or None to restore the game saved in the board's EEPROM.
+        """
+        if self.recorder:
+            self.recorder.end_game()
+        if snapshot is None:
+            self.serial_worker.send("LOAD")
+            return
+        if snapshot.mode != self.board_mode():
+            # The board plays this game itself; client strategies cannot take part in it
+            self.players = {}
+            for combo in [self.mode_combo] + list(self.strategy_combos.values()):
+                combo.blockSignals(True)
+            self.mode_combo.setCurrentText(next(name for name, mode in MODES.items() if mode == snapshot.mode))
+            for combo in self.strategy_combos.values():
+                combo.setCurrentText(BOARD_AI)
+                combo.blockSignals(False)
+            self.mode_combo.blockSignals(False)
+            self.update_strategy_controls()
+        self.host_move_timer.stop()
+        if self.recorder:
+            self.recorder.set_mode(snapshot.mode)
+        self.serial_worker.send(snapshot.command())
 
     def reset_game(self):
         """
         @brief Reset the game state and board.
         """
-        if self.serial_conn:
-            try:
-                self.serial_conn.write(b"RESET\n")
-                response = self.serial_conn.readline().decode().strip()
-                if response == "OK:RESET":
-                    for btn in self.board_buttons:
-                        btn.setText("")
-                        btn.setStyleSheet("")
-                        btn.setEnabled(True)
-                    self.game_active = True
-                    if self.mode_combo.currentText() == 'AI vs AI':
-                        self.ai_timer.start(100)
-            except:
-                self.handle_disconnection()
+        if self.serial_worker or self.reconnector.down:
+            self.send_command("RESET")
         else:
-            for btn in self.board_buttons:
-                btn.setText("")
-                btn.setStyleSheet("")
+            self.clear_board()
             self.game_active = True
 
+    def clear_board(self):
+        """
+        @brief Clear all cells of the game board.
+        """
+        for i in self.board.diff(Board()):
+            self.set_cell(i, 0)
+        self.board = Board()
+
+    def set_cell(self, index, state):
+        """
+        @brief Show one cell, coloured through one of the cached cell palettes.
+        @param index The index of the board position (0-8).
+        @param state 0 for empty, 1 for X, 2 for O.
+        """
+        button = self.board_buttons[index]
+        button.setText(("", "X", "O")[state])
+        button.setPalette(self.cell_palettes[state])
+
     def closeEvent(self, event):
         """
         @brief Handle application close event.
         @param event The close event object.
         """
         try:
-            if self.serial_conn:
-                self.serial_conn.close()
+            self.reconnect_timer.stop()
+            if self.serial_worker:
+                self.serial_worker.stop()
+            if self.port_scanner:
+                self.port_scanner.stop()
+            if self.recorder:
+                self.recorder.close()
 
             # Save settings
             self.config['Serial']['baud_rate'] = self.baud_combo.currentText()
             self.config['Game']['default_mode'] = self.mode_combo.currentText()
+            self.config['Game']['playback_speed'] = self.speed_combo.currentText()
+            if not self.config.has_section('AI'):
+                self.config.add_section('AI')
+            self.config['AI']['x_strategy'] = self.strategy_combos[1].currentText()
+            self.config['AI']['o_strategy'] = self.strategy_combos[2].currentText()
             with open('tictactoe.ini', 'w') as f:
                 self.config.write(f)
+            self.export_metrics()
+            self.save_capture()
 
             if event:  # Перевіряємо, чи event не None
                 event.accept()
         except Exception as e:
-            print(f"Error during closing: {e}")
+            self.note_exception("closeEvent", e)
             if event:
                 event.accept()
 
@@ -423,10 +1250,16 @@ if __name__ == '__main__':
     @brief Main entry point for the application.
     """
     try:
-        app = QApplication(sys.argv)
+        # --profile-startup prints the time taken by each startup step and exits
+        profile = StartupProfile(STARTUP_MARKS) if '--profile-startup' in sys.argv else None
+        app = QApplication([arg for arg in sys.argv if arg != '--profile-startup'])
         app.setStyle('Fusion')
-        window = TicTacToeGUI()
+        if profile:
+            profile.mark("create QApplication")
+        window = TicTacToeGUI(profile)
         window.show()
+        if profile:
+            profile.mark("show window")
         sys.exit(app.exec_())
     except KeyboardInterrupt:
         print("\nProgram finished correctly")
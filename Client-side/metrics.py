@@ -0,0 +1,234 @@
+"""
+@file metrics.py
+@ingroup client_side
+@brief Counters, gauges and histograms of the client, exported as Prometheus text or JSON.
+
+Every metric is declared in METRICS with its type, help text and, for
+histograms, its bucket bounds; samples are told apart by labels such as the
+command type or the direction of the traffic. A Metrics registry can be fed
+from several threads (the serial worker counts bytes while the GUI thread
+times frames) and is written out as a whole with write(). The GUI enables it
+through the [Metrics] section of tictactoe.ini:
+
+    [Metrics]
+    enabled = true
+    path = metrics.prom
+    format = prometheus
+    interval = 10
+
+Set format to json for a JSON snapshot instead of the Prometheus text
+format, e.g. for node_exporter's textfile collector.
+"""
+import bisect
+import json
+import math
+import os
+import re
+import threading
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+METRICS = {
+    "serial_bytes_total": (COUNTER, "Bytes written to and read from the board, by direction.", None),
+    "commands_total": (COUNTER, "Commands written to the board, by command type.", None),
+    "command_timeouts_total": (COUNTER, "Commands given up without a reply, by command type.", None),
+    "command_rtt_seconds": (HISTOGRAM, "Time from writing a command to matching its reply, by command type.",
+                            LATENCY_BUCKETS),
+    "parse_seconds": (HISTOGRAM, "Time to decode one chunk of received bytes.", FAST_BUCKETS),
+    "render_seconds": (HISTOGRAM, "Time to draw one BOARD frame.", FAST_BUCKETS),
+    "timer_jitter_seconds": (HISTOGRAM, "Lateness of a timer tick against its interval, by timer.",
+                             LATENCY_BUCKETS),
+    "ai_move_seconds": (HISTOGRAM, "Compute time of a move played by the client, by strategy.", FAST_BUCKETS),
+    "exceptions_total": (COUNTER, "Exceptions caught, by site.", None),
+    # Mirrors of reconnect.ReconnectSupervisor.metrics(), set before every export.
+    "reconnects": (GAUGE, "Lost connections that were reopened.", None),
+    "reconnect_outages": (GAUGE, "Connections lost.", None),
+    "reconnect_failed_attempts": (GAUGE, "Attempts to reopen a lost connection that failed.", None),
+    "replayed_commands": (GAUGE, "Unanswered commands sent again after a reconnect.", None),
+    "downtime_seconds": (GAUGE, "Time spent reconnecting, including the outage in progress.", None),
+}
+
+
+def command_kind(command):
+    """
+    @brief Type of a command, used as the label of the per-command metrics.
+    @param command Command text, e.g. "MOVE4" or "<test_connection/>".
+    @return Command type, e.g. "MOVE" or "TEST_CONNECTION".
+    """
+    match = re.match(r"<?([A-Za-z_]+)", command)
+    return match.group(1).upper() if match else "OTHER"
+
+
+def percentile(samples, fraction):
+    """
+    @brief Nearest-rank percentile of a sorted list of samples.
+    @param samples Sorted samples.
+    @param fraction Percentile as a fraction (0.5 for the median).
+    @return The sample at that rank, 0.0 for no samples.
+    """
+    if not samples:
+        return 0.0
+    rank = math.ceil(fraction * len(samples))
+    return samples[max(0, min(len(samples), rank) - 1)]
+
+
+def summarize(samples):
+    """
+    @brief Latency summary in milliseconds.
+    @param samples Latencies in seconds.
+    @return Dictionary with count, mean, p50, p95, p99 and max.
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99": round(percentile(ordered, 0.99) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+class Metrics:
+    """
+    @ingroup client_side
+    @class Metrics
+    @brief Thread-safe registry of the metrics declared in METRICS.
+    """
+
+    def __init__(self, definitions=None):
+        """
+        @brief Create an empty registry.
+        @param definitions Dictionary of name to (type, help, buckets); defaults to METRICS.
+        """
+        self.definitions = METRICS if definitions is None else definitions
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        """
+        @brief Add to a counter.
+        @param name Counter name.
+        @param value Amount to add.
+        @param labels Label values of the sample.
+        @throws KeyError If the metric is not declared.
+        """
+        key = self._key(name, COUNTER, labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """
+        @brief Set a gauge.
+        @param name Gauge name.
+        @param value New value.
+        @param labels Label values of the sample.
+        @throws KeyError If the metric is not declared.
+        """
+        key = self._key(name, GAUGE, labels)
+        with self._lock:
+            self._samples[key] = value
+
+    def observe(self, name, value, **labels):
+        """
+        @brief Record one observation in a histogram.
+        @param name Histogram name.
+        @param value Observed value, in seconds for the timing histograms.
+        @param labels Label values of the sample.
+        @throws KeyError If the metric is not declared.
+        """
+        key = self._key(name, HISTOGRAM, labels)
+        buckets = self.definitions[name][2]
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                sample = self._samples[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            sample[0][bisect.bisect_left(buckets, value)] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def snapshot(self):
+        """
+        @brief Copy of every sample, grouped by metric.
+        @return Dictionary of metric name to {"type", "help", "samples"}. A histogram sample holds
+                cumulative "buckets" keyed by upper bound ("+Inf" last), "sum" and "count".
+        """
+        with self._lock:
+            samples = sorted((key, value if not isinstance(value, list) else [list(value[0]), value[1], value[2]])
+                             for key, value in self._samples.items())
+        result = {}
+        for (name, labels), value in samples:
+            kind, help_text, buckets = self.definitions[name]
+            entry = result.setdefault(name, {"type": kind, "help": help_text, "samples": []})
+            sample = {"labels": dict(labels)}
+            if kind == HISTOGRAM:
+                counts, total, observations = value
+                cumulative, running = {}, 0
+                for bound, count in zip(list(buckets) + ["+Inf"], counts):
+                    running += count
+                    cumulative[str(bound)] = running
+                sample.update(buckets=cumulative, sum=total, count=observations)
+            else:
+                sample["value"] = value
+            entry["samples"].append(sample)
+        return result
+
+    def to_json(self):
+        """
+        @brief Format a snapshot as JSON.
+        @return JSON text.
+        """
+        return json.dumps(self.snapshot(), indent=4, sort_keys=True)
+
+    def to_prometheus(self):
+        """
+        @brief Format a snapshot in the Prometheus text exposition format.
+        @return Text with one HELP and TYPE header per metric.
+        """
+        lines = []
+        for name, entry in self.snapshot().items():
+            lines.append(f"# HELP {name} {entry['help']}")
+            lines.append(f"# TYPE {name} {entry['type']}")
+            for sample in entry["samples"]:
+                labels = sample["labels"]
+                if entry["type"] != HISTOGRAM:
+                    lines.append(f"{name}{_labels(labels)} {sample['value']}")
+                    continue
+                for bound, count in sample["buckets"].items():
+                    lines.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {count}")
+                lines.append(f"{name}_sum{_labels(labels)} {sample['sum']}")
+                lines.append(f"{name}_count{_labels(labels)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path, format="prometheus"):
+        """
+        @brief Write the metrics to a file, replacing it atomically so readers never see half a file.
+        @param path Output file.
+        @param format "prometheus" or "json".
+        @throws ValueError If the format is unknown.
+        @throws OSError If the file cannot be written.
+        """
+        if format not in ("prometheus", "json"):
+            raise ValueError(f"Unknown metrics format {format!r}")
+        text = self.to_prometheus() if format == "prometheus" else self.to_json()
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(text)
+        os.replace(temporary, path)
+
+    def _key(self, name, kind, labels):
+        if self.definitions[name][0] != kind:
+            raise KeyError(f"{name} is not a {kind}")
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
@@ -0,0 +1,327 @@
+"""
+@file pipeline.py
+@ingroup client_side
+@brief Sequence-numbered, pipelined command submission over one serial connection.
+"""
+import time
+from collections import OrderedDict, deque
+
+from metrics import command_kind
+from protocol import BAUD_CONFIRM_TIMEOUT, BAUD_RATES, HANDSHAKE_BINARY, BinaryCodec, TextCodec
+
+MAX_SEQUENCE = 255
+HANDSHAKE_ATTEMPTS = 3
+
+# Reply that answers each command, as (command prefix, kind, detail); any command may be refused with ERR
+REPLIES = (
+    ("<test_connection/>", "CONNECTION_OK", None),
+    ("MOVE", "BOARD", None),
+    ("LOAD", "BOARD", None),
+    ("MODE", "OK", "MODE_SET"),
+    ("RESET", "OK", "RESET"),
+    ("SAVE", "OK", "SAVED"),
+    ("BAUD", "OK", "BAUD"),
+)
+
+
+def answers(command, response):
+    """
+    @brief Check whether a reply can be the board's answer to a command.
+    @param command Command text (e.g. "MOVE4").
+    @param response The parsed Response.
+    @return True if the reply has the kind the command is answered with, or is an error.
+    """
+    if response.kind == "ERR":
+        return True
+    for prefix, kind, detail in REPLIES:
+        if command.startswith(prefix):
+            return response.kind == kind and detail in (None, response.detail)
+    return False
+
+
+def negotiate_codec(connection, protocol="text", timeout=1.0, attempts=HANDSHAKE_ATTEMPTS):
+    """
+    @brief Pick the codec for a freshly opened connection.
+
+    For protocol "binary" the board is asked to switch to binary framing; the
+    text protocol is kept if it does not answer the handshake.
+    @param connection Open serial connection.
+    @param protocol Preferred protocol, "text" or "binary".
+    @param timeout Seconds to wait for each handshake reply.
+    @param attempts Number of handshakes sent before giving up.
+    @return TextCodec or BinaryCodec.
+    """
+    if protocol != "binary":
+        return TextCodec()
+    codec = TextCodec()
+    for _ in range(attempts):
+        connection.write((HANDSHAKE_BINARY + "\n").encode())
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            data = connection.read(max(1, connection.in_waiting))
+            responses = codec.feed(data) if data else []
+            if any(r.kind == "CONNECTION_OK" and r.detail == "binary" for r in responses):
+                return BinaryCodec()
+            if responses:
+                break
+    return TextCodec()
+
+
+def _await_reply(connection, codec, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = connection.read(max(1, connection.in_waiting))
+        responses = codec.feed(data) if data else []
+        if responses:
+            return responses[0]
+    return None
+
+
+def switch_baud(connection, rate, timeout=1.0, attempts=HANDSHAKE_ATTEMPTS):
+    """
+    @brief Move the board and the connection to another baud rate and verify the link.
+
+    The board is asked to switch with "BAUD<rate>", then probed with
+    "<test_connection/>" at the new rate. If the board refuses the rate or
+    the probe goes unanswered, the connection returns to its previous rate
+    after waiting for the board to fall back as well.
+    @param connection Open serial connection speaking the text protocol.
+    @param rate Baud rate to switch to.
+    @param timeout Seconds to wait for the board to accept the switch.
+    @param attempts Number of switch requests sent before giving up (a board may still be booting).
+    @return True if the link works at the new rate.
+    """
+    previous = connection.baudrate
+    reply = None
+    for _ in range(attempts):
+        connection.reset_input_buffer()
+        connection.write(f"BAUD{rate}\n".encode())
+        reply = _await_reply(connection, TextCodec(), timeout)
+        if reply is not None:
+            break
+    if reply is None or reply.kind != "OK" or reply.detail != "BAUD":
+        return False
+    switched = time.monotonic()
+    connection.baudrate = rate
+    connection.reset_input_buffer()
+    connection.write(b"<test_connection/>\n")
+    reply = _await_reply(connection, TextCodec(), BAUD_CONFIRM_TIMEOUT / 2)
+    if reply is not None and reply.kind == "CONNECTION_OK":
+        return True
+    connection.baudrate = previous
+    remaining = switched + 1.5 * BAUD_CONFIRM_TIMEOUT - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+    connection.reset_input_buffer()
+    return False
+
+
+def negotiate_baud(connection, ceiling, cached=None, timeout=1.0):
+    """
+    @brief Raise a freshly opened connection to the fastest rate the link carries.
+
+    A rate cached from an earlier session is used directly when it still
+    works. Otherwise the rate is raised one step of BAUD_RATES at a time up to
+    ceiling, keeping the last rate that passed the probe. Boards whose
+    firmware predates the BAUD command stay at the rate the port was opened at.
+    @param connection Open serial connection at the board's start-up rate.
+    @param ceiling Highest rate to try.
+    @param cached Rate negotiated in an earlier session, or None.
+    @param timeout Seconds to wait for the board to accept each switch.
+    @return The baud rate in use.
+    """
+    if cached is not None:
+        if cached <= connection.baudrate:
+            return connection.baudrate
+        if cached <= ceiling and switch_baud(connection, cached, timeout):
+            return cached
+    for rate in BAUD_RATES:
+        if connection.baudrate < rate <= ceiling and not switch_baud(connection, rate, timeout):
+            break
+    return connection.baudrate
+
+
+class CommandPipeline:
+    """
+    @ingroup client_side
+    @class CommandPipeline
+    @brief Keeps a bounded window of commands in flight and matches replies back to them.
+
+    Every command is sent as "#<seq> <command>" (or the binary equivalent) and
+    the board echoes the sequence number in its reply, so up to @c window
+    commands can be on the wire at once. Replies without a sequence number are
+    unsolicited (AI vs AI moves) and are returned with an empty command.
+    Commands that time out, or whose reply is overtaken by the reply to a
+    later command, are given up and returned by expire().
+    Boards whose firmware predates sequence numbers are detected by negotiate();
+    the pipeline then falls back to one unsequenced command at a time, and a
+    reply is only taken as its answer if it is of the kind the command is
+    answered with (see answers()); AI vs AI moves and late replies to
+    commands already given up stay unsolicited. Given a
+    metrics.Metrics registry, it counts the bytes and commands it moves, times
+    the decoding of received bytes and the round trip of every command.
+    """
+
+    def __init__(self, connection, codec, window=4, timeout=1.0, metrics=None):
+        """
+        @brief Create a pipeline on an open connection.
+        @param connection Open serial connection (serial.Serial or a compatible object).
+        @param codec Codec used to encode commands and decode replies.
+        @param window Maximum number of commands awaiting a reply.
+        @param timeout Seconds after which an unanswered command is given up.
+        @param metrics Optional metrics.Metrics registry to report to.
+        """
+        self.connection = connection
+        self.codec = codec
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.sequenced = True
+        self.pending = deque()
+        self.in_flight = OrderedDict()
+        self.lost = []
+        self.metrics = metrics
+        self._next_sequence = 1
+
+    @property
+    def busy(self):
+        """
+        @brief True while commands are queued or waiting for their reply.
+        """
+        return bool(self.pending or self.in_flight)
+
+    def unacked(self):
+        """
+        @brief Commands that were queued or written but have not been answered.
+        @return List of command texts, oldest first.
+        """
+        return [command for command, _ in self.in_flight.values()] + list(self.pending)
+
+    def negotiate(self, attempts=HANDSHAKE_ATTEMPTS):
+        """
+        @brief Check whether the board echoes sequence numbers.
+
+        Sends a sequence-numbered connection test, again up to @c attempts
+        times while it goes unanswered (a board reset by opening the port may
+        still be booting). Replies not addressed to the probe, such as AI vs
+        AI moves, are skipped. The window shrinks to one unsequenced command
+        if the probe is answered without its sequence number, or if every
+        attempt goes unanswered, as firmware predating sequence numbers
+        ignores the prefixed command.
+        @param attempts Number of probes sent before falling back.
+        @return True if the board supports sequence numbers.
+        """
+        probes = set()
+        self.sequenced = False
+        for _ in range(attempts):
+            seq = self._allocate()
+            probes.add(seq)
+            self.connection.write(self.codec.encode_command("<test_connection/>", seq))
+            deadline = time.monotonic() + self.timeout
+            while time.monotonic() < deadline:
+                data = self.connection.read(max(1, self.connection.in_waiting))
+                for response in self.codec.feed(data) if data else []:
+                    if response.seq in probes:
+                        self.sequenced = True
+                        return True
+                    if response.seq is None and response.kind in ("CONNECTION_OK", "ERR"):
+                        self.window = 1
+                        return False
+        self.window = 1
+        return False
+
+    def submit(self, command):
+        """
+        @brief Queue a command and send it as soon as the window has room.
+        @param command Command text without the line terminator (e.g. "MOVE4").
+        """
+        self.pending.append(command)
+        self.fill()
+
+    def fill(self):
+        """
+        @brief Write queued commands until the in-flight window is full.
+        """
+        while self.pending and len(self.in_flight) < self.window:
+            seq = self._allocate()
+            # A command stays pending until it is written, so a failed write loses nothing
+            frame = self.codec.encode_command(self.pending[0], seq if self.sequenced else None)
+            self.connection.write(frame)
+            command = self.pending.popleft()
+            self.in_flight[seq] = (command, time.monotonic())
+            if self.metrics:
+                self.metrics.count("serial_bytes_total", len(frame), direction="out")
+                self.metrics.count("commands_total", command=command_kind(command))
+
+    def read(self):
+        """
+        @brief Read whatever the board has sent (waiting up to the port timeout) and match it.
+        @return List of (command, Response) tuples; command is "" for unsolicited replies.
+        """
+        data = self.connection.read(max(1, self.connection.in_waiting))
+        if not data:
+            return []
+        return self.receive(data)
+
+    def receive(self, data):
+        """
+        @brief Decode received bytes and match every reply to the command that produced it.
+        @param data Bytes read from the connection.
+        @return List of (command, Response) tuples; command is "" for unsolicited replies.
+        """
+        matched = []
+        start = time.perf_counter()
+        responses = self.codec.feed(data)
+        if self.metrics:
+            self.metrics.observe("parse_seconds", time.perf_counter() - start)
+            self.metrics.count("serial_bytes_total", len(data), direction="in")
+        for response in responses:
+            matched.append((self._match(response), response))
+        self.fill()
+        return matched
+
+    def expire(self, now=None):
+        """
+        @brief Give up on commands that have waited longer than the timeout.
+
+        Commands found lost since the last call, because a later command was
+        answered first, are given up as well.
+        @param now Current time.monotonic() value; defaults to the current time.
+        @return List of the commands given up, oldest first.
+        """
+        now = time.monotonic() if now is None else now
+        expired = [seq for seq, (_, sent) in self.in_flight.items() if now - sent > self.timeout]
+        commands = self.lost + [self.in_flight.pop(seq)[0] for seq in expired]
+        self.lost = []
+        if self.metrics:
+            for command in commands:
+                self.metrics.count("command_timeouts_total", command=command_kind(command))
+        if commands:
+            self.fill()
+        return commands
+
+    def _match(self, response):
+        if not self.sequenced:
+            if self.in_flight and answers(next(iter(self.in_flight.values()))[0], response):
+                return self._answered(*self.in_flight.popitem(last=False)[1])
+            return ""
+        if response.seq is None or response.seq not in self.in_flight:
+            return ""
+        # Replies arrive in order, so anything sent before this command was lost.
+        while True:
+            seq, (command, sent) = self.in_flight.popitem(last=False)
+            if seq == response.seq:
+                return self._answered(command, sent)
+            self.lost.append(command)
+
+    def _answered(self, command, sent):
+        if self.metrics:
+            self.metrics.observe("command_rtt_seconds", time.monotonic() - sent, command=command_kind(command))
+        return command
+
+    def _allocate(self):
+        for _ in range(MAX_SEQUENCE):
+            seq = self._next_sequence
+            self._next_sequence = seq % MAX_SEQUENCE + 1
+            if seq not in self.in_flight:
+                return seq
+        raise RuntimeError("No free sequence number")
@@ -0,0 +1,158 @@
+"""
+@file playback.py
+@ingroup client_side
+@brief Frame coalescing and speed-controlled replay for the board view.
+
+Boards in AI vs AI mode, and replays of recorded games, can deliver BOARD
+frames much faster than the screen refreshes. FrameBuffer keeps only the
+newest frame between two render ticks (plus every game outcome, so no
+result is lost), and Playback releases timestamped frames at 1x, 10x or
+maximum speed. Neither class depends on Qt; the GUI drives them from a
+timer running at FRAME_INTERVAL_MS.
+"""
+import bisect
+
+FRAME_INTERVAL_MS = 16
+
+SPEEDS = {"1x": 1.0, "10x": 10.0, "max": None}
+
+MAX_BATCH = 10000
+
+
+def is_outcome(response):
+    """
+    @brief Whether a response ends a game.
+    @param response A parsed Response.
+    @return True for BOARD frames with status WIN or DRAW.
+    """
+    return response.kind == "BOARD" and response.status in ("WIN", "DRAW")
+
+
+class FrameBuffer:
+    """
+    @ingroup client_side
+    @class FrameBuffer
+    @brief Holds the newest BOARD frame and every game outcome until the next render tick.
+    """
+
+    def __init__(self):
+        """
+        @brief Create an empty buffer.
+        """
+        self.latest = None
+        self.outcomes = []
+        self.received = 0
+        self.coalesced = 0
+
+    @property
+    def pending(self):
+        """
+        @brief True while a frame or an outcome is waiting to be rendered.
+        """
+        return self.latest is not None or bool(self.outcomes)
+
+    def push(self, response):
+        """
+        @brief Add a frame, replacing a frame that was not rendered yet.
+        @param response A parsed BOARD Response.
+        """
+        self.received += 1
+        if self.latest is not None:
+            self.coalesced += 1
+        self.latest = response
+        if is_outcome(response):
+            self.outcomes.append(response)
+
+    def take(self):
+        """
+        @brief Hand the pending frame and outcomes to the renderer and empty the buffer.
+        @return Tuple (latest frame or None, list of outcomes in arrival order).
+        """
+        frame, outcomes = self.latest, self.outcomes
+        self.latest = None
+        self.outcomes = []
+        return frame, outcomes
+
+    def drop_frame(self):
+        """
+        @brief Forget the pending frame (e.g. after a RESET); pending outcomes are kept.
+        """
+        self.latest = None
+
+
+class Playback:
+    """
+    @ingroup client_side
+    @class Playback
+    @brief Releases timestamped frames in step with a clock scaled by the playback speed.
+
+    A speed of None plays at maximum speed: every call to advance() releases
+    up to MAX_BATCH frames regardless of their timestamps.
+    """
+
+    def __init__(self, frames, now, speed=1.0, times=None):
+        """
+        @brief Start a replay.
+        @param frames Sequence of (timestamp in seconds, response) tuples in time order.
+        @param now Current clock reading (e.g. time.monotonic()).
+        @param speed Speed factor, or None for maximum speed.
+        @param times Optional sequence of the frame timestamps. When given, frames is
+               only indexed and sliced, so lazy sequences such as GameLog.frames() are
+               never copied.
+        """
+        if times is None:
+            frames = list(frames)
+            times = [t for t, _ in frames]
+        self.frames = frames
+        self.times = times
+        self.position = 0
+        self.speed = speed
+        self._origin = self.times[0] if self.times else 0.0
+        self._start = now
+
+    @property
+    def finished(self):
+        """
+        @brief True once every frame has been released.
+        """
+        return self.position >= len(self.frames)
+
+    def elapsed(self, now):
+        """
+        @brief Recording time reached by the replay.
+        @param now Current clock reading.
+        @return Seconds since the first frame, in recording time.
+        """
+        if self.speed is None:
+            current = self.times[self.position - 1] if self.position else self._origin
+        else:
+            current = self._origin + (now - self._start) * self.speed
+        return current - (self.times[0] if self.times else 0.0)
+
+    def set_speed(self, speed, now):
+        """
+        @brief Change the speed without jumping: the replay continues from where it is.
+        @param speed New speed factor, or None for maximum speed.
+        @param now Current clock reading.
+        """
+        if self.speed is None:
+            self._origin = self.times[self.position - 1] if self.position else self._origin
+        else:
+            self._origin += (now - self._start) * self.speed
+        self._start = now
+        self.speed = speed
+
+    def advance(self, now):
+        """
+        @brief Release the frames that are due.
+        @param now Current clock reading.
+        @return List of responses due since the previous call, in time order.
+        """
+        if self.speed is None:
+            end = min(len(self.frames), self.position + MAX_BATCH)
+        else:
+            current = self._origin + (now - self._start) * self.speed
+            end = bisect.bisect_right(self.times, current, self.position)
+        due = [response for _, response in self.frames[self.position:end]]
+        self.position = end
+        return due
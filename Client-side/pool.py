@@ -0,0 +1,258 @@
+"""
+@file pool.py
+@ingroup client_side
+@brief Connection pool that drives many boards concurrently from one thread.
+
+Every board gets a BoardSession with its own codec and CommandPipeline. The
+pool multiplexes all of them with a selector over the ports' file
+descriptors, so one process can keep dozens of boards busy and the aggregate
+throughput grows with the number of ports. Connections without a file
+descriptor (Windows COM ports, the SimulatedSerial test double) are polled
+through in_waiting instead.
+"""
+import selectors
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+import serial.tools.list_ports
+
+from pipeline import CommandPipeline, negotiate_baud, negotiate_codec
+from protocol import SAFE_BAUD
+
+
+def discover_ports():
+    """
+    @brief List the serial ports currently attached.
+    @return List of port names.
+    """
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+class BoardSession:
+    """
+    @ingroup client_side
+    @class BoardSession
+    @brief One board of a ConnectionPool: its connection, codec and command pipeline.
+    """
+
+    def __init__(self, port, connection, codec, window=4, timeout=1.0):
+        """
+        @brief Wrap an open, negotiated connection.
+        @param port Port name.
+        @param connection Open serial connection.
+        @param codec Codec chosen for the connection.
+        @param window Maximum number of commands awaiting a reply.
+        @param timeout Seconds after which an unanswered command is given up.
+        """
+        self.port = port
+        self.connection = connection
+        self.codec = codec
+        self.pipeline = CommandPipeline(connection, codec, window=window, timeout=timeout)
+        self.replies = 0
+        self.timeouts = 0
+
+    def send(self, command):
+        """
+        @brief Queue a command for this board; it is written as soon as the window allows.
+        @param command Command text without the line terminator (e.g. "MOVE4").
+        """
+        self.pipeline.submit(command)
+
+    @property
+    def busy(self):
+        """
+        @brief True while commands are queued or waiting for their reply.
+        """
+        return self.pipeline.busy
+
+    def fileno(self):
+        """
+        @brief File descriptor of the port, or None if it cannot be used with a selector.
+        """
+        try:
+            return self.connection.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def close(self):
+        """
+        @brief Close the port.
+        """
+        self.connection.close()
+
+    def __repr__(self):
+        return f"BoardSession({self.port!r}, {self.codec.name})"
+
+
+class ConnectionPool:
+    """
+    @ingroup client_side
+    @class ConnectionPool
+    @brief Opens many ports and multiplexes their I/O in one thread.
+
+    Typical use:
+
+        with ConnectionPool(protocol="binary") as pool:
+            for session in pool.open_all():
+                session.send("MODE2")
+            for session, command, response in pool.run_until_idle():
+                ...
+    """
+
+    def __init__(self, baud=9600, protocol="text", window=4, timeout=1.0, reset_delay=0.0, opener=None):
+        """
+        @brief Create an empty pool.
+        @param baud Highest baud rate negotiated with every port.
+        @param protocol Preferred protocol, "text" or "binary".
+        @param window Maximum number of commands in flight per board.
+        @param timeout Seconds to wait for a reply.
+        @param reset_delay Seconds to wait after opening a port (an Uno resets when the port opens).
+        @param opener Callable (port, baud) returning an open connection; serial.Serial by default.
+        """
+        self.baud = baud
+        self.protocol = protocol
+        self.window = window
+        self.timeout = timeout
+        self.reset_delay = reset_delay
+        self.opener = opener or (lambda port, baud: serial.Serial(port, baud, timeout=self.timeout))
+        self.sessions = {}
+        self.errors = {}
+        self._selector = selectors.DefaultSelector()
+        self._registered = {}
+        self._polled = []
+
+    def open(self, port):
+        """
+        @brief Open and negotiate one port and add it to the pool.
+        @param port Port name.
+        @return The new BoardSession.
+        """
+        session = self._open_detached(port)
+        self._add(session)
+        return session
+
+    def open_all(self, ports=None, max_workers=16):
+        """
+        @brief Open several ports in parallel; ports that fail are recorded in errors.
+        @param ports Port names; every attached port if omitted.
+        @param max_workers Number of ports opened at the same time.
+        @return List of the sessions opened.
+        """
+        ports = discover_ports() if ports is None else list(ports)
+        opened = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ports) or 1))) as executor:
+            futures = {port: executor.submit(self._open_detached, port) for port in ports}
+        for port, future in futures.items():
+            try:
+                session = future.result()
+            except Exception as e:
+                self.errors[port] = str(e)
+                continue
+            self._add(session)
+            opened.append(session)
+        return opened
+
+    def poll(self, timeout=0.1):
+        """
+        @brief Wait up to timeout for data on any board and dispatch every complete reply.
+        @param timeout Seconds to wait when nothing is pending.
+        @return List of (session, command, response) tuples; command is "" for unsolicited replies.
+        """
+        events = []
+        if self._selector.get_map():
+            wait = min(timeout, 0.005) if self._polled else timeout
+            for key, _ in self._selector.select(wait):
+                self._read(key.data, events)
+        elif not self._polled:
+            time.sleep(timeout)
+        for session in list(self._polled):
+            self._read(session, events, only_waiting=True)
+        if self._polled and not events:
+            time.sleep(0.001)
+        now = time.monotonic()
+        for session in list(self.sessions.values()):
+            session.timeouts += len(session.pipeline.expire(now))
+        return events
+
+    def run_until_idle(self, timeout=None):
+        """
+        @brief Poll until no board has commands pending.
+        @param timeout Optional overall time limit in seconds.
+        @return List of every (session, command, response) tuple received.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        events = []
+        while any(session.busy for session in self.sessions.values()):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            events.extend(self.poll())
+        return events
+
+    def remove(self, port):
+        """
+        @brief Close one board and drop it from the pool.
+        @param port Port name.
+        """
+        session = self.sessions.pop(port, None)
+        if session is None:
+            return
+        if session in self._polled:
+            self._polled.remove(session)
+        else:
+            # A port that broke or was closed no longer has a file descriptor: use the one registered
+            self._selector.unregister(self._registered.pop(port))
+        session.close()
+
+    def close(self):
+        """
+        @brief Close every board.
+        """
+        for port in list(self.sessions):
+            self.remove(port)
+        self._selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open_detached(self, port):
+        connection = self.opener(port, SAFE_BAUD)
+        try:
+            if self.reset_delay:
+                time.sleep(self.reset_delay)
+                connection.reset_input_buffer()
+            if self.baud > SAFE_BAUD:
+                negotiate_baud(connection, self.baud, timeout=self.timeout)
+            codec = negotiate_codec(connection, self.protocol, self.timeout)
+            session = BoardSession(port, connection, codec, self.window, self.timeout)
+            session.pipeline.negotiate()
+        except Exception:
+            connection.close()
+            raise
+        return session
+
+    def _add(self, session):
+        self.sessions[session.port] = session
+        fd = session.fileno()
+        if fd is None:
+            self._polled.append(session)
+        else:
+            self._selector.register(fd, selectors.EVENT_READ, session)
+            self._registered[session.port] = fd
+
+    def _read(self, session, events, only_waiting=False):
+        try:
+            waiting = session.connection.in_waiting
+            if only_waiting and not waiting:
+                return
+            data = session.connection.read(max(1, waiting))
+        except Exception as e:
+            self.errors[session.port] = str(e)
+            self.remove(session.port)
+            return
+        for command, response in session.pipeline.receive(data):
+            session.replies += 1
+            events.append((session, command, response))
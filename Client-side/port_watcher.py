@@ -0,0 +1,192 @@
+"""
+@file port_watcher.py
+@ingroup client_side
+@brief Hot-plug detection for serial ports.
+
+PortWatcher keeps the set of serial ports in a device directory (/dev by
+default) and reports the ports that appear or disappear. On Linux it sleeps
+on an inotify watch of the directory, so a board that is plugged in is seen
+within milliseconds. Elsewhere, or when inotify is unavailable, it lists
+the directory every @c interval seconds and diffs the snapshots; without a
+device directory (Windows) the snapshots come from comports(). Either way
+inotify is only a wake-up: events are always derived from two snapshots, so
+a burst of changes or an overflowed event queue cannot leave it out of
+sync. The class does not depend on Qt; serial_worker.PortScanner runs it on
+a thread for the GUI.
+
+Watch a directory from the command line:
+
+    python port_watcher.py
+    python port_watcher.py /tmp/fake-dev --poll
+"""
+import argparse
+import ctypes
+import fnmatch
+import os
+import select
+import sys
+import time
+
+HOTPLUG_PATTERNS = ("ttyUSB*", "ttyACM*", "ttyAMA*", "rfcomm*", "cu.usb*")
+
+DEFAULT_DIRECTORY = "/dev" if os.path.isdir("/dev") else None
+
+ADDED = "added"
+REMOVED = "removed"
+
+IN_ATTRIB = 0x004
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+
+
+def open_inotify(directory):
+    """
+    @brief Watch a directory for entries being created, removed, renamed or changing permissions.
+    @param directory Directory to watch.
+    @return Non-blocking inotify file descriptor, or None if inotify is not available.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class PortWatcher:
+    """
+    @ingroup client_side
+    @class PortWatcher
+    @brief Reports serial ports that appear in or disappear from a device directory.
+
+    The first check() or poll() reports every port already present as added.
+    A device node only counts as a port once it can be opened for reading and
+    writing, so a board is not reported before udev has set its permissions.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, patterns=HOTPLUG_PATTERNS, interval=0.5, use_inotify=True):
+        """
+        @brief Create a watcher; nothing is listed until the first check() or poll().
+        @param directory Device directory, or None to list ports with comports().
+        @param patterns Glob patterns of the device names that are serial ports.
+        @param interval Seconds between two snapshots when polling.
+        @param use_inotify False to poll even where inotify is available.
+        """
+        self.directory = directory
+        self.patterns = patterns
+        self.interval = interval
+        self.ports = set()
+        self._fd = open_inotify(directory) if use_inotify and directory is not None else None
+
+    @property
+    def uses_inotify(self):
+        """
+        @brief True if changes wake the watcher immediately instead of on the next poll.
+        """
+        return self._fd is not None
+
+    def snapshot(self):
+        """
+        @brief List the serial ports present now.
+        @return Set of port names (paths in the device directory).
+        """
+        if self.directory is None:
+            import serial.tools.list_ports
+            return {port.device for port in serial.tools.list_ports.comports()}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return set()
+        ports = set()
+        for name in names:
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns):
+                path = os.path.join(self.directory, name)
+                if os.access(path, os.R_OK | os.W_OK):
+                    ports.add(path)
+        return ports
+
+    def check(self):
+        """
+        @brief Compare the ports present now with the previous snapshot.
+        @return List of (REMOVED, port) then (ADDED, port) events, each sorted by port.
+        """
+        current = self.snapshot()
+        events = [(REMOVED, port) for port in sorted(self.ports - current)]
+        events += [(ADDED, port) for port in sorted(current - self.ports)]
+        self.ports = current
+        return events
+
+    def poll(self, timeout=None):
+        """
+        @brief Wait until ports appear or disappear.
+        @param timeout Longest wait in seconds, or None to wait for a change.
+        @return Events as returned by check(); empty if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._fd is not None:
+                readable, _, _ = select.select([self._fd], [], [], remaining)
+                if readable:
+                    self._drain()
+            else:
+                time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+            events = self.check()
+            if events or (deadline is not None and time.monotonic() >= deadline):
+                return events
+
+    def close(self):
+        """
+        @brief Stop watching the directory.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _drain(self):
+        try:
+            while os.read(self._fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Print serial ports as they are plugged in and removed.")
+    parser.add_argument('directory', nargs='?', default=DEFAULT_DIRECTORY,
+                        help="Device directory to watch (default: /dev).")
+    parser.add_argument('--poll', action='store_true', help="Poll the directory instead of using inotify.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    with PortWatcher(args.directory, use_inotify=not args.poll) as watcher:
+        print(f"Watching {args.directory or 'comports()'} ({'inotify' if watcher.uses_inotify else 'polling'}). "
+              f"Press Ctrl+C to stop.")
+        try:
+            while True:
+                for event, port in watcher.poll():
+                    print(f"{time.strftime('%H:%M:%S')} {event} {port}")
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
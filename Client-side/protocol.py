@@ -0,0 +1,350 @@
+"""
+@file protocol.py
+@ingroup client_side
+@brief Helpers for the serial protocol spoken by the Arduino firmware.
+
+The board speaks a line based text protocol ("MOVE4" / "BOARD:120010200:CONTINUE").
+After the handshake "<test_connection binary="1"/>" it can switch to a compact
+binary framing: every frame is [LEN][payload: LEN bytes][CRC-8 over LEN and
+payload]. Command payloads are [opcode][argument]; reply payloads start with
+a flag byte (bits 7-6: frame type, bits 3-2: winner, bits 1-0: status) and,
+for board updates, carry the board packed with 2 bits per cell. A byte that
+cannot start a frame (length 0 or above MAX_FRAME_PAYLOAD) switches the board
+back to the text protocol.
+
+Commands may carry a sequence number that the board echoes in its reply so
+that several commands can be in flight at once: "#17 MOVE4" is answered with
+"#17 BOARD:...". In binary frames the sequence number is the last payload
+byte, flagged by OP_SEQUENCE in the opcode and SEQUENCE_FLAG in the reply.
+Replies produced by the AI vs AI loop never carry a sequence number.
+
+"SAVE" stores the game in the board's EEPROM. "LOAD" restores it, and
+"LOAD<6 hex digits>" restores a snapshot pushed by the host (see
+savegame.Snapshot); both are answered with the restored board. In binary
+frames the snapshot is the 3 byte little-endian argument of OP_LOAD.
+
+The board always starts at SAFE_BAUD. "BAUD<rate>" is answered with
+"OK:BAUD" at the current rate, after which the board switches to the new
+rate. The host must confirm it with "<test_connection/>" within
+BAUD_CONFIRM_TIMEOUT seconds, otherwise the board falls back to the last
+confirmed rate. The command exists only in the text protocol.
+"""
+
+HANDSHAKE_BINARY = '<test_connection binary="1"/>'
+
+OP_NOP = 0x00
+OP_MODE = 0x01
+OP_MOVE = 0x02
+OP_RESET = 0x03
+OP_TEST_CONNECTION = 0x04
+OP_SAVE = 0x05
+OP_LOAD = 0x06
+OP_SEQUENCE = 0x80
+
+FRAME_BOARD = 0
+FRAME_OK = 1
+FRAME_ERR = 2
+SEQUENCE_FLAG = 0x20
+
+MAX_FRAME_PAYLOAD = 8
+SNAPSHOT_SIZE = 3
+
+BAUD_RATES = (9600, 19200, 38400, 57600, 115200)
+SAFE_BAUD = 9600
+BAUD_CONFIRM_TIMEOUT = 1.0
+
+BOARD_STATUS = ("CONTINUE", "WIN", "DRAW")
+OK_CODES = {1: "MODE_SET", 2: "RESET", 3: "CONNECTION_OK", 4: "SAVED", 5: "BAUD"}
+ERR_CODES = {1: "INVALID_MOVE", 2: "BAD_FRAME", 3: "NO_SAVE", 4: "BAD_STATE", 5: "BAD_BAUD"}
+
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+
+_CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    """
+    @brief CRC-8 (polynomial 0x07, initial value 0) as computed by the firmware.
+    @param data Bytes to checksum.
+    @return Checksum in the range 0-255.
+    """
+    crc = 0
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def pack_board(board):
+    """
+    @brief Pack a board string into an 18-bit integer, 2 bits per cell (cell 0 in the lowest bits).
+    @param board Board state string of 9 characters (0: empty, 1: X, 2: O).
+    @return Packed board.
+    """
+    packed = 0
+    for i, cell in enumerate(board):
+        packed |= int(cell) << (2 * i)
+    return packed
+
+
+def unpack_board(packed):
+    """
+    @brief Unpack a board packed by pack_board().
+    @param packed Packed board.
+    @return Board state string of 9 characters.
+    """
+    return "".join(str((packed >> (2 * i)) & 3) for i in range(9))
+
+
+def encode_frame(payload):
+    """
+    @brief Wrap a payload into a length-prefixed, CRC protected frame.
+    @param payload Payload bytes.
+    @return Frame bytes.
+    """
+    body = bytes([len(payload)]) + bytes(payload)
+    return body + bytes([crc8(body)])
+
+
+class Response:
+    """
+    @ingroup client_side
+    @class Response
+    @brief A single reply received from the board.
+    """
+    def __init__(self, kind, raw, board=None, status=None, winner=0, detail=None, seq=None):
+        """
+        @brief Create a parsed response.
+        @param kind One of "BOARD", "OK", "ERR", "CONNECTION_OK", "MALFORMED", "UNKNOWN" or
+                    "TIMEOUT" (no reply arrived; raised by the client, never sent by the board).
+        @param raw The raw reply line.
+        @param board Board state string (9 characters of 0/1/2) for BOARD replies.
+        @param status Game status for BOARD replies ("WIN", "DRAW" or "CONTINUE").
+        @param winner Winning player (1: X, 2: O) for WIN replies, otherwise 0.
+        @param detail Text after the prefix for OK and ERR replies.
+        @param seq Sequence number echoed by the board, or None.
+        """
+        self.kind = kind
+        self.raw = raw
+        self.board = board
+        self.status = status
+        self.winner = winner
+        self.detail = detail
+        self.seq = seq
+
+    def __repr__(self):
+        return f"Response({self.kind!r}, {self.raw!r})"
+
+
+def parse_command(command):
+    """
+    @brief Split a text command into its opcode and argument for binary framing.
+    @param command Command text (e.g. "MOVE4").
+    @return Tuple (opcode, argument bytes), or None if the command has no binary form.
+    """
+    if command.startswith("MODE") and command[4:].isdigit():
+        return OP_MODE, bytes([int(command[4:]) & 0xFF])
+    if command.startswith("MOVE") and command[4:].isdigit():
+        return OP_MOVE, bytes([int(command[4:]) & 0xFF])
+    if command == "RESET":
+        return OP_RESET, b""
+    if command == "<test_connection/>":
+        return OP_TEST_CONNECTION, b""
+    if command == "SAVE":
+        return OP_SAVE, b""
+    if command == "LOAD":
+        return OP_LOAD, b""
+    if (command.startswith("LOAD") and len(command) == 4 + 2 * SNAPSHOT_SIZE
+            and all(c in "0123456789abcdefABCDEF" for c in command[4:])):
+        return OP_LOAD, int(command[4:], 16).to_bytes(SNAPSHOT_SIZE, "little")
+    return None
+
+
+def encode_command(command, seq=None):
+    """
+    @brief Encode a command for transmission to the board.
+    @param command Command text without the line terminator (e.g. "MOVE4").
+    @param seq Optional sequence number to be echoed in the reply.
+    @return Bytes to be written to the serial port.
+    """
+    if seq is not None:
+        command = f"#{seq} {command}"
+    return (command + "\n").encode()
+
+
+def parse_response(line):
+    """
+    @brief Parse one reply line from the board.
+    @param line Decoded reply line, with or without the line terminator.
+    @return Response describing the line.
+    """
+    line = line.strip()
+    if line.startswith("#"):
+        number, _, rest = line[1:].partition(" ")
+        if number.isdigit():
+            response = parse_response(rest)
+            response.raw = line
+            response.seq = int(number)
+            return response
+    if line.startswith("BOARD:"):
+        parts = line.split(":")
+        board = parts[1]
+        if len(board) != 9 or any(cell not in "012" for cell in board):
+            return Response("MALFORMED", line)
+        status = parts[2] if len(parts) > 2 else "CONTINUE"
+        winner = 0
+        if status == "WIN":
+            winner = 1 if len(parts) > 3 and parts[3] == "1" else 2
+        return Response("BOARD", line, board=board, status=status, winner=winner)
+    if line.startswith("OK:"):
+        return Response("OK", line, detail=line[3:])
+    if line.startswith("ERR:"):
+        return Response("ERR", line, detail=line[4:])
+    if line == "<connection_ok/>":
+        return Response("CONNECTION_OK", line)
+    if line == '<connection_ok binary="1"/>':
+        return Response("CONNECTION_OK", line, detail="binary")
+    return Response("UNKNOWN", line)
+
+
+def decode_payload(payload):
+    """
+    @brief Decode the payload of a reply frame.
+    @param payload Payload bytes (without length and CRC).
+    @return Response equivalent to the text reply; its raw attribute holds the text form.
+    """
+    if not payload:
+        return Response("MALFORMED", "")
+    if payload[0] & SEQUENCE_FLAG and len(payload) >= 2:
+        response = decode_payload(bytes([payload[0] & ~SEQUENCE_FLAG]) + payload[1:-1])
+        response.seq = payload[-1]
+        response.raw = f"#{response.seq} {response.raw}"
+        return response
+    flags = payload[0]
+    frame_type = flags >> 6
+    if frame_type == FRAME_BOARD and len(payload) >= 4:
+        board = unpack_board(payload[1] | (payload[2] << 8) | (payload[3] << 16))
+        status_code = flags & 3
+        if status_code >= len(BOARD_STATUS) or any(cell not in "012" for cell in board):
+            return Response("MALFORMED", payload.hex())
+        status = BOARD_STATUS[status_code]
+        winner = (flags >> 2) & 3 if status == "WIN" else 0
+        raw = f"BOARD:{board}:{status}" + (f":{winner}" if status == "WIN" else "")
+        return Response("BOARD", raw, board=board, status=status, winner=winner)
+    if frame_type == FRAME_OK and len(payload) >= 2:
+        code = OK_CODES.get(payload[1], str(payload[1]))
+        if code == "CONNECTION_OK":
+            return Response("CONNECTION_OK", "<connection_ok/>")
+        return Response("OK", "OK:" + code, detail=code)
+    if frame_type == FRAME_ERR and len(payload) >= 2:
+        code = ERR_CODES.get(payload[1], str(payload[1]))
+        return Response("ERR", "ERR:" + code, detail=code)
+    return Response("MALFORMED", payload.hex())
+
+
+class TextCodec:
+    """
+    @ingroup client_side
+    @class TextCodec
+    @brief Line based text protocol (the firmware default).
+    """
+    name = "text"
+
+    def __init__(self):
+        """
+        @brief Create a codec with an empty receive buffer.
+        """
+        self._buffer = bytearray()
+
+    def encode_command(self, command, seq=None):
+        """
+        @brief Encode a command for transmission.
+        @param command Command text without the line terminator.
+        @param seq Optional sequence number to be echoed in the reply.
+        @return Bytes to be written to the serial port.
+        """
+        return encode_command(command, seq)
+
+    def feed(self, data):
+        """
+        @brief Feed received bytes and return every complete reply.
+        @param data Received bytes.
+        @return List of parsed Response objects.
+        """
+        self._buffer += data
+        responses = []
+        while True:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                return responses
+            line = self._buffer[:end].decode(errors="replace").strip()
+            del self._buffer[:end + 1]
+            if line:
+                responses.append(parse_response(line))
+
+
+class BinaryCodec:
+    """
+    @ingroup client_side
+    @class BinaryCodec
+    @brief Compact length-prefixed binary framing negotiated with HANDSHAKE_BINARY.
+
+    A board update costs 6 bytes on the wire instead of about 26 for the text reply.
+    """
+    name = "binary"
+
+    def __init__(self):
+        """
+        @brief Create a codec with an empty receive buffer.
+        """
+        self._buffer = bytearray()
+
+    def encode_command(self, command, seq=None):
+        """
+        @brief Encode a command as a binary frame.
+        @param command Command text (e.g. "MOVE4").
+        @param seq Optional sequence number (0-255) to be echoed in the reply.
+        @return Frame bytes.
+        @throws ValueError If the command has no binary encoding.
+        """
+        parsed = parse_command(command)
+        if parsed is None:
+            raise ValueError(f"Command {command!r} has no binary encoding")
+        opcode, argument = parsed
+        if seq is not None:
+            return encode_frame(bytes([opcode | OP_SEQUENCE]) + argument + bytes([seq & 0xFF]))
+        return encode_frame(bytes([opcode]) + argument)
+
+    def feed(self, data):
+        """
+        @brief Feed received bytes and return every complete, valid frame.
+
+        Frames with a bad length or CRC are skipped one byte at a time until the
+        stream is back in sync.
+        @param data Received bytes.
+        @return List of decoded Response objects.
+        """
+        self._buffer += data
+        responses = []
+        while self._buffer:
+            length = self._buffer[0]
+            if length == 0 or length > MAX_FRAME_PAYLOAD:
+                del self._buffer[0]
+                continue
+            if len(self._buffer) < length + 2:
+                break
+            frame = bytes(self._buffer[:length + 2])
+            if crc8(frame[:-1]) != frame[-1]:
+                del self._buffer[0]
+                continue
+            del self._buffer[:length + 2]
+            responses.append(decode_payload(frame[1:-1]))
+        return responses
@@ -0,0 +1,136 @@
+"""
+@file reconnect.py
+@ingroup client_side
+@brief Reconnect policy: exponential backoff, a replay queue and downtime metrics.
+
+A ReconnectSupervisor decides when the next attempt to reopen a lost
+connection is due and keeps the commands that never got a reply, so they can
+be sent again once the handshake has been redone. It does not open anything
+itself and does not depend on Qt; the GUI asks it for the next delay and runs
+the attempt (see TicTacToeGUI.on_connection_lost()).
+"""
+import time
+
+
+class ReconnectSupervisor:
+    """
+    @ingroup client_side
+    @class ReconnectSupervisor
+    @brief Backoff schedule, replay queue and counters for one connection.
+
+    The first attempt is made @c initial_delay seconds after the connection is
+    lost and every failed attempt multiplies the delay by @c factor, up to
+    @c max_delay. An outage lasts from connection_lost() until connected() or
+    give_up(); the metrics count outages, attempts and the time spent offline.
+    """
+
+    def __init__(self, initial_delay=0.25, factor=2.0, max_delay=8.0, max_attempts=0, clock=time.monotonic):
+        """
+        @brief Create a supervisor with no outage in progress.
+        @param initial_delay Seconds before the first attempt.
+        @param factor Growth of the delay after each failed attempt.
+        @param max_delay Longest delay between two attempts.
+        @param max_attempts Attempts per outage before giving up; 0 retries until give_up() is called.
+        @param clock Function returning the current time in seconds.
+        """
+        self.initial_delay = initial_delay
+        self.factor = factor
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.replay = []
+        self.attempts = 0
+        self.down_since = None
+        self.last_error = None
+        self.reconnects = 0
+        self.outages = 0
+        self.failed_attempts = 0
+        self.replayed = 0
+        self.downtime_total = 0.0
+        self.downtime_last = 0.0
+
+    @property
+    def down(self):
+        """
+        @brief True while an outage is in progress.
+        """
+        return self.down_since is not None
+
+    def connection_lost(self, reason, unacked=()):
+        """
+        @brief Start an outage, or continue the current one, and schedule the first attempt.
+        @param reason Description of the failure.
+        @param unacked Commands that were sent or queued but never answered, oldest first.
+        @return Seconds until the next attempt, or None to give up.
+        """
+        if self.down_since is None:
+            self.down_since = self.clock()
+            self.outages += 1
+            self.attempts = 0
+        self.replay.extend(unacked)
+        self.last_error = reason
+        return self._next_delay()
+
+    def queue(self, command):
+        """
+        @brief Keep a command issued during the outage for replay.
+        @param command Command text.
+        """
+        self.replay.append(command)
+
+    def attempt_failed(self, error):
+        """
+        @brief Record a failed attempt to reopen the connection.
+        @param error Description of the failure.
+        @return Seconds until the next attempt, or None to give up.
+        """
+        self.failed_attempts += 1
+        self.last_error = error
+        return self._next_delay()
+
+    def connected(self):
+        """
+        @brief End the outage after the connection was reopened.
+        @return Commands to replay, oldest first; the replay queue is emptied.
+        """
+        if self.down_since is not None:
+            self.downtime_last = self.clock() - self.down_since
+            self.downtime_total += self.downtime_last
+            self.reconnects += 1
+            self.down_since = None
+        replay, self.replay = self.replay, []
+        self.replayed += len(replay)
+        return replay
+
+    def give_up(self):
+        """
+        @brief End the outage without reconnecting; the replay queue is dropped.
+        """
+        if self.down_since is not None:
+            self.downtime_last = self.clock() - self.down_since
+            self.downtime_total += self.downtime_last
+            self.down_since = None
+        self.replay = []
+
+    def metrics(self):
+        """
+        @brief Reconnect counters and downtime, including the outage in progress.
+        @return Dictionary of metric name to value.
+        """
+        current = self.clock() - self.down_since if self.down_since is not None else 0.0
+        return {
+            "reconnects": self.reconnects,
+            "outages": self.outages,
+            "failed_attempts": self.failed_attempts,
+            "replayed_commands": self.replayed,
+            "downtime_total": self.downtime_total + current,
+            "downtime_last": current if self.down_since is not None else self.downtime_last,
+            "down": self.down,
+        }
+
+    def _next_delay(self):
+        if self.max_attempts and self.attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.initial_delay * self.factor ** self.attempts)
+        self.attempts += 1
+        return delay
@@ -0,0 +1,412 @@
+"""
+@file recorder.py
+@ingroup client_side
+@brief Append-only game log with fixed-size records and memory-mapped replay.
+
+Every move is one 19-byte record: wall-clock timestamp, game number, packed
+board after the move (see protocol.pack_board()), game mode, cell played and
+outcome. A frame that carries two new cells (the player's move and the AI's
+reply) is split into two records. Next to the log, "<log>.idx" holds the
+number of the first record of every game as a little-endian uint64, so both
+record i and game k are found in O(1) without reading the rest of the file.
+GameLog maps both files and only unpacks the records that are asked for.
+
+Inspect a log from the command line:
+
+    python recorder.py games.ttr
+    python recorder.py games.ttr --game 12
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+from board import Board
+from protocol import Response, unpack_board
+
+LOG_MAGIC = b"TTR1"
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<dIIBbB")
+INDEX = struct.Struct("<Q")
+
+NO_OUTCOME = 0
+X_WINS = 1
+O_WINS = 2
+DRAW = 3
+
+OUTCOME_NAMES = {NO_OUTCOME: "-", X_WINS: "X wins", O_WINS: "O wins", DRAW: "draw"}
+
+Record = namedtuple("Record", "timestamp game board mode move outcome")
+
+# Cell mask with bit i moved to bit 2i: packs a Board as protocol.pack_board() does
+_SPREAD = tuple(sum(1 << 2 * i for i in range(9) if mask >> i & 1) for mask in range(512))
+
+
+def pack_position(board):
+    """
+    @brief Pack a Board into the 18-bit form of protocol.pack_board() without going through a string.
+    @param board A Board.
+    @return Packed board.
+    """
+    return _SPREAD[board.x] | _SPREAD[board.o] << 1
+
+
+def outcome_code(status, winner):
+    """
+    @brief Outcome code of a BOARD reply.
+    @param status Game status ("WIN", "DRAW" or "CONTINUE").
+    @param winner Winning player for WIN (1: X, 2: O).
+    @return NO_OUTCOME, X_WINS, O_WINS or DRAW.
+    """
+    if status == "WIN":
+        return X_WINS if winner == 1 else O_WINS
+    if status == "DRAW":
+        return DRAW
+    return NO_OUTCOME
+
+
+def record_response(record):
+    """
+    @brief Rebuild the BOARD reply that a record stands for.
+    @param record A Record.
+    @return Response of kind "BOARD".
+    """
+    if record.outcome in (X_WINS, O_WINS):
+        status, winner = "WIN", record.outcome
+    elif record.outcome == DRAW:
+        status, winner = "DRAW", 0
+    else:
+        status, winner = "CONTINUE", 0
+    return Response("BOARD", f"BOARD:{record.board}:{status}:{winner}", record.board, status, winner)
+
+
+class GameRecorder:
+    """
+    @ingroup client_side
+    @class GameRecorder
+    @brief Appends the moves of the games played to a game log.
+
+    The GUI reports the cell a player clicked with note_move(), every BOARD
+    reply with record_frame() and resets with end_game(). A game also ends
+    with its outcome, or when a frame does not follow from the previous one.
+    """
+
+    def __init__(self, path, clock=time.time):
+        """
+        @brief Open a log for appending, creating it if needed.
+        @param path Log file; the index is written to path + ".idx".
+        @param clock Callable returning the timestamp stored in each record.
+        @throws ValueError If the file exists but is not a game log.
+        """
+        self.path = path
+        self.clock = clock
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with GameLog(path) as log:
+                self.records = len(log)
+                self.game = log.game_count
+            # Drop a record cut short by a crash so that appends stay aligned
+            with open(path, "r+b") as f:
+                f.truncate(HEADER.size + self.records * RECORD.size)
+            self._log = open(path, "ab")
+        else:
+            self.records = 0
+            self.game = 0
+            self._log = open(path, "wb")
+            self._log.write(HEADER.pack(LOG_MAGIC, RECORD.size))
+            open(path + ".idx", "wb").close()
+        self._index = open(path + ".idx", "ab")
+        self.mode = 0
+        self._board = None
+        self._move = None
+
+    def set_mode(self, mode):
+        """
+        @brief Set the game mode stored with the following records.
+        @param mode 1: Man vs Man, 2: Man vs AI, 3: AI vs AI.
+        """
+        self.mode = mode
+
+    def note_move(self, position):
+        """
+        @brief Remember the cell a player chose, so it is recorded before the AI's reply.
+        @param position Cell index (0-8).
+        """
+        self._move = position
+
+    def end_game(self):
+        """
+        @brief Close the game in progress; the next move starts a new game.
+        """
+        if self._board is not None:
+            self.game += 1
+        self._board = None
+        self._move = None
+        self.flush()
+
+    def record_frame(self, board, status="CONTINUE", winner=0):
+        """
+        @brief Record the moves that lead from the previous frame to this one.
+        @param board Board state string of 9 characters.
+        @param status Game status ("WIN", "DRAW" or "CONTINUE").
+        @param winner Winning player for WIN (1: X, 2: O).
+        @return Number of records written.
+        """
+        new = Board.from_string(board)
+        previous = self._board
+        if previous is not None and (previous.x & ~new.x or previous.o & ~new.o):
+            self.end_game()
+            previous = None
+        if previous is None:
+            previous = Board()
+        added = list(new.diff(previous))
+        if not added:
+            return 0
+        if self._move in added:
+            added.remove(self._move)
+            added.insert(0, self._move)
+        self._move = None
+
+        if self._board is None:
+            self._index.write(INDEX.pack(self.records))
+        outcome = outcome_code(status, winner)
+        timestamp = self.clock()
+        for n, cell in enumerate(added):
+            previous = previous.play(cell, new.cell(cell))
+            last = n == len(added) - 1
+            self._log.write(RECORD.pack(timestamp, self.game, pack_position(previous), self.mode,
+                                        cell, outcome if last else NO_OUTCOME))
+            self.records += 1
+        self._board = new
+        if outcome != NO_OUTCOME:
+            self.end_game()
+        return len(added)
+
+    def flush(self):
+        """
+        @brief Push buffered records to the operating system.
+        """
+        self._log.flush()
+        self._index.flush()
+
+    def close(self):
+        """
+        @brief Flush and close the log.
+        """
+        self._log.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class GameLog:
+    """
+    @ingroup client_side
+    @class GameLog
+    @brief Read-only, memory-mapped view of a game log.
+
+    A missing or stale index (e.g. after a crash) is rebuilt from the game
+    numbers of the records.
+    """
+
+    def __init__(self, path):
+        """
+        @brief Map a log and its index.
+        @param path Log file.
+        @throws ValueError If the file is not a game log.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size or HEADER.unpack(header) != (LOG_MAGIC, RECORD.size):
+                raise ValueError(f"{path} is not a game log")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+        self._index_map = None
+        self._starts = self._load_index(path + ".idx")
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def game_count(self):
+        """
+        @brief Number of games in the log.
+        """
+        return len(self._starts)
+
+    def record(self, i):
+        """
+        @brief Unpack one record.
+        @param i Record number; negative numbers count from the end.
+        @return Record.
+        @throws IndexError If there is no such record.
+        """
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("record number out of range")
+        timestamp, game, board, mode, move, outcome = RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+        return Record(timestamp, game, unpack_board(board), mode, move, outcome)
+
+    def game_bounds(self, game):
+        """
+        @brief Records of one game.
+        @param game Game number; negative numbers count from the end.
+        @return Tuple (first record, one past the last record).
+        @throws IndexError If there is no such game.
+        """
+        if game < 0:
+            game += len(self._starts)
+        if not 0 <= game < len(self._starts):
+            raise IndexError("game number out of range")
+        end = self._starts[game + 1] if game + 1 < len(self._starts) else self._count
+        return self._starts[game], end
+
+    def game(self, game):
+        """
+        @brief All moves of one game.
+        @param game Game number.
+        @return List of Records in move order.
+        """
+        start, end = self.game_bounds(game)
+        return [self.record(i) for i in range(start, end)]
+
+    def outcome(self, game):
+        """
+        @brief Outcome of one game, read from its last record.
+        @param game Game number.
+        @return Outcome code; NO_OUTCOME for an unfinished game.
+        """
+        return self.record(self.game_bounds(game)[1] - 1).outcome
+
+    def frames(self, start=0, stop=None):
+        """
+        @brief Lazy (timestamp, Response) sequence over a range of records, for Playback.
+        @param start First record.
+        @param stop One past the last record; the end of the log if omitted.
+        @return Sequence supporting len() and indexing with integers or slices.
+        """
+        return _RecordView(self, start, self._count if stop is None else stop, True)
+
+    def timestamps(self, start=0, stop=None):
+        """
+        @brief Lazy sequence of the timestamps of a range of records.
+        @param start First record.
+        @param stop One past the last record; the end of the log if omitted.
+        @return Sequence supporting len() and indexing with integers or slices.
+        """
+        return _RecordView(self, start, self._count if stop is None else stop, False)
+
+    def close(self):
+        """
+        @brief Unmap the log and its index.
+        """
+        if isinstance(self._starts, memoryview):
+            self._starts.release()
+        if self._index_map is not None:
+            self._index_map.close()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _game_of(self, i):
+        return struct.unpack_from("<I", self._map, HEADER.size + i * RECORD.size + 8)[0]
+
+    def _load_index(self, index_path):
+        try:
+            with open(index_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size >= INDEX.size:
+                    self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            pass
+        if self._index_map is not None:
+            starts = memoryview(self._index_map)[:len(self._index_map) // INDEX.size * INDEX.size].cast("Q")
+            games = self._game_of(self._count - 1) + 1 if self._count else 0
+            if len(starts) == games and starts[-1] < self._count and self._game_of(starts[-1]) == games - 1:
+                return starts
+            starts.release()
+            self._index_map.close()
+            self._index_map = None
+        elif not self._count:
+            return ()
+        return self._rebuild_index(index_path)
+
+    def _rebuild_index(self, index_path):
+        starts = []
+        game = None
+        for i in range(self._count):
+            record_game = self._game_of(i)
+            if record_game != game:
+                starts.append(i)
+                game = record_game
+        try:
+            with open(index_path, "wb") as f:
+                f.write(b"".join(INDEX.pack(start) for start in starts))
+        except OSError:
+            pass
+        return starts
+
+
+class _RecordView:
+    """Sequence over a range of records that unpacks them on access."""
+
+    def __init__(self, log, start, stop, frames):
+        self._log = log
+        self._start = start
+        self._stop = max(start, stop)
+        self._frames = frames
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._item(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("index out of range")
+        return self._item(i)
+
+    def _item(self, i):
+        offset = HEADER.size + (self._start + i) * RECORD.size
+        if not self._frames:
+            return struct.unpack_from("<d", self._log._map, offset)[0]
+        record = self._log.record(self._start + i)
+        return record.timestamp, record_response(record)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Inspect a Tic-Tac-Toe game log.")
+    parser.add_argument('log', type=str, help="Game log written by the GUI.")
+    parser.add_argument('--game', type=int, help="Print the moves of one game (negative counts from the end).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    with GameLog(args.log) as log:
+        if args.game is not None:
+            for record in log.game(args.game):
+                print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.timestamp))} "
+                      f"mode {record.mode} move {record.move} {record.board} {OUTCOME_NAMES[record.outcome]}")
+            return
+        counts = dict.fromkeys(OUTCOME_NAMES, 0)
+        for game in range(log.game_count):
+            counts[log.outcome(game)] += 1
+        print(f"{len(log)} moves in {log.game_count} games: {counts[X_WINS]} X wins, {counts[O_WINS]} O wins, "
+              f"{counts[DRAW]} draws, {counts[NO_OUTCOME]} unfinished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+@file savegame.py
+@ingroup client_side
+@brief Game snapshots shared with the firmware, and save files on disk.
+
+A snapshot packs the whole game into 3 bytes exactly as the firmware's
+packSnapshot() does: bits 17-0 hold the board (2 bits per cell, cell 0
+lowest), bits 19-18 the mode, bit 20 whether it is the first player's turn
+and bit 21 whether an AI vs AI game is running. The board restores a
+snapshot in one round trip with "LOAD<6 hex digits>" (see command()).
+Save files are small INI files written with configparser.
+"""
+import configparser
+import time
+
+from protocol import SNAPSHOT_SIZE, pack_board, unpack_board
+
+
+class Snapshot:
+    """
+    @ingroup client_side
+    @class Snapshot
+    @brief State of a game: board, mode, turn and AI vs AI flag.
+    """
+
+    def __init__(self, board, mode, first_player_turn=True, ai_running=False):
+        """
+        @brief Create a snapshot.
+        @param board Board state string of 9 characters (0: empty, 1: X, 2: O).
+        @param mode 1: Man vs Man, 2: Man vs AI, 3: AI vs AI.
+        @param first_player_turn True if X moves next in Man vs Man mode.
+        @param ai_running True if the AI vs AI loop should keep playing.
+        """
+        self.board = board
+        self.mode = mode
+        self.first_player_turn = first_player_turn
+        self.ai_running = ai_running
+
+    @classmethod
+    def from_game(cls, board, mode, finished=False):
+        """
+        @brief Snapshot of a game seen by the client, deriving the turn from the board.
+        @param board Board state string of 9 characters.
+        @param mode Game mode (1-3).
+        @param finished True if the game has ended; an AI vs AI game is then not resumed.
+        @return Snapshot.
+        """
+        return cls(board, mode, board.count("1") == board.count("2"), mode == 3 and not finished)
+
+    def pack(self):
+        """
+        @brief Pack the snapshot into its 3 byte integer form.
+        @return Packed snapshot.
+        """
+        packed = pack_board(self.board) | (self.mode & 3) << 18
+        if self.first_player_turn:
+            packed |= 1 << 20
+        if self.ai_running:
+            packed |= 1 << 21
+        return packed
+
+    @classmethod
+    def unpack(cls, packed):
+        """
+        @brief Unpack a snapshot made by pack() or by the firmware.
+        @param packed Packed snapshot.
+        @return Snapshot.
+        @throws ValueError If the value is not a valid snapshot.
+        """
+        board = unpack_board(packed)
+        mode = (packed >> 18) & 3
+        if packed >> 8 * SNAPSHOT_SIZE or packed >> 22 or mode == 0 or "3" in board:
+            raise ValueError(f"Invalid snapshot {packed:#x}")
+        return cls(board, mode, bool(packed >> 20 & 1), bool(packed >> 21 & 1))
+
+    def command(self):
+        """
+        @brief Command that restores this game on the board in one round trip.
+        @return Command text, e.g. "LOAD140040".
+        """
+        return f"LOAD{self.pack():0{2 * SNAPSHOT_SIZE}X}"
+
+    def save(self, path):
+        """
+        @brief Write the snapshot to a save file.
+        @param path Save file.
+        """
+        config = configparser.ConfigParser()
+        config['SavedGame'] = {
+            'snapshot': f"{self.pack():0{2 * SNAPSHOT_SIZE}X}",
+            'board': self.board,
+            'mode': str(self.mode),
+            'saved': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(path, 'w') as f:
+            config.write(f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        @brief Read a save file written by save().
+        @param path Save file.
+        @return Snapshot.
+        @throws ValueError If the file holds no valid snapshot.
+        """
+        config = configparser.ConfigParser()
+        try:
+            if not config.read(path) or not config.has_option('SavedGame', 'snapshot'):
+                raise ValueError(f"{path} is not a saved game")
+            return cls.unpack(int(config['SavedGame']['snapshot'], 16))
+        except (configparser.Error, ValueError):
+            raise ValueError(f"{path} is not a saved game")
+
+    def __eq__(self, other):
+        return isinstance(other, Snapshot) and self.pack() == other.pack()
+
+    def __hash__(self):
+        return hash(self.pack())
+
+    def __repr__(self):
+        return (f"Snapshot({self.board!r}, {self.mode}, first_player_turn={self.first_player_turn}, "
+                f"ai_running={self.ai_running})")
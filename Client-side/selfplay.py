@@ -0,0 +1,145 @@
+"""
+@file selfplay.py
+@ingroup client_side
+@brief Self-play farm that plays seeded shards of games on a pool of worker processes.
+
+The games of a run are cut into shards of @c shard_size games, and shard i is
+played with its own random generator seeded from (seed, i). The totals of a
+run therefore only depend on the seed, the number of games and the shard
+size, not on how many workers play the shards or in which order they finish.
+Each worker runs the Python port of the firmware's strategies in engine.py,
+or with --batch the NumPy engine of batch.py, and returns the three counters
+of its shard; the parent adds them up. The game mode decides who plays each
+side, as on the board: a side played by the AI uses the firmware heuristic
+(greedy) and a human side plays random moves, unless --x or --o say otherwise.
+
+    python selfplay.py --games 10000000 --mode "AI vs AI" --workers 8 --seed 1
+    python selfplay.py --games 100000000 --mode "Man vs AI" --x perfect --batch
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from engine import AI_SIDES, MODES, STRATEGIES, play_games
+
+
+def mode_strategies(mode, x_name=None, o_name=None):
+    """
+    @brief Strategies of X and O for a game mode.
+    @param mode Mode name, a key of engine.MODES.
+    @param x_name Strategy for X instead of the mode's default.
+    @param o_name Strategy for O instead of the mode's default.
+    @return Tuple (X strategy name, O strategy name).
+    """
+    ai_sides = AI_SIDES[mode]
+    defaults = ["greedy" if side in ai_sides else "random" for side in (1, 2)]
+    return x_name or defaults[0], o_name or defaults[1]
+
+
+def play_shard(x_name, o_name, games, seed, shard, batch=False):
+    """
+    @brief Play one shard of a run; executed in a worker process.
+    @param x_name Strategy name for X.
+    @param o_name Strategy name for O.
+    @param games Number of games in the shard.
+    @param seed Seed of the run.
+    @param shard Index of the shard within the run.
+    @param batch True to play with the NumPy batch engine.
+    @return List [draws, X wins, O wins].
+    """
+    if batch:
+        import numpy as np
+        from batch import BATCH_STRATEGIES, play_batches
+        return play_batches(BATCH_STRATEGIES[x_name], BATCH_STRATEGIES[o_name], games,
+                            np.random.default_rng([seed, shard]))
+    return play_games(STRATEGIES[x_name], STRATEGIES[o_name], games, random.Random(f"{seed}:{shard}"))
+
+
+def run_selfplay(games, x_name, o_name, workers=None, seed=None, shard_size=100000, batch=False):
+    """
+    @brief Play a run of games on a pool of worker processes and merge the shard results.
+    @param games Number of games.
+    @param x_name Strategy name for X.
+    @param o_name Strategy name for O.
+    @param workers Number of worker processes; defaults to the number of CPUs. 1 plays in this process.
+    @param seed Seed of the run; a random one is drawn (and reported) if None.
+    @param shard_size Games per shard.
+    @param batch True to play with the NumPy batch engine.
+    @return Dictionary with the outcome counts, rates, seed and throughput.
+    """
+    workers = workers or os.cpu_count() or 1
+    seed = random.SystemRandom().randrange(1 << 32) if seed is None else seed
+    shards = [(index, min(shard_size, games - start)) for index, start in enumerate(range(0, games, shard_size))]
+    totals = [0, 0, 0]
+    start = time.perf_counter()
+    if workers == 1:
+        for index, size in shards:
+            for i, count in enumerate(play_shard(x_name, o_name, size, seed, index, batch)):
+                totals[i] += count
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_shard, x_name, o_name, size, seed, index, batch)
+                       for index, size in shards]
+            for future in as_completed(futures):
+                for i, count in enumerate(future.result()):
+                    totals[i] += count
+    duration = time.perf_counter() - start
+    draws, x_wins, o_wins = totals
+    return {
+        "x": x_name,
+        "o": o_name,
+        "games": games,
+        "x_wins": x_wins,
+        "o_wins": o_wins,
+        "draws": draws,
+        "x_win_rate": round(x_wins / games, 4) if games else 0.0,
+        "o_win_rate": round(o_wins / games, 4) if games else 0.0,
+        "draw_rate": round(draws / games, 4) if games else 0.0,
+        "seed": seed,
+        "workers": workers,
+        "shards": len(shards),
+        "duration_s": round(duration, 3),
+        "games_per_s": round(games / duration) if duration else 0,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe self-play games on several processes.")
+    parser.add_argument('--games', type=int, default=1000000, help="Number of games.")
+    parser.add_argument('--mode', choices=list(MODES), default='AI vs AI',
+                        help="Game mode: AI sides play greedy, human sides random (default: AI vs AI).")
+    parser.add_argument('--x', choices=sorted(STRATEGIES), help="Strategy for X instead of the mode's.")
+    parser.add_argument('--o', choices=sorted(STRATEGIES), help="Strategy for O instead of the mode's.")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU).")
+    parser.add_argument('--seed', type=int, help="Seed for reproducible runs.")
+    parser.add_argument('--shard-size', type=int, default=100000, help="Games per shard.")
+    parser.add_argument('--batch', action='store_true', help="Play with the NumPy batch engine (needs numpy).")
+    parser.add_argument('--json', action='store_true', help="Print the result as JSON.")
+    args = parser.parse_args()
+    if args.batch:
+        from batch import BATCH_STRATEGIES
+        for name in mode_strategies(args.mode, args.x, args.o):
+            if name not in BATCH_STRATEGIES:
+                parser.error(f"strategy {name} has no batch version "
+                             f"(choose from {', '.join(sorted(BATCH_STRATEGIES))})")
+    return args
+
+
+def main():
+    args = parse_arguments()
+    x_name, o_name = mode_strategies(args.mode, args.x, args.o)
+    result = run_selfplay(args.games, x_name, o_name, args.workers, args.seed, args.shard_size, args.batch)
+    if args.json:
+        print(json.dumps(result, indent=4))
+        return
+    print(f"{args.mode}: {x_name} (X) vs {o_name} (O), {result['games']} games in {result['shards']} shards "
+          f"on {result['workers']} workers, seed {result['seed']}")
+    print(f"X wins {result['x_win_rate']:.2%}   O wins {result['o_win_rate']:.2%}   "
+          f"draws {result['draw_rate']:.2%}   {result['games_per_s']} games/s")
+
+
+if __name__ == "__main__":
+    main()
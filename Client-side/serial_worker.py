@@ -0,0 +1,260 @@
+"""
+@file serial_worker.py
+@ingroup client_side
+@brief Background threads that own the serial port and perform all blocking I/O.
+"""
+import queue
+import threading
+import time
+import serial
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from pipeline import CommandPipeline, negotiate_baud, negotiate_codec
+from port_watcher import ADDED
+from protocol import SAFE_BAUD, Response, TextCodec
+
+
+class SerialWorker(QThread):
+    """
+    @ingroup client_side
+    @class SerialWorker
+    @brief Owns the serial connection to the Arduino and keeps blocking I/O off the GUI thread.
+
+    The thread itself is the reader: it sleeps in a blocking read and wakes as
+    soon as a byte arrives, so replies and unsolicited AI vs AI moves are
+    delivered through the response_received signal without any polling. A
+    second, plain writer thread takes commands queued with send() and writes
+    them through a CommandPipeline, so up to @c window commands carrying
+    sequence numbers are in flight at once. Commands the pipeline gives up on
+    are delivered through response_received as well, with a Response of kind
+    "TIMEOUT". The time of the last received byte is kept for passive
+    liveness checks (see idle_time()). The port is opened at the board's
+    start-up rate and raised to the fastest rate the link carries, up to
+    @c baud (see pipeline.negotiate_baud()). With protocol "binary" the worker
+    then negotiates the compact binary framing and falls back to text if the
+    board does not answer the handshake. Given a metrics.Metrics registry, the
+    pipeline reports its traffic to it; given a capture.SerialCapture, every
+    byte on the wire is recorded.
+    """
+    opened = pyqtSignal()
+    open_failed = pyqtSignal(str)
+    response_received = pyqtSignal(str, object)
+    connection_lost = pyqtSignal(str)
+
+    _PING = object()
+    _STOP = object()
+
+    READ_INTERVAL = 0.1
+
+    def __init__(self, port, baud, timeout=1, protocol="text", window=4, cached_baud=None, metrics=None,
+                 capture=None, parent=None):
+        """
+        @brief Create a worker for the given port; the port is opened once the thread starts.
+        @param port Serial port name (e.g. COM3 or /dev/ttyUSB0).
+        @param baud Highest baud rate to negotiate.
+        @param timeout Seconds to wait for the reply to a command.
+        @param protocol Preferred protocol, "text" or "binary".
+        @param window Maximum number of commands awaiting a reply.
+        @param cached_baud Rate negotiated with this port before, tried without probing.
+        @param metrics Optional metrics.Metrics registry for traffic, latency and parse time.
+        @param capture Optional capture.SerialCapture that records the traffic of the connection.
+        @param parent Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.port = port
+        self.baud = baud
+        self.timeout = timeout
+        self.protocol = protocol
+        self.window = window
+        self.cached_baud = cached_baud
+        self.metrics = metrics
+        self.capture = capture
+        self.negotiated_baud = None
+        self.codec = TextCodec()
+        self.pipeline = None
+        self.last_rx = time.monotonic()
+        self._commands = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def send(self, command):
+        """
+        @brief Queue a command for the board.
+        @param command Command text without the line terminator (e.g. "MOVE4").
+        """
+        self._commands.put(command)
+
+    def ping(self):
+        """
+        @brief Queue a connection test; its reply refreshes the liveness timestamp.
+        """
+        self._commands.put(self._PING)
+
+    def idle_time(self):
+        """
+        @brief Seconds since the last byte was received from the board.
+        @return Idle time in seconds.
+        """
+        return time.monotonic() - self.last_rx
+
+    def unacked_commands(self):
+        """
+        @brief Commands that never got a reply, for replay on a new connection.
+
+        Call once the worker has stopped. Connection tests are left out.
+        @return List of command texts, oldest first.
+        """
+        commands = self.pipeline.unacked() if self.pipeline is not None else []
+        while True:
+            try:
+                item = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, str):
+                commands.append(item)
+        return [command for command in commands if command != "<test_connection/>"]
+
+    def stop(self):
+        """
+        @brief Stop the worker, close the port and wait for the threads to finish.
+        """
+        self._stopping.set()
+        self._commands.put(self._STOP)
+        self.wait()
+
+    def run(self):
+        """
+        @brief Reader thread body: open the port, start the writer and deliver replies until stopped.
+        """
+        try:
+            serial_conn = serial.Serial(self.port, SAFE_BAUD, timeout=self.READ_INTERVAL)
+            if self.capture:
+                self.capture.opened(self.port)
+                serial_conn = self.capture.wrap(serial_conn)
+        except Exception as e:
+            self.note_exception("serial_open")
+            self.open_failed.emit(str(e))
+            return
+
+        try:
+            self.negotiated_baud = negotiate_baud(serial_conn, self.baud, self.cached_baud, self.timeout)
+            self.codec = negotiate_codec(serial_conn, self.protocol, self.timeout)
+            if self.capture:
+                self.capture.negotiated(self.codec.name)
+            pipeline = CommandPipeline(serial_conn, self.codec, window=self.window, timeout=self.timeout,
+                                       metrics=self.metrics)
+            pipeline.negotiate()
+        except Exception as e:
+            self.note_exception("serial_negotiate")
+            serial_conn.close()
+            self.open_failed.emit(str(e))
+            return
+
+        self.pipeline = pipeline  # Set only once negotiation is over: the GUI treats it as "connected"
+        self.last_rx = time.monotonic()
+        self.opened.emit()
+        writer = threading.Thread(target=self._write_loop, args=(serial_conn,), daemon=True)
+        writer.start()
+        try:
+            while not self._stopping.is_set():
+                data = serial_conn.read(max(1, serial_conn.in_waiting))
+                with self._lock:
+                    matched = self.pipeline.receive(data) if data else []
+                    expired = self.pipeline.expire()
+                if data:
+                    self.last_rx = time.monotonic()
+                for command in expired:
+                    self.response_received.emit(command, Response("TIMEOUT", ""))
+                for command, response in matched:
+                    self.response_received.emit(command, response)
+        except Exception as e:
+            if not self._stopping.is_set():
+                self.note_exception("serial_read")
+                self.connection_lost.emit(str(e))
+        finally:
+            self._stopping.set()
+            self._commands.put(self._STOP)
+            writer.join()
+            serial_conn.close()
+
+    def note_exception(self, site):
+        """
+        @brief Count an exception that ends or prevents the connection.
+        @param site Name of the step that raised it.
+        """
+        if self.metrics:
+            self.metrics.count("exceptions_total", site=site)
+
+    def _write_loop(self, serial_conn):
+        """
+        @brief Writer thread body: hand queued commands to the pipeline until stopped.
+        @param serial_conn The open serial connection.
+        """
+        try:
+            while True:
+                item = self._commands.get()
+                if item is self._STOP:
+                    return
+                with self._lock:
+                    if item is self._PING:
+                        self.pipeline.submit("<test_connection/>")
+                    else:
+                        self.pipeline.submit(item)
+        except Exception as e:
+            if not self._stopping.is_set():
+                self._stopping.set()
+                self.note_exception("serial_write")
+                self.connection_lost.emit(str(e))
+
+
+class PortScanner(QThread):
+    """
+    @ingroup client_side
+    @class PortScanner
+    @brief Enumerates the serial ports off the GUI thread, then follows hot-plug events.
+
+    comports() can take hundreds of milliseconds on machines with many USB
+    devices; the list is delivered through the ports_found signal. Given a
+    port_watcher.PortWatcher, the thread then reports ports that appear or
+    disappear through port_added and port_removed until stop() is called.
+    """
+    ports_found = pyqtSignal(list)
+    port_added = pyqtSignal(str)
+    port_removed = pyqtSignal(str)
+
+    STOP_INTERVAL = 0.2
+
+    def __init__(self, watcher=None, parent=None):
+        """
+        @brief Create a scanner; the scan starts with the thread.
+        @param watcher Optional PortWatcher to follow after the first scan.
+        @param parent Optional parent QObject.
+        """
+        super().__init__(parent)
+        self.watcher = watcher
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """
+        @brief Stop watching and wait for the thread to finish.
+        """
+        self._stopping.set()
+        self.wait()
+        if self.watcher is not None:
+            self.watcher.close()
+
+    def run(self):
+        """
+        @brief Thread body: list the attached ports, then report hot-plug events until stopped.
+        """
+        import serial.tools.list_ports
+        ports = {port.device for port in serial.tools.list_ports.comports()}
+        if self.watcher is not None:
+            ports.update(port for _, port in self.watcher.check())
+        self.ports_found.emit(sorted(ports))
+        while self.watcher is not None and not self._stopping.is_set():
+            for event, port in self.watcher.poll(self.STOP_INTERVAL):
+                if event == ADDED:
+                    self.port_added.emit(port)
+                else:
+                    self.port_removed.emit(port)
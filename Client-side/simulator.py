@@ -0,0 +1,727 @@
+"""
+@file simulator.py
+@ingroup client_side
+@brief Software stand-in for the Arduino board running Server-side.ino.
+
+The emulator reproduces processCommand() and the AI vs AI loop() of the
+firmware byte for byte. It can be used in-process through SimulatedSerial
+(a drop-in for serial.Serial) or exposed on a pseudo-terminal with PtyDevice,
+so that main.py can connect to it like to a real board.
+"""
+import argparse
+import os
+import re
+import select
+import threading
+import time
+from collections import deque
+
+from protocol import (BAUD_CONFIRM_TIMEOUT, BAUD_RATES, SAFE_BAUD, HANDSHAKE_BINARY, MAX_FRAME_PAYLOAD, OP_MODE, OP_MOVE, OP_RESET,
+                      OP_TEST_CONNECTION, OP_SAVE, OP_LOAD, OP_SEQUENCE, FRAME_BOARD, FRAME_OK,
+                      FRAME_ERR, SEQUENCE_FLAG, BOARD_STATUS, OK_CODES, ERR_CODES, SNAPSHOT_SIZE,
+                      crc8, encode_frame, pack_board)
+
+MAN_VS_MAN = 1
+MAN_VS_AI = 2
+AI_VS_AI = 3
+
+EEPROM_SIZE = 1024
+SAVE_ADDRESS = 0
+SAVE_MAGIC = 0x54
+
+_INT_PREFIX = re.compile(r"\s*([+-]?\d+)")
+
+
+def to_int(text):
+    """
+    @brief Convert text to an integer the way Arduino's String::toInt() does.
+    @param text Text to convert.
+    @return The leading integer of the text, or 0 if there is none.
+    """
+    match = _INT_PREFIX.match(text)
+    return int(match.group(1)) if match else 0
+
+
+def _code_of(codes, name):
+    return next(number for number, code_name in codes.items() if code_name == name)
+
+
+def byte_time(baudrate, byte_latency=0.0):
+    """
+    @brief Time needed to transfer one byte over a UART link (8N1 framing).
+    @param baudrate Link speed in baud, or None for an infinitely fast link.
+    @param byte_latency Additional delay per byte in seconds.
+    @return Seconds per byte.
+    """
+    if not baudrate:
+        return byte_latency
+    return 10.0 / baudrate + byte_latency
+
+
+class FirmwareEmulator:
+    """
+    @ingroup client_side
+    @class FirmwareEmulator
+    @brief Pure-Python port of the game logic and command handling in Server-side.ino.
+
+    Bytes received from the host are passed to feed(); replies written by the
+    firmware with Serial.println() accumulate in an output buffer that is
+    drained with take_output(). loop() runs the AI vs AI move pairs, honoring
+    the delay between them.
+    """
+    def __init__(self, ai_delay=1.0, eeprom=None):
+        """
+        @brief Create an emulator in the state the firmware has after setup().
+        @param ai_delay Delay between AI vs AI move pairs in seconds (delay(1000) on the board).
+        @param eeprom Bytearray standing in for the EEPROM (erased by default); pass the
+               eeprom of another emulator to simulate a power cycle of the same board.
+        """
+        self.ai_delay = ai_delay
+        self.eeprom = eeprom if eeprom is not None else bytearray(b"\xff" * EEPROM_SIZE)
+        self.board = [0] * 9
+        self.current_mode = MAN_VS_MAN
+        self.is_first_player_turn = True
+        self.ai_game_running = False
+        self.binary_mode = False
+        self.reply_sequence = -1
+        self.next_ai_time = None
+        self.baud = SAFE_BAUD
+        self.confirmed_baud = SAFE_BAUD
+        self.baud_deadline = None
+        self.now = 0.0
+        self._input = bytearray()
+        self._output = bytearray()
+
+    def check_line(self, a, b, c):
+        """
+        @brief Check if three positions hold the same player's marks.
+        @return True if all three positions match and are not empty.
+        """
+        board = self.board
+        return board[a] != 0 and board[a] == board[b] and board[b] == board[c]
+
+    def check_winner(self):
+        """
+        @brief Check for the winner.
+        @return 1 if player X wins, 2 if player O wins, 0 if no winner.
+        """
+        for i in range(0, 9, 3):
+            if self.check_line(i, i + 1, i + 2):
+                return self.board[i]
+        for i in range(3):
+            if self.check_line(i, i + 3, i + 6):
+                return self.board[i]
+        if self.check_line(0, 4, 8):
+            return self.board[0]
+        if self.check_line(2, 4, 6):
+            return self.board[2]
+        return 0
+
+    def is_board_full(self):
+        """
+        @brief Check if the game board is full.
+        """
+        return 0 not in self.board
+
+    def calculate_ai_move(self, player):
+        """
+        @brief Calculate the AI's move with the firmware's greedy heuristic.
+        @param player The player for which the move is calculated (1: X, 2: O).
+        @return The index of the calculated move, or -1 if no move is possible.
+        """
+        board = self.board
+        opponent = 2 if player == 1 else 1
+        for candidate in (player, opponent):
+            for i in range(9):
+                if board[i] == 0:
+                    board[i] = candidate
+                    wins = self.check_winner() == candidate
+                    board[i] = 0
+                    if wins:
+                        return i
+        if board[4] == 0:
+            return 4
+        for corner in (0, 2, 6, 8):
+            if board[corner] == 0:
+                return corner
+        for i in range(9):
+            if board[i] == 0:
+                return i
+        return -1
+
+    def board_string(self):
+        """
+        @brief Board state as sent after the "BOARD:" prefix.
+        """
+        return "".join(str(cell) for cell in self.board)
+
+    def process_command(self, command):
+        """
+        @brief Process one trimmed command line, exactly like processCommand() on the board.
+        @param command The received command, optionally prefixed with "#<sequence> ".
+        """
+        self.reply_sequence = -1
+        if command.startswith("#"):
+            space = command.find(" ")
+            if space < 0:
+                return
+            self.reply_sequence = to_int(command[1:space])
+            command = command[space + 1:]
+
+        if command == "<test_connection/>":
+            if self.baud_deadline is not None:
+                self.confirmed_baud = self.baud
+                self.baud_deadline = None
+            self._send_ok("CONNECTION_OK")
+            return
+
+        if command == HANDSHAKE_BINARY:
+            self._send_line('<connection_ok binary="1"/>')
+            self.binary_mode = True
+            return
+
+        if command.startswith("MODE"):
+            self.current_mode = to_int(command[4:])
+            self.board = [0] * 9
+            self.is_first_player_turn = True
+            self.ai_game_running = False
+            self._send_ok("MODE_SET")
+            return
+
+        if command.startswith("MOVE"):
+            position = to_int(command[4:])
+            if position < 0 or position > 8 or self.board[position] != 0:
+                self._send_error("INVALID_MOVE")
+                return
+
+            if self.current_mode == MAN_VS_MAN:
+                self.board[position] = 1 if self.is_first_player_turn else 2
+                self.is_first_player_turn = not self.is_first_player_turn
+            else:
+                self.board[position] = 1
+
+            if self._report_if_finished():
+                return
+
+            if self.current_mode != MAN_VS_MAN:
+                ai_move = self.calculate_ai_move(2)
+                if ai_move >= 0:
+                    self.board[ai_move] = 2
+                    if self._report_if_finished():
+                        return
+
+            self._send_board("CONTINUE")
+            return
+
+        if command == "SAVE":
+            self._save_game()
+            self._send_ok("SAVED")
+            return
+
+        if command.startswith("LOAD"):
+            if len(command) == 4:
+                packed = self._read_saved_game()
+                if packed is None:
+                    self._send_error("NO_SAVE")
+                    return
+            elif len(command) != 4 + 2 * SNAPSHOT_SIZE or any(c not in "0123456789abcdefABCDEF"
+                                                             for c in command[4:]):
+                self._send_error("BAD_STATE")
+                return
+            else:
+                packed = int(command[4:], 16)
+            if not self._restore_snapshot(packed):
+                self._send_error("BAD_STATE")
+                return
+            if not self._report_if_finished():
+                self._send_board("CONTINUE")
+            return
+
+        if command.startswith("BAUD"):
+            rate = to_int(command[4:])
+            if rate not in BAUD_RATES:
+                self._send_error("BAD_BAUD")
+                return
+            self._send_ok("BAUD")
+            self._set_baud(rate)
+            self.baud_deadline = self.now + BAUD_CONFIRM_TIMEOUT
+            return
+
+        if command == "RESET":
+            self.board = [0] * 9
+            self.is_first_player_turn = True
+            self.ai_game_running = self.current_mode == AI_VS_AI
+            self._send_ok("RESET")
+            return
+
+    def feed(self, data, now=None):
+        """
+        @brief Deliver bytes received from the host.
+        @param data Received bytes; complete lines or frames are processed immediately.
+        @param now Time of arrival (time.monotonic() by default).
+        """
+        now = time.monotonic() if now is None else now
+        self.link_baud(now)
+        self._input += data
+        while self._input:
+            if self.binary_mode:
+                if not self._process_frame():
+                    break
+            else:
+                end = self._input.find(b"\n")
+                if end < 0:
+                    break
+                line = self._input[:end].decode(errors="replace").strip()
+                del self._input[:end + 1]
+                self.process_command(line)
+        self._schedule_ai(now)
+
+    def loop(self, now=None):
+        """
+        @brief Run one AI vs AI move pair if it is due.
+        @param now Current time (time.monotonic() by default).
+        @return True if a move pair was played.
+        """
+        now = time.monotonic() if now is None else now
+        self.link_baud(now)
+        self._schedule_ai(now)
+        if self.next_ai_time is None or now < self.next_ai_time:
+            return False
+        step_time = self.next_ai_time
+        self.next_ai_time = None
+        self._ai_step()
+        self._schedule_ai(step_time)
+        return True
+
+    def link_baud(self, now=None):
+        """
+        @brief Baud rate the board is listening at, after falling back from an unconfirmed switch.
+        @param now Current time (time.monotonic() by default).
+        @return Baud rate.
+        """
+        self.now = time.monotonic() if now is None else now
+        if self.baud_deadline is not None and self.now >= self.baud_deadline:
+            self.baud_deadline = None
+            self._set_baud(self.confirmed_baud)
+        return self.baud
+
+    def take_output(self):
+        """
+        @brief Drain the bytes the firmware has written to the serial port.
+        @return Pending output bytes.
+        """
+        output = bytes(self._output)
+        self._output.clear()
+        return output
+
+    def _ai_active(self):
+        return (self.current_mode == AI_VS_AI and self.ai_game_running
+                and not self.is_board_full() and self.check_winner() == 0)
+
+    def _schedule_ai(self, now):
+        if not self._ai_active():
+            self.next_ai_time = None
+        elif self.next_ai_time is None:
+            self.next_ai_time = now + self.ai_delay
+
+    def _ai_step(self):
+        self.reply_sequence = -1
+        for player in (1, 2):
+            ai_move = self.calculate_ai_move(player)
+            if ai_move < 0:
+                return
+            self.board[ai_move] = player
+            if self._report_if_finished():
+                self.ai_game_running = False
+                return
+        self._send_board("CONTINUE")
+
+    def _pack_snapshot(self):
+        packed = pack_board(self.board_string()) | (self.current_mode & 3) << 18
+        if self.is_first_player_turn:
+            packed |= 1 << 20
+        if self.ai_game_running:
+            packed |= 1 << 21
+        return packed
+
+    def _restore_snapshot(self, packed):
+        mode = (packed >> 18) & 3
+        if mode < MAN_VS_MAN or packed >> 22:
+            return False
+        cells = [(packed >> (2 * i)) & 3 for i in range(9)]
+        if 3 in cells:
+            return False
+        self.board = cells
+        self.current_mode = mode
+        self.is_first_player_turn = bool(packed >> 20 & 1)
+        self.ai_game_running = bool(packed >> 21 & 1)
+        return True
+
+    def _save_game(self):
+        data = bytes([SAVE_MAGIC]) + self._pack_snapshot().to_bytes(SNAPSHOT_SIZE, "little")
+        self.eeprom[SAVE_ADDRESS:SAVE_ADDRESS + len(data) + 1] = data + bytes([crc8(data)])
+
+    def _read_saved_game(self):
+        data = self.eeprom[SAVE_ADDRESS:SAVE_ADDRESS + SNAPSHOT_SIZE + 2]
+        if data[0] != SAVE_MAGIC or crc8(data[:-1]) != data[-1]:
+            return None
+        return int.from_bytes(data[1:-1], "little")
+
+    def _set_baud(self, rate):
+        # Serial.end() drops whatever the host sent at the old rate
+        self.baud = rate
+        self._input.clear()
+
+    def _report_if_finished(self):
+        winner = self.check_winner()
+        if winner > 0:
+            self._send_board("WIN", winner)
+            return True
+        if self.is_board_full():
+            self._send_board("DRAW")
+            return True
+        return False
+
+    def _process_frame(self):
+        length = self._input[0]
+        if length == 0 or length > MAX_FRAME_PAYLOAD:
+            # Not a frame: the host went back to the text protocol
+            del self._input[0]
+            self.binary_mode = False
+            return True
+        if len(self._input) < length + 2:
+            return False
+        frame = bytes(self._input[:length + 2])
+        del self._input[:length + 2]
+        if crc8(frame[:-1]) != frame[-1]:
+            self.reply_sequence = -1  # the sequence number of a corrupt frame cannot be trusted
+            self._send_error("BAD_FRAME")
+            return True
+        payload = frame[1:-1]
+        opcode = payload[0]
+        prefix = ""
+        if opcode & OP_SEQUENCE:
+            opcode &= ~OP_SEQUENCE
+            prefix = f"#{payload[-1]} "
+            payload = payload[:-1]
+        argument = payload[1] if len(payload) > 1 else 0
+        if opcode == OP_MODE:
+            self.process_command(f"{prefix}MODE{argument}")
+        elif opcode == OP_MOVE:
+            self.process_command(f"{prefix}MOVE{argument}")
+        elif opcode == OP_RESET:
+            self.process_command(f"{prefix}RESET")
+        elif opcode == OP_TEST_CONNECTION:
+            self.process_command(f"{prefix}<test_connection/>")
+        elif opcode == OP_SAVE:
+            self.process_command(f"{prefix}SAVE")
+        elif opcode == OP_LOAD:
+            # The snapshot travels little-endian; LOAD takes it as big-endian hex digits
+            count = min(max(len(payload) - 1, 0), SNAPSHOT_SIZE)
+            digits = "".join(f"{payload[count - i]:02X}" for i in range(count))
+            self.process_command(f"{prefix}LOAD{digits}")
+        return True
+
+    def _send_board(self, status, winner=0):
+        if self.binary_mode:
+            flags = (FRAME_BOARD << 6) | (winner << 2) | BOARD_STATUS.index(status)
+            self._send_frame(bytes([flags]) + pack_board(self.board_string()).to_bytes(3, "little"))
+        elif status == "WIN":
+            self._send_line("BOARD:" + self.board_string() + ":WIN:" + str(winner))
+        else:
+            self._send_line("BOARD:" + self.board_string() + ":" + status)
+
+    def _send_ok(self, code):
+        if self.binary_mode:
+            self._send_frame(bytes([FRAME_OK << 6, _code_of(OK_CODES, code)]))
+        elif code == "CONNECTION_OK":
+            self._send_line("<connection_ok/>")
+        else:
+            self._send_line("OK:" + code)
+
+    def _send_error(self, code):
+        if self.binary_mode:
+            self._send_frame(bytes([FRAME_ERR << 6, _code_of(ERR_CODES, code)]))
+        else:
+            self._send_line("ERR:" + code)
+
+    def _send_frame(self, payload):
+        if self.reply_sequence >= 0:
+            payload = bytes([payload[0] | SEQUENCE_FLAG]) + payload[1:] + bytes([self.reply_sequence & 0xFF])
+        self._output += encode_frame(payload)
+
+    def _send_line(self, text):
+        if self.reply_sequence >= 0:
+            text = f"#{self.reply_sequence} {text}"
+        self._println(text)
+
+    def _println(self, text):
+        self._output += (text + "\r\n").encode()
+
+
+class SimulatedSerial:
+    """
+    @ingroup client_side
+    @class SimulatedSerial
+    @brief In-process replacement for serial.Serial connected to a FirmwareEmulator.
+
+    Transfer times are modelled from the baud rate (10 bits per byte) plus an
+    optional per-byte latency, and reads block in real time until the
+    simulated bytes have "arrived". With max_baud set, the baud rate of the
+    host side (the baudrate attribute) must also match the board's, and not
+    exceed max_baud; bytes sent out of step are lost like bytes with framing
+    errors on a real UART.
+    """
+    def __init__(self, emulator=None, baudrate=9600, byte_latency=0.0, timeout=1, max_baud=None):
+        """
+        @brief Open a simulated connection.
+        @param emulator FirmwareEmulator to talk to; a new one is created by default.
+        @param baudrate Simulated link speed, or None for an instantaneous link.
+        @param byte_latency Additional delay per byte in seconds.
+        @param timeout Read timeout in seconds (None blocks forever).
+        @param max_baud Highest rate the simulated cable carries, or None to ignore baud rate mismatches.
+        """
+        self.emulator = emulator if emulator is not None else FirmwareEmulator()
+        self.port = "sim://tictactoe"
+        self.baudrate = baudrate
+        self.byte_latency = byte_latency
+        self.timeout = timeout
+        self.max_baud = max_baud
+        self.is_open = True
+        self.bytes_written = 0
+        self.bytes_read = 0
+        self.bytes_lost = 0
+        self._rx = bytearray()
+        self._pending = deque()
+        self._tx_busy = 0.0
+        self._rx_busy = 0.0
+
+    @property
+    def in_waiting(self):
+        """
+        @brief Number of bytes that have arrived and can be read without blocking.
+        """
+        self._pump(time.monotonic())
+        return len(self._rx)
+
+    def write(self, data):
+        """
+        @brief Send bytes to the simulated board.
+        @param data Bytes to send.
+        @return Number of bytes written.
+        """
+        data = bytes(data)
+        now = time.monotonic()
+        arrival = max(now, self._tx_busy) + len(data) * self._byte_time()
+        self._tx_busy = arrival
+        self._pump(arrival)
+        rate = self.emulator.link_baud(arrival)
+        if self._in_step(rate):
+            self.emulator.feed(data, arrival)
+        else:
+            self.bytes_lost += len(data)
+        self._schedule_output(arrival, rate)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def read(self, size=1):
+        """
+        @brief Read up to size bytes, waiting until they arrive or the timeout expires.
+        """
+        self._wait(lambda: len(self._rx) >= size)
+        return self._take(min(size, len(self._rx)))
+
+    def readline(self):
+        """
+        @brief Read one line including the terminator, or whatever arrived before the timeout.
+        """
+        self._wait(lambda: b"\n" in self._rx)
+        end = self._rx.find(b"\n")
+        return self._take(end + 1 if end >= 0 else len(self._rx))
+
+    def read_all(self):
+        """
+        @brief Read all bytes that have already arrived.
+        """
+        self._pump(time.monotonic())
+        return self._take(len(self._rx))
+
+    def reset_input_buffer(self):
+        """
+        @brief Discard all bytes that have already arrived.
+        """
+        self._pump(time.monotonic())
+        self._rx.clear()
+
+    def flush(self):
+        """
+        @brief Wait until all written bytes have been transferred.
+        """
+        delay = self._tx_busy - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def close(self):
+        """
+        @brief Close the simulated connection.
+        """
+        self.is_open = False
+
+    def _byte_time(self):
+        return byte_time(self.baudrate, self.byte_latency)
+
+    def _in_step(self, rate):
+        return self.max_baud is None or (rate == self.baudrate and rate <= self.max_baud)
+
+    def _schedule_output(self, start, rate):
+        output = self.emulator.take_output()
+        if output and not self._in_step(rate):
+            self.bytes_lost += len(output)
+        elif output:
+            done = max(start, self._rx_busy) + len(output) * self._byte_time()
+            self._rx_busy = done
+            self._pending.append((done, output))
+
+    def _pump(self, now):
+        while self.emulator.next_ai_time is not None and self.emulator.next_ai_time <= now:
+            step_time = self.emulator.next_ai_time
+            self.emulator.loop(step_time)
+            self._schedule_output(step_time, self.emulator.baud)
+        while self._pending and self._pending[0][0] <= now:
+            self._rx += self._pending.popleft()[1]
+
+    def _wait(self, ready):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            now = time.monotonic()
+            self._pump(now)
+            if ready():
+                return
+            events = [t for t in (self._pending[0][0] if self._pending else None,
+                                  self.emulator.next_ai_time) if t is not None]
+            wake = min(events) if events else None
+            if deadline is not None and (wake is None or wake > deadline):
+                if deadline > now:
+                    time.sleep(deadline - now)
+                    self._pump(deadline)
+                return
+            if wake is None:
+                time.sleep(0.01)
+            elif wake > now:
+                time.sleep(wake - now)
+
+    def _take(self, count):
+        data = bytes(self._rx[:count])
+        del self._rx[:count]
+        self.bytes_read += len(data)
+        return data
+
+
+class PtyDevice:
+    """
+    @ingroup client_side
+    @class PtyDevice
+    @brief Exposes a FirmwareEmulator on a pseudo-terminal (POSIX only).
+
+    Any program that opens the port name with serial.Serial, including main.py,
+    talks to the emulator as if it were a board on a USB serial port.
+    """
+    def __init__(self, emulator=None, baudrate=None, byte_latency=0.0):
+        """
+        @brief Create the device; call start() to open the pseudo-terminal.
+        @param emulator FirmwareEmulator to expose; a new one is created by default.
+        @param baudrate Simulated link speed used to pace replies, or None for no pacing.
+        @param byte_latency Additional delay per byte in seconds.
+        """
+        self.emulator = emulator if emulator is not None else FirmwareEmulator()
+        self.baudrate = baudrate
+        self.byte_latency = byte_latency
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """
+        @brief Open the pseudo-terminal and start serving commands.
+        @return The port name to connect to.
+        """
+        import tty
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        """
+        @brief Stop serving and close the pseudo-terminal.
+        """
+        self._running = False
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        while self._running:
+            timeout = 0.05
+            if self.emulator.next_ai_time is not None:
+                timeout = min(timeout, max(0.0, self.emulator.next_ai_time - time.monotonic()))
+            readable, _, _ = select.select([self._master], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self._master, 1024)
+                except OSError:
+                    data = b""
+                if data:
+                    self.emulator.feed(data)
+            self.emulator.loop()
+            output = self.emulator.take_output()
+            if output:
+                delay = len(output) * byte_time(self.baudrate, self.byte_latency)
+                if delay:
+                    time.sleep(delay)
+                os.write(self._master, output)
+
+
+def main():
+    """
+    @brief Command line entry point: serve a simulated board on a pseudo-terminal.
+    """
+    parser = argparse.ArgumentParser(description="Simulated Tic-Tac-Toe board on a pseudo-terminal.")
+    parser.add_argument('--baud', type=int, default=None,
+                        help="Simulated link speed used to pace replies (default: unlimited).")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Additional latency per byte in seconds.")
+    parser.add_argument('--ai-delay', type=float, default=1.0,
+                        help="Delay between AI vs AI move pairs in seconds.")
+    args = parser.parse_args()
+
+    device = PtyDevice(FirmwareEmulator(ai_delay=args.ai_delay), args.baud, args.latency)
+    port = device.start()
+    print(f"Simulated board listening on {port}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nSimulator stopped")
+    finally:
+        device.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+@file solver.py
+@ingroup client_side
+@brief Complete solution of Tic-Tac-Toe and the perfect-play move table built from it.
+
+Every position reachable from the empty board is solved once with negamax.
+The best move of each non-terminal position is stored under its canonical
+key (see board.canonical()), so the table only holds one entry per class of
+symmetric positions. Positions are seen from the player to move ("own" and
+"opponent" cells), so one table serves both X and O. Ties between equally
+good moves are broken deterministically: the firmware heuristic's choice if
+it is optimal, otherwise the lowest cell.
+
+Build step:
+
+    python solver.py --output perfect.bin --header ../Server-side/perfect_moves.h
+"""
+import argparse
+import bisect
+import struct
+
+from board import FREE_CELLS, FULL, INVERSE_SYMMETRIES, SYMMETRIES, WINNING, canonical
+from engine import greedy_move
+
+TABLE_MAGIC = b"TTT1"
+
+
+def reachable_positions():
+    """
+    @brief Every position reachable from the empty board in a game that stops at the first win.
+    @return Set of (x mask, o mask) tuples.
+    """
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if WINNING[x] or WINNING[o] or x | o == FULL:
+            continue
+        x_to_move = bin(x).count("1") == bin(o).count("1")
+        for i in FREE_CELLS[x | o]:
+            stack.append((x | 1 << i, o) if x_to_move else (x, o | 1 << i))
+    return seen
+
+
+def solve():
+    """
+    @brief Solve every position with the player to move to play.
+    @return Dictionary {(own, opponent): (score, move)}. The score is seen by the player
+            to move: positive wins, negative loses, 0 draws; a larger magnitude means
+            the game ends sooner. move is -1 for finished games.
+    """
+    solved = {}
+
+    def negamax(own, opp):
+        result = solved.get((own, opp))
+        if result is not None:
+            return result[0]
+        free = FREE_CELLS[own | opp]
+        if WINNING[opp]:
+            result = (-(1 + len(free)), -1)
+        elif not free:
+            result = (0, -1)
+        else:
+            scores = {i: -negamax(opp, own | 1 << i) for i in free}
+            best = max(scores.values())
+            preferred = greedy_move(own, opp)
+            move = preferred if scores[preferred] == best else min(i for i in free if scores[i] == best)
+            result = (best, move)
+        solved[(own, opp)] = result
+        return result[0]
+
+    negamax(0, 0)
+    return solved
+
+
+class MoveTable:
+    """
+    @ingroup client_side
+    @class MoveTable
+    @brief Perfect-play moves indexed by canonical position key.
+    """
+
+    def __init__(self, entries=None):
+        """
+        @brief Create a table.
+        @param entries Dictionary {canonical key: move in the canonical orientation}.
+        """
+        entries = entries or {}
+        self.keys = sorted(entries)
+        self.moves = [entries[key] for key in self.keys]
+        self._lookup = dict(entries)
+
+    @classmethod
+    def build(cls, solved=None):
+        """
+        @brief Build the table from the solution of the game.
+        @param solved Result of solve(); the game is solved if omitted.
+        @return MoveTable.
+        """
+        entries = {}
+        for (own, opp), (_, move) in (solved or solve()).items():
+            if move < 0:
+                continue
+            key, t = canonical(own, opp)
+            entries[key] = SYMMETRIES[t][move]
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def move(self, own, opp):
+        """
+        @brief Perfect move for the player to move.
+        @param own Mask of the cells owned by the player to move.
+        @param opp Mask of the cells owned by the opponent.
+        @return Index of the chosen cell, or -1 if the position is not in the table.
+        """
+        key, t = canonical(own, opp)
+        move = self._lookup.get(key)
+        if move is None:
+            return -1
+        return INVERSE_SYMMETRIES[t][move]
+
+    def save(self, path):
+        """
+        @brief Write the table in its compact binary form (3 bytes per entry).
+        @param path Output file.
+        """
+        with open(path, "wb") as f:
+            f.write(TABLE_MAGIC + struct.pack("<H", len(self.keys)))
+            for key, move in zip(self.keys, self.moves):
+                f.write(struct.pack("<HB", key, move))
+
+    @classmethod
+    def load(cls, path):
+        """
+        @brief Read a table written by save().
+        @param path Input file.
+        @return MoveTable.
+        @throws ValueError If the file is not a move table.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != TABLE_MAGIC:
+            raise ValueError(f"{path} is not a move table")
+        count, = struct.unpack_from("<H", data, 4)
+        entries = dict(struct.iter_unpack("<HB", data[6:6 + 3 * count]))
+        return cls(entries)
+
+    def lookup_sorted(self, key):
+        """
+        @brief Binary search in the sorted key array, as the firmware does in flash.
+        @param key Canonical key.
+        @return Move in the canonical orientation, or -1.
+        """
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.moves[i]
+        return -1
+
+    def export_header(self, path):
+        """
+        @brief Write the table as a C header with PROGMEM arrays for the firmware.
+        @param path Output file.
+        """
+        lines = [
+            "// Generated by Client-side/solver.py - do not edit.",
+            "// Perfect-play moves indexed by canonical base-3 position key",
+            "// (digit 1: cell of the player to move, digit 2: cell of the opponent).",
+            "#pragma once",
+            "#include <avr/pgmspace.h>",
+            "",
+            f"const uint16_t PERFECT_MOVE_COUNT = {len(self.keys)};",
+            "",
+            "const uint16_t PERFECT_KEYS[] PROGMEM = {",
+        ]
+        lines += _c_rows(self.keys, 12)
+        lines += ["};", "", "const uint8_t PERFECT_MOVES[] PROGMEM = {"]
+        lines += _c_rows(self.moves, 24)
+        lines += ["};", ""]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+
+def _c_rows(values, per_row):
+    return ["  " + ", ".join(str(v) for v in values[i:i + per_row]) + ","
+            for i in range(0, len(values), per_row)]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Solve Tic-Tac-Toe and write the perfect-play move table.")
+    parser.add_argument('--output', type=str, help="Binary table file to write.")
+    parser.add_argument('--header', type=str, help="C header with PROGMEM arrays to write.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    solved = solve()
+    table = MoveTable.build(solved)
+    print(f"{len(solved)} positions solved, {len(table)} canonical entries "
+          f"({3 * len(table)} bytes)")
+    if args.output:
+        table.save(args.output)
+        print(f"Table written to {args.output}")
+    if args.header:
+        table.export_header(args.header)
+        print(f"Header written to {args.header}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import unittest
+
+from board import FULL, WINNING
+from engine import greedy_move, perfect_move
+from solver import reachable_positions
+from tournament import run_match
+
+try:
+    import numpy as np
+    from batch import greedy_moves, perfect_moves, play_batch, play_batches, random_moves
+except ImportError:
+    np = None
+
+
+def open_positions():
+    """Every reachable position that is not over, from the side of both players, as (own, opp) arrays."""
+    positions = [(x, o) for x, o in reachable_positions() if not (WINNING[x] or WINNING[o] or x | o == FULL)]
+    own = [x for x, _ in positions] + [o for _, o in positions]
+    opp = [o for _, o in positions] + [x for x, _ in positions]
+    return np.array(own, dtype=np.int16), np.array(opp, dtype=np.int16)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchEngine(unittest.TestCase):
+    def test_greedy_matches_firmware(self):
+        """Test that the vectorized heuristic picks calculateAIMove()'s cell in every open position."""
+        own, opp = open_positions()
+        expected = [greedy_move(int(a), int(b)) for a, b in zip(own, opp)]
+        self.assertEqual(greedy_moves(own, opp).tolist(), expected)
+
+    def test_perfect_matches_the_move_table(self):
+        """Test that the dense perfect-play table agrees with engine.perfect_move()."""
+        own, opp = open_positions()
+        expected = [perfect_move(int(a), int(b)) for a, b in zip(own, opp)]
+        self.assertEqual(perfect_moves(own, opp).tolist(), expected)
+
+    def test_random_moves_pick_free_cells(self):
+        """Test that random moves only use empty cells and reach every one of them."""
+        own = np.full(9000, 0b101010101, dtype=np.int16)
+        opp = np.full(9000, 0b010000010, dtype=np.int16)
+        moves = random_moves(own, opp, np.random.default_rng(3))
+        self.assertEqual(sorted(set(moves.tolist())), [3, 5])
+
+    def test_outcomes(self):
+        """Test the outcome of every game of a batch and the totals of a series."""
+        self.assertEqual(play_batch(greedy_moves, greedy_moves, 100).tolist(), [0] * 100)
+        draws, x_wins, o_wins = play_batches(greedy_moves, random_moves, 10000, np.random.default_rng(1),
+                                             batch_size=3000)
+        self.assertEqual(draws + x_wins + o_wins, 10000)
+        self.assertEqual(o_wins, 0)
+        self.assertGreater(x_wins, 9000)
+
+    def test_seeded_batches_are_reproducible(self):
+        """Test that a seed fixes the outcome of every game."""
+        first = play_batch(random_moves, random_moves, 5000, np.random.default_rng(7))
+        second = play_batch(random_moves, random_moves, 5000, np.random.default_rng(7))
+        self.assertEqual(first.tolist(), second.tolist())
+
+    def test_tournament_batch_match(self):
+        """Test that a tournament match can be played by the batch engine."""
+        result = run_match("random", "perfect", 20000, seed=1, batch=True)
+        self.assertEqual(result["x_wins"], 0)
+        self.assertEqual(result["o_wins"] + result["draws"], 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
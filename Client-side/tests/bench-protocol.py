@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Latency and throughput benchmark for the command/response serial protocol.
+
+Drives MODE/RESET/MOVE round trips against the firmware simulator (or a real
+board with --port) at every baud rate offered by the client and appends the
+results to results/bench_results.json.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import serial
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import summarize  # noqa: E402
+from protocol import BAUD_RATES, HANDSHAKE_BINARY, BinaryCodec, TextCodec  # noqa: E402
+from simulator import FirmwareEmulator, SimulatedSerial  # noqa: E402
+
+
+def workload():
+    """
+    Endless command stream: alternate Man vs Man and Man vs AI games, always
+    playing the first free cell. The generator receives the reply of the
+    previous command.
+    """
+    while True:
+        for mode in (1, 2):
+            yield f"MODE{mode}"
+            yield "RESET"
+            board = "000000000"
+            while True:
+                response = yield f"MOVE{board.index('0')}"
+                if response is None or response.kind != "BOARD" or response.status != "CONTINUE":
+                    break
+                board = response.board
+
+
+class ProtocolBenchmark:
+    """Run a number of round trips over one connection and collect the measurements."""
+
+    def __init__(self, connection, codec):
+        self.connection = connection
+        self.codec = codec
+        self.latencies = {}
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.timeouts = 0
+
+    def round_trip(self, command):
+        data = self.codec.encode_command(command)
+        start = time.perf_counter()
+        self.connection.write(data)
+        responses = []
+        while not responses:
+            chunk = self.connection.read(max(1, self.connection.in_waiting))
+            if not chunk:
+                break
+            self.bytes_in += len(chunk)
+            responses = self.codec.feed(chunk)
+        elapsed = time.perf_counter() - start
+        self.bytes_out += len(data)
+        if not responses:
+            self.timeouts += 1
+            return None
+        self.latencies.setdefault(command.rstrip("0123456789"), []).append(elapsed)
+        return responses[-1]
+
+    def run(self, count):
+        commands = workload()
+        command = next(commands)
+        start = time.perf_counter()
+        for _ in range(count):
+            response = self.round_trip(command)
+            command = commands.send(response)
+        duration = time.perf_counter() - start
+
+        all_samples = [sample for samples in self.latencies.values() for sample in samples]
+        return {
+            "commands": count,
+            "duration_s": round(duration, 3),
+            "commands_per_s": round(count / duration, 1) if duration else 0.0,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "bytes_per_command": round((self.bytes_out + self.bytes_in) / count, 1),
+            "timeouts": self.timeouts,
+            "latency_ms": summarize(all_samples),
+            "by_command": {name: summarize(samples) for name, samples in sorted(self.latencies.items())},
+        }
+
+
+def open_connection(args, baud):
+    if args.port:
+        conn = serial.Serial(args.port, baud, timeout=args.timeout)
+        time.sleep(2)  # Allow Arduino to reset
+        conn.reset_input_buffer()
+    else:
+        conn = SimulatedSerial(FirmwareEmulator(), baudrate=baud, byte_latency=args.latency,
+                               timeout=args.timeout)
+    if args.protocol == "text":
+        return conn, TextCodec()
+
+    conn.write((HANDSHAKE_BINARY + "\n").encode())
+    if b'binary="1"' not in conn.readline():
+        conn.close()
+        raise RuntimeError("The board did not accept the binary protocol")
+    return conn, BinaryCodec()
+
+
+def write_results(path, run):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    history = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                history = json.load(f)
+            except ValueError:
+                history = []
+    history.append(run)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=4)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the Tic-Tac-Toe serial protocol.")
+    parser.add_argument('--count', type=int, default=2000, help="Round trips per baud rate.")
+    parser.add_argument('--bauds', type=int, nargs='+', default=BAUD_RATES, help="Baud rates to measure.")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Simulated additional latency per byte in seconds.")
+    parser.add_argument('--timeout', type=float, default=1.0, help="Reply timeout in seconds.")
+    parser.add_argument('--protocol', choices=['text', 'binary'], default='text',
+                        help="Serial protocol to benchmark.")
+    parser.add_argument('--port', type=str, help="Benchmark a real board instead of the simulator.")
+    parser.add_argument('--output', type=str, default="results/bench_results.json",
+                        help="JSON file the results are appended to.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    run = {
+        "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "target": args.port or "simulator",
+        "protocol": args.protocol,
+        "byte_latency_s": args.latency,
+        "results": [],
+    }
+    for baud in args.bauds:
+        conn, codec = open_connection(args, baud)
+        try:
+            result = ProtocolBenchmark(conn, codec).run(args.count)
+        finally:
+            conn.close()
+        result["baud_rate"] = baud
+        run["results"].append(result)
+        latency = result["latency_ms"]
+        print(f"{baud:>6} baud: {result['commands_per_s']:>8.1f} cmd/s  "
+              f"p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  p99 {latency['p99']:.2f} ms  "
+              f"{result['bytes_per_command']:.1f} B/cmd  timeouts {result['timeouts']}")
+    write_results(args.output, run)
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import unittest
+
+from board import WINNING, Board, iter_cells
+
+
+class TestBoard(unittest.TestCase):
+    def test_string_round_trip(self):
+        """Test conversion from and to the protocol form."""
+        board = Board.from_string("120010200")
+        self.assertEqual((board.x, board.o), (0b000010001, 0b001000010))
+        self.assertEqual(board.to_string(), "120010200")
+        self.assertEqual([board.cell(i) for i in range(3)], [1, 2, 0])
+
+    def test_winning_table(self):
+        """Test the win lookup against a few hand-made positions."""
+        self.assertTrue(WINNING[0b000000111])
+        self.assertTrue(WINNING[0b100010001 | 0b000000010])
+        self.assertFalse(WINNING[0b000011011])
+
+    def test_winner_and_draw(self):
+        """Test win and draw detection."""
+        self.assertEqual(Board.from_string("111220000").winner(), 1)
+        self.assertEqual(Board.from_string("120120000").winner(), 0)
+        self.assertEqual(Board.from_string("210120012").winner(), 2)
+        draw = Board.from_string("121122211")
+        self.assertEqual(draw.winner(), 0)
+        self.assertTrue(draw.is_full() and draw.is_over())
+        self.assertFalse(Board().is_over())
+
+    def test_moves(self):
+        """Test move generation, turn order and playing a move."""
+        board = Board.from_string("100020000")
+        self.assertEqual(board.free_cells(), (1, 2, 3, 5, 6, 7, 8))
+        self.assertEqual(board.to_move(), 1)
+        self.assertEqual(board.play(8, 1).to_string(), "100020001")
+        self.assertEqual(board.play(8, 1).to_move(), 2)
+
+    def test_diff(self):
+        """Test that only changed cells are reported."""
+        before = Board.from_string("100020000")
+        after = Board.from_string("100020201")
+        self.assertEqual(after.diff(before), (6, 8))
+        self.assertEqual(Board().diff(after), (0, 4, 6, 8))
+        self.assertEqual(after.diff(after), ())
+
+    def test_iter_cells(self):
+        """Test iterating over the bits of a mask."""
+        self.assertEqual(list(iter_cells(0b100010001)), [0, 4, 8])
+        self.assertEqual(list(iter_cells(0)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
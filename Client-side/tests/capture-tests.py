@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from capture import IN, OPENED, OUT, PROTOCOL, Chunk, SerialCapture, analyze, read_capture
+from pipeline import CommandPipeline, negotiate_codec
+from protocol import BinaryCodec, TextCodec
+from simulator import SimulatedSerial
+
+
+def play(capture, protocol):
+    """Open a captured session, send a few commands and wait for every reply."""
+    capture.opened("/dev/ttyUSB0")
+    conn = capture.wrap(SimulatedSerial(baudrate=None, timeout=0.5))
+    codec = negotiate_codec(conn, protocol, timeout=0.5)
+    capture.negotiated(codec.name)
+    pipeline = CommandPipeline(conn, codec, window=2, timeout=0.5)
+    pipeline.negotiate()
+    for command in ("MODE1", "RESET", "MOVE0", "MOVE4", "MOVE4"):
+        pipeline.submit(command)
+    while pipeline.busy:
+        pipeline.read()
+    return codec
+
+
+class TestSerialCapture(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "serial.ttc")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_text_session_is_reconstructed(self):
+        """Test that every command of a text session is paired with its reply."""
+        capture = SerialCapture(self.path)
+        play(capture, "text")
+        capture.save()
+        chunks, dropped = read_capture(self.path)
+        self.assertEqual(dropped, 0)
+        result = analyze(chunks)
+        self.assertEqual(result["sessions"], 1)
+        self.assertEqual([(pair["command"], pair["reply"].split(" ", 1)[-1]) for pair in result["pairs"]][-5:],
+                         [("MODE1", "OK:MODE_SET"), ("RESET", "OK:RESET"), ("MOVE0", "BOARD:100000000:CONTINUE"),
+                          ("MOVE4", "BOARD:100020000:CONTINUE"), ("MOVE4", "ERR:INVALID_MOVE")])
+        self.assertEqual(result["latency"]["MOVE"]["count"], 3)
+        self.assertEqual(result["malformed"], [])
+        self.assertEqual(result["timeouts"], [])
+
+    def test_binary_session_is_reconstructed(self):
+        """Test that binary frames are decoded after the protocol marker."""
+        capture = SerialCapture(self.path)
+        self.assertIsInstance(play(capture, "binary"), BinaryCodec)
+        capture.save()
+        result = analyze(read_capture(self.path)[0])
+        self.assertEqual([pair["command"] for pair in result["pairs"]][-5:],
+                         ["MODE1", "RESET", "MOVE0", "MOVE4", "MOVE4"])
+        self.assertEqual(result["pairs"][-1]["reply"].split(" ", 1)[-1], "ERR:INVALID_MOVE")
+
+    def test_ring_buffer_keeps_the_session_markers(self):
+        """Test that the oldest chunks are dropped but the port and protocol markers are kept."""
+        capture = SerialCapture(self.path, max_size=200)
+        play(capture, "binary")
+        self.assertLessEqual(capture.size, 200)
+        self.assertGreater(capture.dropped, 0)
+        capture.save()
+        chunks, dropped = read_capture(self.path)
+        self.assertEqual(dropped, capture.dropped)
+        self.assertEqual([chunk.direction for chunk in chunks[:2]], [OPENED, PROTOCOL])
+        self.assertEqual(analyze(chunks)["pairs"][-1]["command"], "MOVE4")
+
+    def test_malformed_frames_and_timeouts_are_flagged(self):
+        """Test the flags for a bad BOARD frame, a late reply and a lost command."""
+        chunks = [
+            Chunk(0.0, OPENED, b"COM3"),
+            Chunk(1.0, OUT, b"#1 MOVE4\n#2 MOVE5\n#3 RESET\n"),
+            Chunk(1.1, IN, b"#1 BOARD:10002x000:CONTINUE\n"),
+            Chunk(3.5, IN, b"#3 OK:RESET\n"),
+            Chunk(4.0, IN, b"BOARD:100020000:CONTINUE\n"),
+        ]
+        result = analyze(chunks, timeout=1.0)
+        self.assertEqual(result["malformed"], [{"time": 1.1, "raw": "#1 BOARD:10002x000:CONTINUE"}])
+        self.assertEqual([(entry["command"], entry["reason"]) for entry in result["timeouts"]],
+                         [("MOVE5", "no reply"), ("RESET", "reply after 2.500 s")])
+        self.assertEqual(result["unsolicited"], 1)
+
+    def test_unknown_board_status_is_malformed(self):
+        """Test that a BOARD reply with a garbled status is flagged even though its cells parse."""
+        chunks = [
+            Chunk(0.0, OPENED, b"COM3"),
+            Chunk(1.0, OUT, b"#1 MOVE4\n"),
+            Chunk(1.1, IN, b"#1 BOARD:000010000:CONTINXE\n"),
+        ]
+        result = analyze(chunks)
+        self.assertEqual(result["malformed"], [{"time": 1.1, "raw": "#1 BOARD:000010000:CONTINXE"}])
+        self.assertEqual(len(result["pairs"]), 1)
+
+    def test_rejects_other_files(self):
+        """Test that a file without the capture header is refused."""
+        with open(self.path, "wb") as f:
+            f.write(b"TTR1\x13\x00")
+        with self.assertRaises(ValueError):
+            read_capture(self.path)
+
+    def test_wrapper_behaves_like_the_connection(self):
+        """Test that the wrapper forwards attributes and baud rate changes."""
+        capture = SerialCapture(self.path)
+        conn = capture.wrap(SimulatedSerial(baudrate=9600, timeout=0.1))
+        conn.baudrate = 19200
+        self.assertEqual(conn.baudrate, 19200)
+        self.assertEqual(conn.in_waiting, 0)
+        conn.write(b"<test_connection/>\n")
+        self.assertEqual(TextCodec().feed(conn.read(64))[0].kind, "CONNECTION_OK")
+        self.assertEqual([chunk.direction for chunk in capture.chunks], [OUT, IN])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Make the client modules (protocol.py, ...) importable from the tests.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,134 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from board import FREE_CELLS, WINNING, Board
+from engine import STRATEGIES, Player, greedy_move, play_game, play_games, random_move
+from protocol import Response
+from simulator import FirmwareEmulator
+from tournament import run_match
+
+try:
+    from PyQt5.QtWidgets import QApplication
+    import main
+except ImportError:
+    main = None
+
+
+def reachable_positions():
+    """Every position reachable in a game that stops at the first win, as (x mask, o mask, X to move)."""
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if WINNING[x] or WINNING[o] or x | o == 0x1FF:
+            continue
+        x_to_move = bin(x).count("1") == bin(o).count("1")
+        for i in FREE_CELLS[x | o]:
+            stack.append((x | 1 << i, o) if x_to_move else (x, o | 1 << i))
+    return seen
+
+
+class TestEngine(unittest.TestCase):
+    def test_greedy_matches_firmware(self):
+        """Test that greedy_move picks the same cell as calculateAIMove() in every reachable position."""
+        emulator = FirmwareEmulator()
+        positions = reachable_positions()
+        self.assertEqual(len(positions), 5478)
+        for x, o in positions:
+            if WINNING[x] or WINNING[o] or x | o == 0x1FF:
+                continue
+            emulator.board = [1 if x >> i & 1 else 2 if o >> i & 1 else 0 for i in range(9)]
+            for player, own, opp in ((1, x, o), (2, o, x)):
+                self.assertEqual(greedy_move(own, opp), emulator.calculate_ai_move(player))
+
+    def test_random_move_picks_free_cell(self):
+        """Test that random moves only use empty cells."""
+        rng = random.Random(3)
+        for _ in range(100):
+            self.assertIn(random_move(0b101010101, 0b010000010, rng), (3, 5))
+
+    def test_greedy_self_play_is_a_draw(self):
+        """Test that the firmware heuristic draws against itself."""
+        self.assertEqual(play_game(greedy_move, greedy_move), 0)
+
+    def test_seeded_runs_are_reproducible(self):
+        """Test that a seed fixes the outcome of a series."""
+        first = play_games(random_move, random_move, 500, random.Random(7))
+        second = play_games(random_move, random_move, 500, random.Random(7))
+        self.assertEqual(first, second)
+        self.assertEqual(sum(first), 500)
+
+    def test_players_time_their_moves(self):
+        """Test that a Player plays legal moves for its side and records the compute time of each."""
+        board = Board()
+        players = {1: Player("random", seed=1), 2: Player("search")}
+        while not board.is_over():
+            side = board.to_move()
+            move = players[side].move(board, side)
+            self.assertIn(move, board.free_cells())
+            board = board.play(move, side)
+        self.assertNotEqual(board.winner(), 1)
+        self.assertEqual(players[1].moves + players[2].moves, bin(board.occupied).count("1"))
+        self.assertGreater(players[2].total_time, 0.0)
+        self.assertGreaterEqual(players[2].max_time, players[2].last_time)
+        self.assertTrue(players[2].timing().startswith(f"search: {players[2].moves} moves"))
+
+    def test_seeded_players_are_reproducible(self):
+        """Test that two random players with the same seed choose the same moves."""
+        first, second = Player("random", seed=5), Player("random", seed=5)
+        board = Board.from_string("120000000")
+        self.assertEqual([first.move(board, 1) for _ in range(20)], [second.move(board, 1) for _ in range(20)])
+        with self.assertRaises(KeyError):
+            Player("unknown")
+        self.assertEqual(Player("greedy").strategy, STRATEGIES["greedy"])
+
+    def test_run_match_statistics(self):
+        """Test the tournament summary."""
+        result = run_match("greedy", "random", 1000, seed=1)
+        self.assertEqual(result["x_wins"] + result["o_wins"] + result["draws"], 1000)
+        self.assertEqual(result["o_wins"], 0)
+
+
+@unittest.skipIf(main is None, "PyQt5 is not installed")
+class TestHostMoves(unittest.TestCase):
+    def setUp(self):
+        """Create the window offscreen in a scratch directory, with the client playing X."""
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        self.app = QApplication.instance() or QApplication([])
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(main.__file__), "tiktaktoe.ini"),
+                    os.path.join(self.directory, "tictactoe.ini"))
+        os.chdir(self.directory)
+        self.gui = main.TicTacToeGUI()
+        self.worker = MagicMock(port="COM3", negotiated_baud=9600)
+        self.gui.serial_worker = self.worker
+        self.gui.players = {1: Player("greedy")}
+        self.gui.game_active = True
+
+    def tearDown(self):
+        self.gui.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def test_lost_reply_does_not_stall_the_client_side(self):
+        """Test that the next host move is played after the board's reply to the last one was lost."""
+        self.gui.play_host_move()
+        self.assertEqual([call.args[0] for call in self.worker.send.call_args_list], ["MOVE4"])
+        self.gui.handle_response("MOVE4", Response("TIMEOUT", ""))
+        self.assertFalse(self.gui.move_pending)
+        self.assertTrue(self.gui.host_move_timer.isActive())
+        self.assertEqual(self.gui.results_list.item(0).text(), "No reply to MOVE4")
+        self.gui.play_host_move()
+        self.assertEqual([call.args[0] for call in self.worker.send.call_args_list], ["MOVE4", "MOVE4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
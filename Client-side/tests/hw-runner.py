@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel runner for the hardware test suite.
+
+Discovers every attached board (or takes --ports), runs TestTicTacToeHardware
+from hw-tests.py against all of them at once with one worker process per
+port, and merges the per-board results into one report in the JsonLogger
+format (a list of {"level", "message", "timestamp"} entries, each tagged with
+its "port"). With --simulate N the suite runs against N emulated boards on
+pseudo-terminals instead.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pool import discover_ports  # noqa: E402
+
+HW_TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hw-tests.py")
+
+
+def load_suite_class():
+    """Import TestTicTacToeHardware from hw-tests.py (the file name is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location("hw_tests", HW_TESTS)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.TestTicTacToeHardware
+
+
+def timestamp():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class LoggingResult(unittest.TextTestResult):
+    """Test result that also records every outcome as a JsonLogger entry."""
+
+    def __init__(self, stream, descriptions, verbosity, port=None):
+        super().__init__(stream, descriptions, verbosity)
+        self.port = port
+        self.logs = []
+
+    def _log(self, level, message):
+        self.logs.append({"level": level, "message": message, "timestamp": timestamp(), "port": self.port})
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._log("INFO", f"Starting test method: {test._testMethodName}")
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._log("INFO", f"{test._testMethodName} passed")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._log("ERROR", f"{test._testMethodName} failed: {err[1]}")
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._log("ERROR", f"{test._testMethodName} raised {err[0].__name__}: {err[1]}")
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._log("WARNING", f"{test._testMethodName} skipped: {reason}")
+
+
+def run_suite(port, baudrate):
+    """Run the hardware suite against one port; executed in a worker process."""
+    suite_class = load_suite_class()
+    suite_class.port = port
+    suite_class.baudrate = baudrate
+    stream = io.StringIO()
+    runner = unittest.TextTestRunner(stream=stream, verbosity=0,
+                                     resultclass=lambda *args: LoggingResult(*args, port=port))
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stream):
+        result = runner.run(unittest.defaultTestLoader.loadTestsFromTestCase(suite_class))
+    return {
+        "port": port,
+        "tests_run": result.testsRun,
+        "failures": len(result.failures),
+        "errors": len(result.errors),
+        "skipped": len(result.skipped),
+        "duration_s": round(time.perf_counter() - start, 3),
+        "logs": result.logs,
+        "output": stream.getvalue(),
+    }
+
+
+def run_all(ports, baudrate, workers=None):
+    """Run the suite on every port in parallel and return the per-board results in port order."""
+    if not ports:
+        return []
+    with ProcessPoolExecutor(max_workers=workers or len(ports)) as executor:
+        futures = [executor.submit(run_suite, port, baudrate) for port in ports]
+        return [future.result() for future in futures]
+
+
+def merge_logs(results):
+    """Merge the per-board logs into one JsonLogger-style list, with a summary entry per board."""
+    merged = []
+    for result in results:
+        merged.extend(result["logs"])
+        passed = result["tests_run"] - result["failures"] - result["errors"] - result["skipped"]
+        level = "ERROR" if failed(result) else "INFO"
+        merged.append({
+            "level": level,
+            "message": f"{result['port']}: {passed}/{result['tests_run']} passed, {result['failures']} failed, "
+                       f"{result['errors']} errors, {result['skipped']} skipped in {result['duration_s']} s",
+            "timestamp": timestamp(),
+            "port": result["port"],
+        })
+    return merged
+
+
+def failed(result):
+    """A board fails if any test failed or errored, or if it never answered (every test skipped)."""
+    return bool(result["failures"] or result["errors"] or result["skipped"] == result["tests_run"])
+
+
+def write_report(path, logs):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(logs, f, ensure_ascii=False, indent=4)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run the hardware tests on every attached board in parallel.")
+    parser.add_argument('--ports', type=str, nargs='+', help="Ports to test (default: every attached port).")
+    parser.add_argument('--baudrate', type=int, default=9600, help="Baud rate of the boards.")
+    parser.add_argument('--workers', type=int, help="Maximum number of boards tested at once.")
+    parser.add_argument('--simulate', type=int, metavar='N', help="Test N emulated boards instead of hardware.")
+    parser.add_argument('--output', type=str, default="results/hw_results.json", help="Merged JSON report.")
+    parser.add_argument('--verbose', action='store_true', help="Print the output of every board's run.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    devices = []
+    if args.simulate:
+        from simulator import PtyDevice
+        devices = [PtyDevice() for _ in range(args.simulate)]
+        for device in devices:
+            device.start()
+        ports = [device.port for device in devices]
+    else:
+        ports = args.ports or discover_ports()
+    if not ports:
+        print("No boards found. Skipping tests.")
+        return 0
+
+    try:
+        start = time.perf_counter()
+        results = run_all(ports, args.baudrate, args.workers)
+        duration = time.perf_counter() - start
+    finally:
+        for device in devices:
+            device.stop()
+
+    write_report(args.output, merge_logs(results))
+    for result in results:
+        if args.verbose or failed(result):
+            print(f"--- {result['port']} ---\n{result['output']}")
+    for result in results:
+        status = "FAIL" if failed(result) else "ok"
+        print(f"{result['port']:<20} {status:<5} {result['tests_run']} tests, {result['failures']} failures, "
+              f"{result['errors']} errors, {result['skipped']} skipped ({result['duration_s']} s)")
+    print(f"{len(results)} boards in {duration:.1f} s; report written to {args.output}")
+    return 1 if any(failed(result) for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
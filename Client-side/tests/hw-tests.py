@@ -13,19 +13,40 @@ import sys
 class TestTicTacToeHardware(unittest.TestCase):
     """Unit tests for the Arduino-based Tic-Tac-Toe game"""
 
+    STARTUP_TIMEOUT = 5
+    PROBE_INTERVAL = 0.25
+
     @classmethod
     def setUpClass(cls):
         """Initialize the serial connection to Arduino"""
         if not hasattr(cls, 'port') or not hasattr(cls, 'baudrate'):
             raise ValueError("Port and baudrate must be provided to run the tests.")
 
+        cls.serial_connection = None
         try:
-            cls.serial_connection = serial.Serial(port=cls.port, baudrate=cls.baudrate, timeout=3)
-            time.sleep(2)  # Allow Arduino to reset
+            connection = serial.Serial(port=cls.port, baudrate=cls.baudrate, timeout=3)
+            if not cls.wait_until_ready(connection):
+                connection.close()
+                raise serial.SerialException("The board did not answer the connection test")
+            cls.serial_connection = connection
             print(f"Connected to Arduino on port {cls.port} at {cls.baudrate} baud.")
         except serial.SerialException as e:
             print(f"Unable to connect to the specified serial port: {cls.port}. Tests will be skipped.\n{e}")
-            cls.serial_connection = None
+
+    @classmethod
+    def wait_until_ready(cls, connection):
+        """Probe the board until it answers; the Arduino resets when the port is opened"""
+        connection.timeout = cls.PROBE_INTERVAL
+        deadline = time.monotonic() + cls.STARTUP_TIMEOUT
+        try:
+            while time.monotonic() < deadline:
+                connection.write(b"<test_connection/>\n")
+                if b"<connection_ok/>" in connection.readline():
+                    connection.reset_input_buffer()
+                    return True
+            return False
+        finally:
+            connection.timeout = 3
 
     @classmethod
     def tearDownClass(cls):
@@ -38,13 +59,14 @@ class TestTicTacToeHardware(unittest.TestCase):
         """Skip tests if the serial connection is not established"""
         if not self.__class__.serial_connection:
             self.skipTest("Arduino is not connected. Skipping test.")
+        self.send_command("MODE1")  # Start from a mode without unsolicited AI moves
 
     def send_command(self, command):
-        """Send a command to Arduino and read the response"""
+        """Send a command to Arduino and read the response line (or time out)"""
         try:
+            self.serial_connection.reset_input_buffer()
             self.serial_connection.write((command + '\n').encode('utf-8'))
-            time.sleep(0.5)
-            response = self.serial_connection.read_all().decode('utf-8').strip()
+            response = self.serial_connection.readline().decode('utf-8').strip()
             print(f"Sent: {command}, Received: {response}")
             return response
         except Exception as e:
@@ -66,11 +88,7 @@ class TestTicTacToeHardware(unittest.TestCase):
         self.send_command("RESET")  # Ensure the board is reset
         self.serial_connection.reset_input_buffer()  # Clear input buffer
 
-        self.send_command("MOVE0")
-        time.sleep(1)  # Wait after command
-        response = self.serial_connection.read_all().decode('utf-8').strip()
-
-        print(f"Response after MOVE0: {response}")
+        response = self.send_command("MOVE0")
         self.assertIn("BOARD:", response, "Valid move did not update the board.")
         self.assertIn(":CONTINUE", response, "Game did not continue after a valid move.")
 
@@ -110,6 +128,30 @@ class TestTicTacToeHardware(unittest.TestCase):
         self.assertIn("BOARD:", response, "AI move did not update the board.")
         self.assertIn(":CONTINUE", response, "Game did not continue after AI move.")
 
+    def test_save_and_load(self):
+        """Test saving a game to EEPROM and restoring it, from EEPROM and from a pushed snapshot"""
+        self.send_command("RESET")
+        self.send_command("MOVE4")
+        self.assertEqual(self.send_command("SAVE"), "OK:SAVED")
+        self.send_command("RESET")
+        self.assertEqual(self.send_command("LOAD"), "BOARD:000010000:CONTINUE")
+        self.assertEqual(self.send_command("LOAD140040"), "BOARD:000100000:CONTINUE")
+        self.assertEqual(self.send_command("LOAD100000"), "ERR:BAD_STATE")
+
+    def test_baud_switch(self):
+        """Test switching the baud rate, confirming it and falling back when it is not confirmed"""
+        self.assertEqual(self.send_command("BAUD300"), "ERR:BAD_BAUD")
+        rate = 38400 if self.baudrate != 38400 else 19200
+        self.assertEqual(self.send_command(f"BAUD{rate}"), "OK:BAUD")
+        self.serial_connection.baudrate = rate
+        self.assertEqual(self.send_command("<test_connection/>"), "<connection_ok/>")
+        self.assertEqual(self.send_command(f"BAUD{self.baudrate}"), "OK:BAUD")
+        self.serial_connection.baudrate = self.baudrate
+        self.assertEqual(self.send_command("<test_connection/>"), "<connection_ok/>")
+        self.assertEqual(self.send_command(f"BAUD{rate}"), "OK:BAUD")
+        time.sleep(1.5)  # Never confirmed: the board goes back to the previous rate
+        self.assertEqual(self.send_command("<test_connection/>"), "<connection_ok/>")
+
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Unit tests for the Arduino-based Tic-Tac-Toe game.")
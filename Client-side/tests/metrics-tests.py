@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+
+from metrics import Metrics, command_kind
+from pipeline import CommandPipeline
+from protocol import TextCodec
+from simulator import SimulatedSerial
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_counters_are_kept_per_label(self):
+        """Test that samples with different labels are counted apart."""
+        self.metrics.count("serial_bytes_total", 10, direction="out")
+        self.metrics.count("serial_bytes_total", 5, direction="out")
+        self.metrics.count("serial_bytes_total", 7, direction="in")
+        samples = self.metrics.snapshot()["serial_bytes_total"]["samples"]
+        self.assertEqual({s["labels"]["direction"]: s["value"] for s in samples}, {"in": 7, "out": 15})
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test the bucket counts, sum and count of a histogram."""
+        for value in (0.0004, 0.003, 0.003, 5.0):
+            self.metrics.observe("command_rtt_seconds", value, command="MOVE")
+        sample = self.metrics.snapshot()["command_rtt_seconds"]["samples"][0]
+        self.assertEqual(sample["buckets"]["0.0005"], 1)
+        self.assertEqual(sample["buckets"]["0.0025"], 1)
+        self.assertEqual(sample["buckets"]["0.005"], 3)
+        self.assertEqual(sample["buckets"]["2.5"], 3)
+        self.assertEqual(sample["buckets"]["+Inf"], 4)
+        self.assertEqual(sample["count"], 4)
+        self.assertAlmostEqual(sample["sum"], 5.0064)
+
+    def test_undeclared_or_mistyped_metric_is_rejected(self):
+        """Test that only declared metrics can be updated, and only as their type."""
+        with self.assertRaises(KeyError):
+            self.metrics.count("no_such_metric")
+        with self.assertRaises(KeyError):
+            self.metrics.observe("exceptions_total", 1.0)
+
+    def test_prometheus_text(self):
+        """Test the Prometheus exposition format, including escaped label values."""
+        self.metrics.count("exceptions_total", site='say "hi"')
+        self.metrics.observe("render_seconds", 0.0002)
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE exceptions_total counter\n", text)
+        self.assertIn('exceptions_total{site="say \\"hi\\""} 1\n', text)
+        self.assertIn('render_seconds_bucket{le="0.00025"} 1\n', text)
+        self.assertIn('render_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("render_seconds_count 1\n", text)
+
+    def test_write_json(self):
+        """Test that a JSON snapshot is written and the temporary file is gone."""
+        self.metrics.set("reconnects", 2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            self.metrics.write(path, "json")
+            with open(path) as f:
+                snapshot = json.load(f)
+            self.assertEqual(os.listdir(directory), ["metrics.json"])
+        self.assertEqual(snapshot["reconnects"]["samples"], [{"labels": {}, "value": 2}])
+        with self.assertRaises(ValueError):
+            self.metrics.write(path, "xml")
+
+    def test_command_kind(self):
+        """Test the command type used as a label."""
+        self.assertEqual(command_kind("MOVE4"), "MOVE")
+        self.assertEqual(command_kind("LOAD120000000"), "LOAD")
+        self.assertEqual(command_kind("<test_connection/>"), "TEST_CONNECTION")
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    def test_pipeline_reports_traffic_and_latency(self):
+        """Test that a pipeline counts its bytes and commands and times every round trip."""
+        metrics = Metrics()
+        conn = SimulatedSerial(baudrate=None, timeout=0.5)
+        pipeline = CommandPipeline(conn, TextCodec(), window=2, timeout=0.5, metrics=metrics)
+        pipeline.negotiate()
+        for command in ("MODE1", "MOVE0", "MOVE4"):
+            pipeline.submit(command)
+        while pipeline.busy:
+            pipeline.read()
+        snapshot = metrics.snapshot()
+        commands = {s["labels"]["command"]: s["value"] for s in snapshot["commands_total"]["samples"]}
+        self.assertEqual(commands, {"MODE": 1, "MOVE": 2})
+        rtt = {s["labels"]["command"]: s["count"] for s in snapshot["command_rtt_seconds"]["samples"]}
+        self.assertEqual(rtt, {"MODE": 1, "MOVE": 2})
+        traffic = {s["labels"]["direction"]: s["value"] for s in snapshot["serial_bytes_total"]["samples"]}
+        self.assertEqual(traffic["out"], len(b"#2 MODE1\n#3 MOVE0\n#4 MOVE4\n"))
+        self.assertGreater(traffic["in"], 0)
+        self.assertGreater(snapshot["parse_seconds"]["samples"][0]["count"], 0)
+
+    def test_timeouts_are_counted(self):
+        """Test that a command given up without a reply is counted by type."""
+        metrics = Metrics()
+        pipeline = CommandPipeline(SimulatedSerial(baudrate=None, timeout=0.1), TextCodec(), timeout=0.5,
+                                   metrics=metrics)
+        pipeline.in_flight[1] = ("MOVE4", 0.0)
+        self.assertEqual(pipeline.expire(now=1.0), ["MOVE4"])
+        samples = metrics.snapshot()["command_timeouts_total"]["samples"]
+        self.assertEqual(samples, [{"labels": {"command": "MOVE"}, "value": 1}])
+
+
+if __name__ == '__main__':
+    unittest.main()
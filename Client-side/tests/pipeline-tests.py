@@ -0,0 +1,248 @@
+import time
+import unittest
+
+from pipeline import CommandPipeline, negotiate_baud
+from protocol import HANDSHAKE_BINARY, BinaryCodec, TextCodec
+from simulator import FirmwareEmulator, SimulatedSerial
+
+
+def drain(pipeline):
+    """Read until every submitted command has been answered or timed out."""
+    replies = []
+    while pipeline.busy:
+        chunk = pipeline.read()
+        if not chunk and pipeline.expire():
+            continue
+        replies.extend(chunk)
+    return replies
+
+
+class LegacyEmulator(FirmwareEmulator):
+    """Firmware without sequence number support: the prefix is not recognised."""
+
+    def process_command(self, command):
+        if command.startswith("#"):
+            self._println("ERR:UNKNOWN")
+            return
+        super().process_command(command)
+
+
+class BootingEmulator(FirmwareEmulator):
+    """Board still booting after the port opened: the first command is lost."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.booted = False
+
+    def process_command(self, command):
+        if not self.booted:
+            self.booted = True
+            return
+        super().process_command(command)
+
+
+class ChattyEmulator(FirmwareEmulator):
+    """Board whose AI vs AI loop sends a move before it gets round to answering the probe."""
+
+    def __init__(self):
+        super().__init__(ai_delay=0.05)
+        self.deferred = None
+
+    def process_command(self, command):
+        if self.deferred is None and command.startswith("#"):
+            self._println("BOARD:100000000:CONTINUE")
+            self.deferred = command
+            return
+        super().process_command(command)
+
+    def _ai_active(self):
+        return bool(self.deferred) or super()._ai_active()
+
+    def _ai_step(self):
+        command, self.deferred = self.deferred, False
+        super().process_command(command)
+
+
+class DeafEmulator(FirmwareEmulator):
+    """Board that misses one command, as if it was garbled on the line."""
+
+    def __init__(self, missed):
+        super().__init__()
+        self.missed = missed
+
+    def process_command(self, command):
+        if self.missed and command.endswith(" " + self.missed):
+            self.missed = None
+            return
+        super().process_command(command)
+
+
+class FixedBaudEmulator(FirmwareEmulator):
+    """Firmware without the BAUD command: unknown commands are ignored."""
+
+    def process_command(self, command):
+        if not command.startswith("BAUD"):
+            super().process_command(command)
+
+
+class TestCommandPipeline(unittest.TestCase):
+    def test_negotiates_sequence_numbers(self):
+        """Test that a current board is driven with sequence numbers."""
+        conn = SimulatedSerial(baudrate=None, timeout=0.5)
+        pipeline = CommandPipeline(conn, TextCodec(), window=4, timeout=0.5)
+        self.assertTrue(pipeline.negotiate())
+        self.assertEqual(pipeline.window, 4)
+
+    def test_negotiate_retries_while_the_board_boots(self):
+        """Test that an unanswered probe is sent again instead of falling back to lock-step."""
+        conn = SimulatedSerial(BootingEmulator(), baudrate=None, timeout=0.1)
+        pipeline = CommandPipeline(conn, TextCodec(), window=4, timeout=0.2)
+        self.assertTrue(pipeline.negotiate())
+        self.assertEqual(pipeline.window, 4)
+
+    def test_negotiate_skips_unsolicited_replies(self):
+        """Test that an AI vs AI move read before the probe's reply does not end the negotiation."""
+        conn = SimulatedSerial(ChattyEmulator(), baudrate=None, timeout=0.1)
+        pipeline = CommandPipeline(conn, TextCodec(), window=4, timeout=0.2)
+        self.assertTrue(pipeline.negotiate())
+        self.assertEqual(pipeline.window, 4)
+
+    def test_burst_is_matched_in_order(self):
+        """Test that a burst of commands overlaps and every reply reaches its command."""
+        conn = SimulatedSerial(baudrate=None, timeout=0.5)
+        pipeline = CommandPipeline(conn, TextCodec(), window=3, timeout=0.5)
+        pipeline.negotiate()
+        for command in ("MODE1", "RESET", "MOVE0", "MOVE4", "MOVE4"):
+            pipeline.submit(command)
+        self.assertEqual(len(pipeline.in_flight), 3)
+        replies = drain(pipeline)
+        self.assertEqual([command for command, _ in replies], ["MODE1", "RESET", "MOVE0", "MOVE4", "MOVE4"])
+        self.assertEqual([response.raw.split(" ", 1)[1] for _, response in replies],
+                         ["OK:MODE_SET", "OK:RESET", "BOARD:100000000:CONTINUE",
+                          "BOARD:100020000:CONTINUE", "ERR:INVALID_MOVE"])
+
+    def test_binary_burst(self):
+        """Test pipelining over the binary framing."""
+        conn = SimulatedSerial(baudrate=None, timeout=0.5)
+        conn.write((HANDSHAKE_BINARY + "\n").encode())
+        conn.readline()
+        pipeline = CommandPipeline(conn, BinaryCodec(), window=4, timeout=0.5)
+        self.assertTrue(pipeline.negotiate())
+        for command in ("MODE2", "RESET", "MOVE0"):
+            pipeline.submit(command)
+        replies = drain(pipeline)
+        self.assertEqual(replies[-1][1].board, "100020000")
+        self.assertEqual([command for command, _ in replies], ["MODE2", "RESET", "MOVE0"])
+
+    def test_unsolicited_replies(self):
+        """Test that replies without a sequence number are reported without a command."""
+        pipeline = CommandPipeline(SimulatedSerial(baudrate=None, timeout=0.1), TextCodec())
+        self.assertEqual([(c, r.raw) for c, r in pipeline.receive(b"BOARD:200010000:CONTINUE\r\n")],
+                         [("", "BOARD:200010000:CONTINUE")])
+
+    def test_legacy_firmware_falls_back_to_lock_step(self):
+        """Test that a board without sequence numbers gets one unsequenced command at a time."""
+        conn = SimulatedSerial(LegacyEmulator(), baudrate=None, timeout=0.2)
+        pipeline = CommandPipeline(conn, TextCodec(), window=4, timeout=0.2)
+        self.assertFalse(pipeline.negotiate())
+        self.assertEqual(pipeline.window, 1)
+        pipeline.submit("MOVE4")
+        pipeline.submit("MOVE0")
+        self.assertEqual(len(pipeline.in_flight), 1)
+        replies = drain(pipeline)
+        self.assertEqual([(c, r.raw) for c, r in replies],
+                         [("MOVE4", "BOARD:000010000:CONTINUE"), ("MOVE0", "BOARD:200010000:CONTINUE")])
+
+    def test_legacy_firmware_keeps_ai_moves_unsolicited(self):
+        """Test that AI vs AI moves of a board without sequence numbers are not taken as replies."""
+        conn = SimulatedSerial(LegacyEmulator(ai_delay=0.05), baudrate=None, timeout=0.2)
+        pipeline = CommandPipeline(conn, TextCodec(), window=4, timeout=1.0)
+        self.assertFalse(pipeline.negotiate())
+        pipeline.submit("MODE3")
+        pipeline.submit("RESET")
+        drain(pipeline)
+        time.sleep(0.12)  # AI moves are sent before the board reads the next command
+        pipeline.submit("SAVE")
+        replies = drain(pipeline)
+        self.assertGreater(len(replies), 1)
+        self.assertEqual({(c, r.kind) for c, r in replies[:-1]}, {("", "BOARD")})
+        self.assertEqual((replies[-1][0], replies[-1][1].raw), ("SAVE", "OK:SAVED"))
+        pipeline.submit("MODE1")
+        self.assertEqual([c for c, _ in pipeline.receive(b"BOARD:000010000:CONTINUE\r\n")], [""])
+        self.assertEqual([c for c, _ in drain(pipeline)], ["MODE1"])
+
+    def test_expire_frees_the_window(self):
+        """Test that unanswered commands time out and release their slot."""
+        conn = SimulatedSerial(baudrate=None, timeout=0.1)
+        pipeline = CommandPipeline(conn, TextCodec(), window=1, timeout=0.1)
+        pipeline.in_flight[42] = ("MOVE1", 0.0)
+        pipeline.submit("RESET")
+        self.assertEqual(pipeline.expire(now=1.0), ["MOVE1"])
+        self.assertEqual([command for command, _ in pipeline.in_flight.values()], ["RESET"])
+
+    def test_overtaken_command_is_given_up(self):
+        """Test that a command whose reply is skipped is given up once a later command is answered."""
+        conn = SimulatedSerial(DeafEmulator("MOVE4"), baudrate=None, timeout=0.2)
+        pipeline = CommandPipeline(conn, TextCodec(), window=4, timeout=5.0)
+        self.assertTrue(pipeline.negotiate())
+        pipeline.submit("MOVE4")
+        pipeline.submit("MOVE0")
+        replies = []
+        while pipeline.in_flight:
+            replies.extend(pipeline.read())
+        self.assertEqual([command for command, _ in replies], ["MOVE0"])
+        self.assertEqual(pipeline.expire(), ["MOVE4"])
+        self.assertEqual(pipeline.expire(), [])
+
+    def test_unacked_lists_in_flight_then_pending(self):
+        """Test that unanswered commands are listed oldest first for replay."""
+        pipeline = CommandPipeline(SimulatedSerial(baudrate=None, timeout=0.1), TextCodec(), window=2)
+        pipeline.sequenced = False
+        for command in ("MODE1", "RESET", "MOVE4"):
+            pipeline.submit(command)
+        pipeline.receive(b"OK:MODE_SET\r\n")
+        self.assertEqual(pipeline.unacked(), ["RESET", "MOVE4"])
+
+    def test_sequence_numbers_wrap(self):
+        """Test that sequence numbers stay within one byte and skip those in flight."""
+        pipeline = CommandPipeline(SimulatedSerial(baudrate=None, timeout=0.1), TextCodec())
+        pipeline._next_sequence = 255
+        pipeline.in_flight[1] = ("MOVE1", 0.0)
+        self.assertEqual(pipeline._allocate(), 255)
+        self.assertEqual(pipeline._allocate(), 2)
+
+
+class TestBaudNegotiation(unittest.TestCase):
+    def test_raises_to_the_ceiling(self):
+        """Test that both sides step up to the highest rate allowed and keep talking."""
+        conn = SimulatedSerial(baudrate=9600, timeout=0.5, max_baud=115200)
+        self.assertEqual(negotiate_baud(conn, 57600), 57600)
+        self.assertEqual(conn.emulator.confirmed_baud, 57600)
+        conn.write(b"MOVE4\n")
+        self.assertEqual(conn.readline(), b"BOARD:000010000:CONTINUE\r\n")
+
+    def test_falls_back_to_the_highest_stable_rate(self):
+        """Test that a rate the link cannot carry is abandoned on both sides."""
+        conn = SimulatedSerial(baudrate=9600, timeout=0.5, max_baud=19200)
+        self.assertEqual(negotiate_baud(conn, 115200), 19200)
+        self.assertEqual(conn.baudrate, 19200)
+        conn.write(b"RESET\n")
+        self.assertEqual(conn.readline(), b"OK:RESET\r\n")
+
+    def test_cached_rate_skips_probing(self):
+        """Test that a cached rate is switched to directly."""
+        conn = SimulatedSerial(baudrate=9600, timeout=0.5, max_baud=115200)
+        self.assertEqual(negotiate_baud(conn, 115200, cached=57600), 57600)
+        self.assertEqual(conn.bytes_written, len(b"BAUD57600\n<test_connection/>\n"))
+        conn = SimulatedSerial(baudrate=9600, timeout=0.5, max_baud=115200)
+        self.assertEqual(negotiate_baud(conn, 115200, cached=9600), 9600)
+        self.assertEqual(conn.bytes_written, 0)
+
+    def test_firmware_without_baud_command(self):
+        """Test that an older board stays at its start-up rate."""
+        conn = SimulatedSerial(FixedBaudEmulator(), baudrate=9600, timeout=0.05, max_baud=115200)
+        self.assertEqual(negotiate_baud(conn, 115200, timeout=0.05), 9600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from playback import MAX_BATCH, FrameBuffer, Playback
+from protocol import parse_response
+
+
+def frame(board, status="CONTINUE", winner=0):
+    return parse_response(f"BOARD:{board}:{status}:{winner}")
+
+
+class TestFrameBuffer(unittest.TestCase):
+    def test_only_the_newest_frame_is_kept(self):
+        """Test that frames arriving between two ticks are coalesced into the newest one."""
+        buffer = FrameBuffer()
+        buffer.push(frame("100000000"))
+        buffer.push(frame("120000000"))
+        latest, outcomes = buffer.take()
+        self.assertEqual(latest.board, "120000000")
+        self.assertEqual(outcomes, [])
+        self.assertEqual((buffer.received, buffer.coalesced), (2, 1))
+        self.assertFalse(buffer.pending)
+
+    def test_outcomes_survive_coalescing(self):
+        """Test that every finished game is reported even when its frame is replaced."""
+        buffer = FrameBuffer()
+        buffer.push(frame("111220000", "WIN", 1))
+        buffer.push(frame("100000000"))
+        buffer.push(frame("121212211", "DRAW"))
+        buffer.push(frame("000000000"))
+        latest, outcomes = buffer.take()
+        self.assertEqual(latest.board, "000000000")
+        self.assertEqual([o.status for o in outcomes], ["WIN", "DRAW"])
+
+    def test_drop_frame_keeps_outcomes(self):
+        """Test that dropping the pending frame after a reset keeps its outcome."""
+        buffer = FrameBuffer()
+        buffer.push(frame("111220000", "WIN", 1))
+        buffer.drop_frame()
+        self.assertTrue(buffer.pending)
+        latest, outcomes = buffer.take()
+        self.assertIsNone(latest)
+        self.assertEqual(len(outcomes), 1)
+
+
+class TestPlayback(unittest.TestCase):
+    def setUp(self):
+        """Ten frames recorded one second apart."""
+        self.frames = [(100.0 + i, frame(str(i % 3) * 9)) for i in range(10)]
+
+    def test_real_time(self):
+        """Test that frames are released when their recorded time is reached."""
+        playback = Playback(self.frames, now=0.0)
+        self.assertEqual(len(playback.advance(0.0)), 1)
+        self.assertEqual(len(playback.advance(2.5)), 2)
+        self.assertEqual(playback.elapsed(2.5), 2.5)
+        self.assertFalse(playback.finished)
+        self.assertEqual(len(playback.advance(100.0)), 7)
+        self.assertTrue(playback.finished)
+
+    def test_fast_forward(self):
+        """Test that 10x releases ten seconds of recording per second."""
+        playback = Playback(self.frames, now=0.0, speed=10.0)
+        self.assertEqual(len(playback.advance(0.45)), 5)
+
+    def test_speed_change_does_not_jump(self):
+        """Test that changing speed continues from the current position."""
+        playback = Playback(self.frames, now=0.0)
+        playback.advance(3.0)
+        playback.set_speed(10.0, now=3.0)
+        self.assertEqual(playback.advance(3.05), [])
+        self.assertEqual(len(playback.advance(3.2)), 2)
+        self.assertAlmostEqual(playback.elapsed(3.2), 5.0)
+
+    def test_maximum_speed(self):
+        """Test that maximum speed ignores timestamps and releases frames in batches."""
+        frames = [(float(i), frame("000000000")) for i in range(MAX_BATCH + 5)]
+        playback = Playback(frames, now=0.0, speed=None)
+        self.assertEqual(len(playback.advance(0.0)), MAX_BATCH)
+        playback.set_speed(1.0, now=0.0)
+        self.assertEqual(len(playback.advance(1.0)), 1)
+        playback.set_speed(None, now=1.0)
+        self.assertEqual(len(playback.advance(1.0)), 4)
+        self.assertTrue(playback.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
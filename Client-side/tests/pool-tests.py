@@ -0,0 +1,87 @@
+import unittest
+
+import serial
+
+from pool import ConnectionPool
+from simulator import FirmwareEmulator, PtyDevice, SimulatedSerial
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        """Start three emulated boards on pseudo-terminals."""
+        self.devices = [PtyDevice(FirmwareEmulator(ai_delay=0.01)) for _ in range(3)]
+        for device in self.devices:
+            device.start()
+
+    def tearDown(self):
+        for device in self.devices:
+            device.stop()
+
+    def test_sessions_run_concurrently(self):
+        """Test that every board plays its own game through one pool."""
+        with ConnectionPool(timeout=1.0) as pool:
+            sessions = pool.open_all([device.port for device in self.devices])
+            self.assertEqual(len(sessions), 3)
+            for i, session in enumerate(sessions):
+                session.send("MODE1")
+                session.send(f"MOVE{i}")
+            events = pool.run_until_idle(timeout=5)
+            boards = {session.port: response.board for session, command, response in events
+                      if command.startswith("MOVE")}
+            expected = {device.port: "".join("1" if cell == i else "0" for cell in range(9))
+                        for i, device in enumerate(self.devices)}
+            self.assertEqual(boards, expected)
+            self.assertTrue(all(session.replies == 2 for session in sessions))
+
+    def test_unsolicited_ai_moves(self):
+        """Test that AI vs AI moves from several boards arrive as unsolicited events."""
+        with ConnectionPool(protocol="binary", timeout=1.0) as pool:
+            sessions = pool.open_all([device.port for device in self.devices])
+            self.assertTrue(all(session.codec.name == "binary" for session in sessions))
+            for session in sessions:
+                session.send("MODE3")
+                session.send("RESET")
+            finished = set()
+            for _ in range(500):
+                for session, command, response in pool.poll(0.05):
+                    if command == "" and response.status in ("WIN", "DRAW"):
+                        finished.add(session.port)
+                if len(finished) == 3:
+                    break
+            self.assertEqual(finished, {device.port for device in self.devices})
+
+    def test_connections_without_file_descriptor_are_polled(self):
+        """Test that simulated connections are served next to real ports."""
+        simulated = SimulatedSerial(baudrate=None, timeout=0.2)
+
+        def opener(port, baud):
+            return simulated if port == "sim" else serial.Serial(port, baud, timeout=0.5)
+
+        with ConnectionPool(timeout=0.5, opener=opener) as pool:
+            sessions = pool.open_all(["sim", self.devices[0].port])
+            self.assertEqual(len(sessions), 2)
+            for session in sessions:
+                session.send("MOVE4")
+            events = pool.run_until_idle(timeout=5)
+            self.assertEqual(sorted(s.port for s, _, _ in events), sorted(["sim", self.devices[0].port]))
+
+    def test_closed_port_is_unregistered(self):
+        """Test that a port whose connection was already closed is still removed from the selector."""
+        with ConnectionPool(timeout=0.5) as pool:
+            session = pool.open(self.devices[0].port)
+            session.connection.close()
+            self.assertIsNone(session.fileno())
+            pool.remove(session.port)
+            self.assertEqual(len(pool._selector.get_map()), 0)
+            self.assertEqual(pool.sessions, {})
+
+    def test_failed_ports_are_reported(self):
+        """Test that a port that cannot be opened does not stop the others."""
+        with ConnectionPool(timeout=0.5) as pool:
+            sessions = pool.open_all(["/dev/does-not-exist", self.devices[0].port])
+            self.assertEqual([session.port for session in sessions], [self.devices[0].port])
+            self.assertIn("/dev/does-not-exist", pool.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
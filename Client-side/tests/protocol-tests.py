@@ -0,0 +1,116 @@
+import unittest
+
+from protocol import (SEQUENCE_FLAG, BinaryCodec, TextCodec, crc8, encode_command,
+                      encode_frame, pack_board, parse_response, unpack_board)
+
+
+class TestProtocol(unittest.TestCase):
+    def test_encode_command(self):
+        """Test that commands are terminated with a newline."""
+        self.assertEqual(encode_command("MOVE4"), b"MOVE4\n")
+
+    def test_sequence_numbers(self):
+        """Test that sequence numbers are prefixed to commands and parsed from replies."""
+        self.assertEqual(encode_command("MOVE4", 17), b"#17 MOVE4\n")
+        response = parse_response("#17 BOARD:000010000:CONTINUE\r\n")
+        self.assertEqual((response.kind, response.seq), ("BOARD", 17))
+        self.assertEqual(response.board, "000010000")
+        self.assertIsNone(parse_response("OK:RESET").seq)
+
+    def test_parse_board_continue(self):
+        """Test parsing a board update."""
+        response = parse_response("BOARD:120010200:CONTINUE\r\n")
+        self.assertEqual(response.kind, "BOARD")
+        self.assertEqual(response.board, "120010200")
+        self.assertEqual(response.status, "CONTINUE")
+        self.assertEqual(response.winner, 0)
+
+    def test_parse_board_win(self):
+        """Test parsing a winning board."""
+        response = parse_response("BOARD:111220000:WIN:1")
+        self.assertEqual(response.status, "WIN")
+        self.assertEqual(response.winner, 1)
+
+    def test_parse_board_draw(self):
+        """Test parsing a drawn board."""
+        response = parse_response("BOARD:121122212:DRAW")
+        self.assertEqual(response.status, "DRAW")
+
+    def test_parse_malformed_board(self):
+        """Test that a truncated board is reported as malformed."""
+        self.assertEqual(parse_response("BOARD:1200:CONTINUE").kind, "MALFORMED")
+
+    def test_parse_ok_and_error(self):
+        """Test parsing acknowledgements and errors."""
+        ok = parse_response("OK:RESET")
+        self.assertEqual((ok.kind, ok.detail), ("OK", "RESET"))
+        err = parse_response("ERR:INVALID_MOVE")
+        self.assertEqual((err.kind, err.detail), ("ERR", "INVALID_MOVE"))
+
+    def test_parse_connection_ok(self):
+        """Test parsing the connection test reply."""
+        self.assertEqual(parse_response("<connection_ok/>").kind, "CONNECTION_OK")
+
+
+class TestCodecs(unittest.TestCase):
+    def test_text_codec_splits_lines(self):
+        """Test that the text codec returns replies once their line is complete."""
+        codec = TextCodec()
+        self.assertEqual(codec.feed(b"OK:RES"), [])
+        responses = codec.feed(b"ET\r\nBOARD:000010000:CONTINUE\r\n")
+        self.assertEqual([r.kind for r in responses], ["OK", "BOARD"])
+
+    def test_pack_board_round_trip(self):
+        """Test packing a board into 2 bits per cell."""
+        self.assertEqual(unpack_board(pack_board("120010200")), "120010200")
+        self.assertLess(pack_board("222222222"), 1 << 18)
+
+    def test_crc8_check_value(self):
+        """Test the CRC-8 against its standard check value."""
+        self.assertEqual(crc8(b"123456789"), 0xF4)
+
+    def test_binary_command_encoding(self):
+        """Test that commands become length-prefixed frames."""
+        frame = BinaryCodec().encode_command("MOVE4")
+        self.assertEqual(frame[:3], bytes([2, 0x02, 4]))
+        self.assertEqual(frame[3], crc8(frame[:3]))
+        with self.assertRaises(ValueError):
+            BinaryCodec().encode_command("SOMETHING")
+
+    def test_binary_save_and_load(self):
+        """Test that LOAD carries its snapshot as a 3 byte little-endian argument."""
+        codec = BinaryCodec()
+        self.assertEqual(codec.encode_command("SAVE")[:2], bytes([1, 0x05]))
+        self.assertEqual(codec.encode_command("LOAD")[:2], bytes([1, 0x06]))
+        self.assertEqual(codec.encode_command("LOAD1506a4")[:5], bytes([4, 0x06, 0xA4, 0x06, 0x15]))
+        with self.assertRaises(ValueError):
+            codec.encode_command("LOAD-10000")
+        response = codec.feed(encode_frame(bytes([2 << 6, 3])))[0]
+        self.assertEqual((response.kind, response.detail), ("ERR", "NO_SAVE"))
+
+    def test_binary_sequence_number(self):
+        """Test that the sequence number travels as the last payload byte."""
+        frame = BinaryCodec().encode_command("MOVE4", 17)
+        self.assertEqual(frame[:4], bytes([3, 0x82, 4, 17]))
+        response = BinaryCodec().feed(encode_frame(bytes([(1 << 6) | SEQUENCE_FLAG, 2, 17])))[0]
+        self.assertEqual((response.raw, response.seq), ("#17 OK:RESET", 17))
+
+    def test_binary_board_frame(self):
+        """Test decoding a six byte board frame."""
+        packed = pack_board("111220000").to_bytes(3, "little")
+        frame = encode_frame(bytes([(1 << 2) | 1]) + packed)
+        self.assertEqual(len(frame), 6)
+        response = BinaryCodec().feed(frame)[0]
+        self.assertEqual(response.raw, "BOARD:111220000:WIN:1")
+        self.assertEqual((response.status, response.winner), ("WIN", 1))
+
+    def test_binary_codec_resyncs_after_corruption(self):
+        """Test that a corrupted frame is skipped and the next one decoded."""
+        good = encode_frame(bytes([1 << 6, 2]))
+        corrupted = good[:-1] + bytes([good[-1] ^ 0xFF])
+        responses = BinaryCodec().feed(corrupted + good)
+        self.assertEqual([r.raw for r in responses], ["OK:RESET"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from reconnect import ReconnectSupervisor
+
+try:
+    from PyQt5.QtWidgets import QApplication
+    import main
+except ImportError:
+    main = None
+
+
+class TestReconnectSupervisor(unittest.TestCase):
+    def setUp(self):
+        """Drive the supervisor with a clock the tests set by hand."""
+        self.now = 100.0
+        self.supervisor = ReconnectSupervisor(initial_delay=0.25, factor=2.0, max_delay=1.0,
+                                              clock=lambda: self.now)
+
+    def test_delay_doubles_up_to_the_maximum(self):
+        """Test the exponential backoff schedule of one outage."""
+        delays = [self.supervisor.connection_lost("read failed")]
+        delays += [self.supervisor.attempt_failed("no such port") for _ in range(4)]
+        self.assertEqual(delays, [0.25, 0.5, 1.0, 1.0, 1.0])
+        self.assertEqual(self.supervisor.last_error, "no such port")
+
+    def test_new_outage_starts_over(self):
+        """Test that the backoff restarts after a successful reconnect."""
+        self.supervisor.connection_lost("read failed")
+        self.supervisor.attempt_failed("no such port")
+        self.supervisor.connected()
+        self.assertEqual(self.supervisor.connection_lost("read failed"), 0.25)
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that a limited supervisor returns None once its attempts are used up."""
+        supervisor = ReconnectSupervisor(max_attempts=2, clock=lambda: self.now)
+        self.assertIsNotNone(supervisor.connection_lost("read failed"))
+        self.assertIsNotNone(supervisor.attempt_failed("no such port"))
+        self.assertIsNone(supervisor.attempt_failed("no such port"))
+
+    def test_unacked_commands_are_replayed_once(self):
+        """Test that commands from every lost connection of an outage are replayed in order."""
+        self.supervisor.connection_lost("read failed", ["MOVE4"])
+        self.supervisor.connection_lost("no data", ["MOVE0", "SAVE"])
+        self.assertEqual(self.supervisor.connected(), ["MOVE4", "MOVE0", "SAVE"])
+        self.assertEqual(self.supervisor.connected(), [])
+
+    def test_commands_queued_during_the_outage_follow_the_unacked_ones(self):
+        """Test that commands issued while offline are replayed after those lost with the connection."""
+        self.supervisor.connection_lost("read failed", ["MOVE4"])
+        self.supervisor.queue("MOVE0")
+        self.assertEqual(self.supervisor.connected(), ["MOVE4", "MOVE0"])
+
+    def test_metrics(self):
+        """Test the reconnect counters and the downtime, including an outage in progress."""
+        self.supervisor.connection_lost("read failed", ["MOVE4"])
+        self.now += 2.0
+        self.supervisor.attempt_failed("no such port")
+        self.now += 1.5
+        self.supervisor.connected()
+        self.supervisor.connection_lost("read failed")
+        self.now += 1.0
+        metrics = self.supervisor.metrics()
+        self.assertEqual((metrics["reconnects"], metrics["outages"], metrics["failed_attempts"]), (1, 2, 1))
+        self.assertEqual(metrics["replayed_commands"], 1)
+        self.assertTrue(metrics["down"])
+        self.assertAlmostEqual(metrics["downtime_total"], 4.5)
+        self.assertAlmostEqual(metrics["downtime_last"], 1.0)
+        self.supervisor.give_up()
+        self.assertFalse(self.supervisor.metrics()["down"])
+        self.assertAlmostEqual(self.supervisor.metrics()["downtime_total"], 4.5)
+
+
+@unittest.skipIf(main is None, "PyQt5 is not installed")
+class TestOutageInput(unittest.TestCase):
+    def setUp(self):
+        """Create the window offscreen in a scratch directory, with a lost connection being reopened."""
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        self.app = QApplication.instance() or QApplication([])
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(os.path.join(os.path.dirname(main.__file__), "tiktaktoe.ini"),
+                    os.path.join(self.directory, "tictactoe.ini"))
+        os.chdir(self.directory)
+        self.gui = main.TicTacToeGUI()
+        self.gui.mode_combo.setCurrentText('Man vs Man')
+        self.gui.reconnector.connection_lost("read failed")
+
+    def tearDown(self):
+        self.gui.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def test_move_made_during_the_outage_is_replayed(self):
+        """Test that a move clicked while offline is sent once the connection is back."""
+        self.gui.make_move(4)
+        self.assertEqual(self.gui.reconnector.replay, ["MOVE4"])
+        worker = MagicMock(port="COM3", negotiated_baud=9600)
+        self.gui.serial_worker = worker
+        self.gui.on_connected()
+        sent = [call.args[0] for call in worker.send.call_args_list]
+        self.assertEqual(sent, ["MODE1", "RESET", "MOVE4"])
+        self.assertFalse(self.gui.reconnector.down)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from board import Board
+from playback import Playback
+from protocol import pack_board
+from recorder import DRAW, HEADER, NO_OUTCOME, RECORD, X_WINS, GameLog, GameRecorder, pack_position
+
+
+class TestGameRecorder(unittest.TestCase):
+    def setUp(self):
+        """Record into a fresh temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "games.ttr")
+        self.clock = iter(range(1000))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def recorder(self):
+        return GameRecorder(self.path, clock=lambda: float(next(self.clock)))
+
+    def play_x_win(self, recorder):
+        """X wins along the top row against an AI that answers in the same frame."""
+        recorder.set_mode(2)
+        for move, board in ((0, "100020000"), (1, "110020020"), (2, "111020020")):
+            recorder.note_move(move)
+            recorder.record_frame(board, "WIN" if move == 2 else "CONTINUE", 1 if move == 2 else 0)
+
+    def test_pack_position_matches_the_protocol(self):
+        """Test that boards are packed exactly as protocol.pack_board() packs them."""
+        for state in ("000000000", "120120000", "221112211", "000000002"):
+            self.assertEqual(pack_position(Board.from_string(state)), pack_board(state))
+
+    def test_player_move_is_recorded_before_the_reply(self):
+        """Test that a frame with two new cells becomes two records, the clicked cell first."""
+        with self.recorder() as recorder:
+            recorder.note_move(4)
+            self.assertEqual(recorder.record_frame("200010000"), 2)
+        with GameLog(self.path) as log:
+            self.assertEqual([(r.move, r.board) for r in log.game(0)],
+                             [(4, "000010000"), (0, "200010000")])
+
+    def test_games_are_split_on_outcome_reset_and_new_board(self):
+        """Test that outcomes, end_game() and unrelated boards start new games."""
+        with self.recorder() as recorder:
+            self.play_x_win(recorder)
+            recorder.record_frame("100000000")
+            recorder.end_game()
+            recorder.record_frame("100000000")
+            recorder.record_frame("010000000")
+            recorder.record_frame("010000000")
+        with GameLog(self.path) as log:
+            self.assertEqual(log.game_count, 4)
+            self.assertEqual(len(log), 8)
+            self.assertEqual(log.game_bounds(0), (0, 5))
+            self.assertEqual(log.outcome(0), X_WINS)
+            self.assertEqual(log.outcome(-1), NO_OUTCOME)
+            self.assertEqual(log.record(-1).game, 3)
+            self.assertEqual(log.record(4).mode, 2)
+
+    def test_reopening_appends(self):
+        """Test that a reopened log continues the game numbering and drops a torn record."""
+        with self.recorder() as recorder:
+            self.play_x_win(recorder)
+        with open(self.path, "ab") as f:
+            f.write(b"\x00" * (RECORD.size // 2))
+        with self.recorder() as recorder:
+            recorder.record_frame("121212211", "DRAW")
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 14 * RECORD.size)
+        with GameLog(self.path) as log:
+            self.assertEqual(log.game_count, 2)
+            self.assertEqual(log.outcome(1), DRAW)
+
+    def test_missing_index_is_rebuilt(self):
+        """Test that the game index is rebuilt from the records when it is lost."""
+        with self.recorder() as recorder:
+            self.play_x_win(recorder)
+            self.play_x_win(recorder)
+        os.remove(self.path + ".idx")
+        with GameLog(self.path) as log:
+            self.assertEqual(log.game_bounds(1), (5, 10))
+        self.assertEqual(os.path.getsize(self.path + ".idx"), 16)
+
+    def test_not_a_log(self):
+        """Test that other files are rejected."""
+        with open(self.path, "wb") as f:
+            f.write(b"TTT1\x00\x00")
+        with self.assertRaises(ValueError):
+            GameLog(self.path)
+
+    def test_replay_from_the_mapped_log(self):
+        """Test that Playback reads the records lazily through the log views."""
+        with self.recorder() as recorder:
+            self.play_x_win(recorder)
+        with GameLog(self.path) as log:
+            frames = log.frames()
+            playback = Playback(frames, now=0.0, times=log.timestamps())
+            self.assertIs(playback.frames, frames)
+            self.assertEqual([r.board for r in playback.advance(1.0)],
+                             ["100000000", "100020000", "110020000", "110020020"])
+            final = playback.advance(10.0)
+            self.assertEqual((final[-1].board, final[-1].status, final[-1].winner), ("111020020", "WIN", 1))
+            self.assertTrue(playback.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from savegame import Snapshot
+from simulator import FirmwareEmulator
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_matches_the_firmware(self):
+        """Test that the client packs a game exactly like the board's SAVE does."""
+        emulator = FirmwareEmulator(ai_delay=0.0)
+        for command in ("MODE1", "MOVE4", "MOVE0", "SAVE"):
+            emulator.feed((command + "\n").encode(), now=0.0)
+        saved = int.from_bytes(emulator.eeprom[1:4], "little")
+        self.assertEqual(Snapshot.from_game("200010000", 1).pack(), saved)
+        self.assertEqual(Snapshot.unpack(saved), Snapshot("200010000", 1, True, False))
+
+    def test_turn_and_ai_flag(self):
+        """Test deriving the turn from the board and resuming only unfinished AI vs AI games."""
+        self.assertFalse(Snapshot.from_game("100000000", 1).first_player_turn)
+        self.assertTrue(Snapshot.from_game("200010000", 3).ai_running)
+        self.assertFalse(Snapshot.from_game("111220000", 3, finished=True).ai_running)
+
+    def test_command(self):
+        """Test the one round trip restore command."""
+        self.assertEqual(Snapshot("000100000", 1).command(), "LOAD140040")
+        self.assertEqual(Snapshot("012221001", 1).command(), "LOAD1506A4")
+
+    def test_invalid_snapshots(self):
+        """Test that values the board would reject are refused."""
+        for packed in (0x100000, 0x0F0000, 0x3FFFFF, 0x400000, 0x150003):
+            with self.assertRaises(ValueError):
+                Snapshot.unpack(packed)
+
+
+class TestSaveFile(unittest.TestCase):
+    def setUp(self):
+        """Work in a fresh temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "savegame.ini")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        """Test that a saved game loads back unchanged."""
+        snapshot = Snapshot.from_game("120010200", 2)
+        snapshot.save(self.path)
+        self.assertEqual(Snapshot.load(self.path), snapshot)
+
+    def test_not_a_save_file(self):
+        """Test that missing and foreign files are rejected."""
+        with self.assertRaises(ValueError):
+            Snapshot.load(self.path)
+        with open(self.path, "w") as f:
+            f.write("BOARD:000000000\n")
+        with self.assertRaises(ValueError):
+            Snapshot.load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from selfplay import mode_strategies, play_shard, run_selfplay
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestSelfPlay(unittest.TestCase):
+    def test_mode_strategies(self):
+        """Test that AI sides play the firmware heuristic and human sides random moves."""
+        self.assertEqual(mode_strategies("AI vs AI"), ("greedy", "greedy"))
+        self.assertEqual(mode_strategies("Man vs AI"), ("random", "greedy"))
+        self.assertEqual(mode_strategies("Man vs Man", o_name="perfect"), ("random", "perfect"))
+
+    def test_results_do_not_depend_on_the_workers(self):
+        """Test that a seeded run gives the same totals in one process and on a pool."""
+        single = run_selfplay(5000, "random", "greedy", workers=1, seed=11, shard_size=1000)
+        pooled = run_selfplay(5000, "random", "greedy", workers=2, seed=11, shard_size=1000)
+        self.assertEqual([single[k] for k in ("draws", "x_wins", "o_wins")],
+                         [pooled[k] for k in ("draws", "x_wins", "o_wins")])
+        self.assertEqual((single["shards"], single["seed"]), (5, 11))
+        self.assertEqual(single["draws"] + single["x_wins"] + single["o_wins"], 5000)
+
+    def test_shards_are_seeded_independently(self):
+        """Test that every shard of a run gets its own sequence of games."""
+        self.assertEqual(play_shard("random", "random", 500, 4, 0), play_shard("random", "random", 500, 4, 0))
+        self.assertNotEqual(play_shard("random", "random", 500, 4, 0), play_shard("random", "random", 500, 4, 1))
+
+    def test_unseeded_run_reports_its_seed(self):
+        """Test that a run without a seed can be repeated from the seed it reports."""
+        first = run_selfplay(2000, "random", "random", workers=1, shard_size=500)
+        second = run_selfplay(2000, "random", "random", workers=1, seed=first["seed"], shard_size=500)
+        self.assertEqual(first["x_wins"], second["x_wins"])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_batch_shards(self):
+        """Test a run played by the NumPy batch engine."""
+        result = run_selfplay(20000, "greedy", "greedy", workers=2, seed=1, shard_size=5000, batch=True)
+        self.assertEqual(result["draws"], 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import time
+import unittest
+
+import serial
+
+from protocol import HANDSHAKE_BINARY, BinaryCodec
+from simulator import FirmwareEmulator, PtyDevice, SimulatedSerial, to_int
+
+
+class TestFirmwareEmulator(unittest.TestCase):
+    def setUp(self):
+        """Create a fresh emulator for every test."""
+        self.emulator = FirmwareEmulator(ai_delay=0.0)
+
+    def send(self, command):
+        self.emulator.feed((command + "\n").encode(), now=0.0)
+        return self.emulator.take_output().decode()
+
+    def test_connection_probe(self):
+        """Test the connection test handshake."""
+        self.assertEqual(self.send("<test_connection/>"), "<connection_ok/>\r\n")
+
+    def test_mode_and_reset(self):
+        """Test mode changes and resets are acknowledged."""
+        self.assertEqual(self.send("MODE2"), "OK:MODE_SET\r\n")
+        self.assertEqual(self.send("RESET"), "OK:RESET\r\n")
+
+    def test_man_vs_man_alternates_players(self):
+        """Test that Man vs Man moves alternate between X and O."""
+        self.send("MODE1")
+        self.assertEqual(self.send("MOVE0"), "BOARD:100000000:CONTINUE\r\n")
+        self.assertEqual(self.send("MOVE4"), "BOARD:100020000:CONTINUE\r\n")
+
+    def test_invalid_move(self):
+        """Test occupied and out-of-range cells are rejected."""
+        self.send("MOVE0")
+        self.assertEqual(self.send("MOVE0"), "ERR:INVALID_MOVE\r\n")
+        self.assertEqual(self.send("MOVE9"), "ERR:INVALID_MOVE\r\n")
+
+    def test_win_and_draw(self):
+        """Test win and draw replies."""
+        for move in (0, 3, 1, 4):
+            self.send(f"MOVE{move}")
+        self.assertEqual(self.send("MOVE2"), "BOARD:111220000:WIN:1\r\n")
+        self.send("RESET")
+        for move in (0, 1, 2, 4, 3, 5, 7, 6):
+            self.send(f"MOVE{move}")
+        self.assertEqual(self.send("MOVE8"), "BOARD:121122211:DRAW\r\n")
+
+    def test_man_vs_ai_answers_with_ai_move(self):
+        """Test that the AI answers a player move in Man vs AI mode."""
+        self.send("MODE2")
+        self.assertEqual(self.send("MOVE0"), "BOARD:100020000:CONTINUE\r\n")
+
+    def test_ai_vs_ai_loop(self):
+        """Test that the AI vs AI loop plays a full game after RESET."""
+        self.send("MODE3")
+        self.send("RESET")
+        lines = []
+        while self.emulator.loop(now=1.0):
+            lines.extend(self.emulator.take_output().decode().split())
+        self.assertEqual(lines[0], "BOARD:200010000:CONTINUE")
+        self.assertTrue(lines[-1].endswith(":DRAW") or ":WIN:" in lines[-1])
+
+    def test_binary_protocol(self):
+        """Test the binary handshake and a framed move."""
+        self.assertEqual(self.send(HANDSHAKE_BINARY), '<connection_ok binary="1"/>\r\n')
+        codec = BinaryCodec()
+        self.emulator.feed(codec.encode_command("MOVE4"), now=0.0)
+        output = self.emulator.take_output()
+        self.assertEqual(len(output), 6)
+        self.assertEqual(codec.feed(output)[0].raw, "BOARD:000010000:CONTINUE")
+
+    def test_text_byte_leaves_binary_mode(self):
+        """Test that a byte which cannot start a frame returns to the text protocol."""
+        self.send(HANDSHAKE_BINARY)
+        self.emulator.feed(b"\n", now=0.0)
+        self.assertFalse(self.emulator.binary_mode)
+        self.assertEqual(self.send("RESET"), "OK:RESET\r\n")
+
+    def test_sequence_number_is_echoed(self):
+        """Test that replies echo the sequence number of their command, text and binary."""
+        self.assertEqual(self.send("#7 MODE1"), "#7 OK:MODE_SET\r\n")
+        self.assertEqual(self.send("#8 MOVE4"), "#8 BOARD:000010000:CONTINUE\r\n")
+        self.assertEqual(self.send("MOVE0"), "BOARD:200010000:CONTINUE\r\n")
+        self.send(HANDSHAKE_BINARY)
+        codec = BinaryCodec()
+        self.emulator.feed(codec.encode_command("RESET", 9), now=0.0)
+        response = codec.feed(self.emulator.take_output())[0]
+        self.assertEqual((response.raw, response.seq), ("#9 OK:RESET", 9))
+
+    def test_bad_frame_error_carries_no_sequence(self):
+        """Test that a corrupt frame is not answered with the sequence number of the previous command."""
+        self.send(HANDSHAKE_BINARY)
+        codec = BinaryCodec()
+        self.emulator.feed(codec.encode_command("RESET", 9), now=0.0)
+        self.emulator.take_output()
+        frame = codec.encode_command("MOVE4", 10)
+        self.emulator.feed(frame[:-1] + bytes([frame[-1] ^ 0xFF]), now=0.0)
+        response = codec.feed(self.emulator.take_output())[0]
+        self.assertEqual((response.raw, response.seq), ("ERR:BAD_FRAME", None))
+
+    def test_save_and_load(self):
+        """Test that SAVE keeps the game in EEPROM across a power cycle and LOAD restores it."""
+        self.assertEqual(self.send("LOAD"), "ERR:NO_SAVE\r\n")
+        self.send("MODE1")
+        self.send("MOVE4")
+        self.assertEqual(self.send("SAVE"), "OK:SAVED\r\n")
+        rebooted = FirmwareEmulator(ai_delay=0.0, eeprom=self.emulator.eeprom)
+        rebooted.feed(b"LOAD\n", now=0.0)
+        self.assertEqual(rebooted.take_output(), b"BOARD:000010000:CONTINUE\r\n")
+        rebooted.feed(b"MOVE0\n", now=0.0)
+        self.assertEqual(rebooted.take_output(), b"BOARD:200010000:CONTINUE\r\n")
+
+    def test_load_snapshot_from_host(self):
+        """Test pushing a snapshot, including an AI vs AI game that resumes, and rejecting bad ones."""
+        self.assertEqual(self.send("#3 LOAD1506a4"), "#3 BOARD:012221001:CONTINUE\r\n")
+        self.assertEqual(self.emulator.current_mode, 1)
+        self.assertEqual(self.send("LOAD3C0000"), "BOARD:000000000:CONTINUE\r\n")
+        self.assertTrue(self.emulator.loop(now=1.0))
+        self.assertEqual(self.emulator.take_output(), b"BOARD:200010000:CONTINUE\r\n")
+        for bad in ("LOAD100000", "LOAD0F0000", "LOAD3FFFFF", "LOAD1", "LOADzz0000"):
+            self.assertEqual(self.send(bad), "ERR:BAD_STATE\r\n")
+        self.send(HANDSHAKE_BINARY)
+        codec = BinaryCodec()
+        self.emulator.feed(codec.encode_command("LOAD140040", 5), now=0.0)
+        response = codec.feed(self.emulator.take_output())[0]
+        self.assertEqual((response.raw, response.seq), ("#5 BOARD:000100000:CONTINUE", 5))
+
+    def test_baud_switch(self):
+        """Test that a new baud rate is kept once confirmed and dropped otherwise."""
+        self.assertEqual(self.send("BAUD300"), "ERR:BAD_BAUD\r\n")
+        self.assertEqual(self.send("BAUD57600"), "OK:BAUD\r\n")
+        self.assertEqual(self.emulator.link_baud(0.5), 57600)
+        self.assertEqual(self.emulator.link_baud(1.0), 9600)
+        self.send("BAUD57600")
+        self.assertEqual(self.send("<test_connection/>"), "<connection_ok/>\r\n")
+        self.assertEqual(self.emulator.link_baud(5.0), 57600)
+
+    def test_to_int_matches_arduino(self):
+        """Test the String::toInt() port."""
+        self.assertEqual(to_int("4"), 4)
+        self.assertEqual(to_int(" -1x"), -1)
+        self.assertEqual(to_int("abc"), 0)
+
+
+class TestSimulatedSerial(unittest.TestCase):
+    def test_round_trip(self):
+        """Test a command/reply round trip over the simulated link."""
+        conn = SimulatedSerial(baudrate=None, timeout=1)
+        conn.write(b"MOVE4\n")
+        self.assertEqual(conn.readline(), b"BOARD:000010000:CONTINUE\r\n")
+        self.assertEqual(conn.in_waiting, 0)
+
+    def test_baud_mismatch_loses_bytes(self):
+        """Test that bytes sent at a rate the board is not using never arrive."""
+        conn = SimulatedSerial(baudrate=19200, timeout=0.05, max_baud=115200)
+        conn.write(b"MOVE4\n")
+        self.assertEqual(conn.readline(), b"")
+        self.assertEqual((conn.bytes_lost, conn.emulator.board_string()), (6, "000000000"))
+
+    def test_baud_rate_pacing(self):
+        """Test that replies take at least their wire time at the simulated baud rate."""
+        conn = SimulatedSerial(baudrate=9600, timeout=1)
+        start = time.monotonic()
+        conn.write(b"RESET\n")
+        conn.readline()
+        self.assertGreaterEqual(time.monotonic() - start, (6 + 10) * 10 / 9600)
+
+    def test_timeout_returns_partial(self):
+        """Test that readline returns empty when nothing arrives."""
+        conn = SimulatedSerial(baudrate=None, timeout=0.05)
+        self.assertEqual(conn.readline(), b"")
+
+
+class TestPtyDevice(unittest.TestCase):
+    def test_serial_round_trip(self):
+        """Test that pyserial can talk to the emulator over a pseudo-terminal."""
+        with PtyDevice() as device:
+            conn = serial.Serial(device.port, 9600, timeout=1)
+            try:
+                conn.write(b"<test_connection/>\n")
+                self.assertEqual(conn.readline(), b"<connection_ok/>\r\n")
+            finally:
+                conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import random
+import tempfile
+import unittest
+
+from board import canonical
+from engine import perfect_move, play_game, random_move
+from solver import MoveTable, reachable_positions, solve
+
+
+class TestSolver(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Solve the game once for all tests."""
+        cls.solved = solve()
+        cls.table = MoveTable.build(cls.solved)
+
+    def test_position_counts(self):
+        """Test the well-known position counts."""
+        self.assertEqual(len(reachable_positions()), 5478)
+        self.assertEqual(len(self.solved), 5478)
+        self.assertEqual(len(self.table), 627)
+
+    def test_game_value_is_a_draw(self):
+        """Test that perfect play from the empty board is a draw."""
+        self.assertEqual(self.solved[(0, 0)][0], 0)
+
+    def test_table_moves_are_optimal(self):
+        """Test that the table move keeps the solved value in every position."""
+        for (own, opp), (score, move) in self.solved.items():
+            if move < 0:
+                continue
+            chosen = self.table.move(own, opp)
+            self.assertEqual(-self.solved[(opp, own | 1 << chosen)][0], score)
+
+    def test_takes_immediate_win(self):
+        """Test a position with a win in one."""
+        own, opp = 0b000000011, 0b000011000
+        self.assertEqual(self.table.move(own, opp), 2)
+
+    def test_save_and_load(self):
+        """Test the binary table round trip and the sorted lookup."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "perfect.bin")
+            self.table.save(path)
+            self.assertEqual(os.path.getsize(path), 6 + 3 * len(self.table))
+            loaded = MoveTable.load(path)
+        self.assertEqual((loaded.keys, loaded.moves), (self.table.keys, self.table.moves))
+        key, _ = canonical(0b000000011, 0b000011000)
+        self.assertEqual(loaded.lookup_sorted(key), self.table._lookup[key])
+        self.assertEqual(loaded.lookup_sorted(19682), -1)
+
+    def test_export_header(self):
+        """Test that the header holds both PROGMEM arrays."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "perfect_moves.h")
+            self.table.export_header(path)
+            with open(path, encoding="utf-8") as f:
+                header = f.read()
+        self.assertIn("PERFECT_KEYS[] PROGMEM", header)
+        self.assertIn("PERFECT_MOVES[] PROGMEM", header)
+        self.assertIn(f"PERFECT_MOVE_COUNT = {len(self.table)};", header)
+
+    def test_perfect_strategy_never_loses(self):
+        """Test that the perfect strategy never loses against random play."""
+        rng = random.Random(5)
+        for _ in range(500):
+            self.assertNotEqual(play_game(perfect_move, random_move, rng), 2)
+            self.assertNotEqual(play_game(random_move, perfect_move, rng), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
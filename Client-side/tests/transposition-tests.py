@@ -0,0 +1,81 @@
+import unittest
+
+from board import Board, canonical
+from engine import calculate_ai_move, search_move
+from solver import solve
+from transposition import EXACT, TranspositionTable
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_counters(self):
+        """Test hit, miss and eviction counting."""
+        table = TranspositionTable(capacity=2)
+        self.assertIsNone(table.get(1))
+        table.put(1, (9, EXACT, 0, 4))
+        self.assertEqual(table.get(1), (9, EXACT, 0, 4))
+        stats = table.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the table stays bounded and evicts the oldest unused entry."""
+        table = TranspositionTable(capacity=2)
+        table.put(1, "a")
+        table.put(2, "b")
+        table.get(1)
+        table.put(3, "c")
+        self.assertEqual(len(table), 2)
+        self.assertEqual(table.evictions, 1)
+        self.assertIsNone(table.get(2))
+        self.assertEqual(table.get(1), "a")
+
+    def test_symmetric_positions_share_a_key(self):
+        """Test that rotations and mirror images canonicalise to the same key."""
+        corner = canonical(1 << 0, 0)[0]
+        for cell in (2, 6, 8):
+            self.assertEqual(canonical(1 << cell, 0)[0], corner)
+        self.assertNotEqual(canonical(1 << 4, 0)[0], corner)
+
+
+class TestSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Solve the game once as the reference."""
+        cls.solved = solve()
+
+    def check_optimal(self, table):
+        for (own, opp), (score, move) in self.solved.items():
+            if move < 0:
+                continue
+            chosen = search_move(own, opp, table)
+            self.assertEqual(-self.solved[(opp, own | 1 << chosen)][0], score)
+
+    def test_search_is_optimal(self):
+        """Test that the search finds an optimal move in every position."""
+        table = TranspositionTable(capacity=8192)
+        self.check_optimal(table)
+        self.assertEqual(table.evictions, 0)
+        self.assertGreater(table.hits, 0)
+
+    def test_search_is_optimal_with_a_tiny_table(self):
+        """Test that evictions only cost time, never correctness."""
+        table = TranspositionTable(capacity=16)
+        self.check_optimal(table)
+        self.assertGreater(table.evictions, 0)
+
+    def test_repeated_queries_hit_the_table(self):
+        """Test that a solved position is answered from the table."""
+        table = TranspositionTable()
+        search_move(0, 0, table)
+        misses = table.misses
+        search_move(0, 0, table)
+        self.assertEqual(table.misses, misses)
+
+    def test_calculate_ai_move(self):
+        """Test the firmware-style entry point for both players."""
+        board = Board.from_string("110220000")
+        self.assertEqual(calculate_ai_move(board, 1, TranspositionTable()), 2)
+        self.assertEqual(calculate_ai_move(board, 2, TranspositionTable()), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
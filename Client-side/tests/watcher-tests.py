@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from port_watcher import ADDED, REMOVED, PortWatcher
+
+
+class TestPortWatcher(unittest.TestCase):
+    def setUp(self):
+        """Watch a fake device directory that already holds one board and a non-serial device."""
+        self.directory = tempfile.mkdtemp()
+        self.plug("ttyUSB0")
+        self.plug("null")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def plug(self, name):
+        open(self.path(name), "w").close()
+
+    def check_hot_plug(self, watcher):
+        self.assertEqual(watcher.check(), [(ADDED, self.path("ttyUSB0"))])
+        self.assertEqual(watcher.poll(0.05), [])
+        timer = threading.Timer(0.05, self.plug, ("ttyACM1",))
+        timer.start()
+        self.assertEqual(watcher.poll(2.0), [(ADDED, self.path("ttyACM1"))])
+        timer.join()
+        os.remove(self.path("ttyUSB0"))
+        os.rename(self.path("ttyACM1"), self.path("ttyACM2"))
+        self.assertEqual(watcher.poll(2.0), [(REMOVED, self.path("ttyACM1")), (REMOVED, self.path("ttyUSB0")),
+                                             (ADDED, self.path("ttyACM2"))])
+
+    def test_inotify(self):
+        """Test that inotify reports plugged, removed and renamed ports, and only serial ports."""
+        with PortWatcher(self.directory) as watcher:
+            if not watcher.uses_inotify:
+                self.skipTest("inotify is not available")
+            self.check_hot_plug(watcher)
+
+    def test_polling_fallback(self):
+        """Test that diffing directory snapshots reports the same events."""
+        with PortWatcher(self.directory, interval=0.01, use_inotify=False) as watcher:
+            self.assertFalse(watcher.uses_inotify)
+            self.check_hot_plug(watcher)
+
+    def test_inotify_wakes_immediately(self):
+        """Test that a plugged port is reported well before the polling interval."""
+        with PortWatcher(self.directory, interval=10.0) as watcher:
+            if not watcher.uses_inotify:
+                self.skipTest("inotify is not available")
+            watcher.check()
+            timer = threading.Timer(0.05, self.plug, ("ttyUSB1",))
+            start = time.monotonic()
+            timer.start()
+            self.assertEqual(watcher.poll(5.0), [(ADDED, self.path("ttyUSB1"))])
+            self.assertLess(time.monotonic() - start, 1.0)
+            timer.join()
+
+    def test_missing_directory(self):
+        """Test that a directory that does not exist simply has no ports."""
+        with PortWatcher(self.path("missing"), use_inotify=False) as watcher:
+            self.assertEqual(watcher.check(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
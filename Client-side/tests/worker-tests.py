@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from port_watcher import PortWatcher
+from simulator import FirmwareEmulator, PtyDevice
+
+try:
+    from PyQt5.QtWidgets import QApplication
+    from serial_worker import PortScanner, SerialWorker
+except ImportError:
+    SerialWorker = None
+
+
+def application():
+    """The process-wide application; a QApplication, as later tests in the same run open windows."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QApplication.instance() or QApplication([])
+
+
+@unittest.skipIf(SerialWorker is None, "PyQt5 is not installed")
+class TestSerialWorker(unittest.TestCase):
+    def setUp(self):
+        """Start a worker on a pseudo-terminal backed by the emulator."""
+        self.app = application()
+        self.device = PtyDevice(FirmwareEmulator(ai_delay=0.05))
+        self.device.start()
+        self.replies = []
+        self.worker = SerialWorker(self.device.port, 9600, timeout=0.5)
+        self.worker.response_received.connect(lambda command, response: self.replies.append((command, response)))
+        self.worker.start()
+        self.wait_for(lambda: self.worker.pipeline is not None)
+
+    def tearDown(self):
+        self.worker.stop()
+        self.device.stop()
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_replies_are_matched_to_commands(self):
+        """Test that queued commands are answered through the signal."""
+        self.worker.send("MODE1")
+        self.worker.send("MOVE4")
+        self.wait_for(lambda: len(self.replies) == 2)
+        self.assertEqual([(c, r.kind) for c, r in self.replies], [("MODE1", "OK"), ("MOVE4", "BOARD")])
+
+    def test_ai_moves_arrive_without_polling(self):
+        """Test that unsolicited AI vs AI moves are delivered as soon as they are read."""
+        self.worker.send("MODE3")
+        self.worker.send("RESET")
+        self.wait_for(lambda: any(r.status in ("WIN", "DRAW") for _, r in self.replies))
+        unsolicited = [r for c, r in self.replies if c == ""]
+        self.assertEqual(unsolicited[0].board, "200010000")
+
+    def test_unanswered_command_is_reported_as_a_timeout(self):
+        """Test that a command the board never answers is delivered as a TIMEOUT reply."""
+        emulator = self.device.emulator
+        process = emulator.process_command
+        emulator.process_command = lambda command: None if command.endswith("MOVE4") else process(command)
+        self.worker.send("MOVE4")
+        self.wait_for(lambda: self.replies)
+        self.assertEqual([(c, r.kind) for c, r in self.replies], [("MOVE4", "TIMEOUT")])
+
+    def test_idle_time_tracks_received_bytes(self):
+        """Test that a ping reply refreshes the passive liveness timestamp."""
+        time.sleep(0.2)
+        self.assertGreaterEqual(self.worker.idle_time(), 0.2)
+        self.worker.ping()
+        self.wait_for(lambda: self.replies)
+        self.assertLess(self.worker.idle_time(), 0.2)
+
+    def test_unanswered_commands_survive_a_lost_connection(self):
+        """Test that a lost connection is signalled and its unanswered commands are kept for replay."""
+        lost = []
+        self.worker.connection_lost.connect(lost.append)
+        self.device.stop()
+        self.wait_for(lambda: lost)
+        self.worker.send("MODE2")
+        self.worker.ping()
+        self.worker.send("MOVE4")
+        self.worker.wait()
+        self.assertEqual(self.worker.unacked_commands(), ["MODE2", "MOVE4"])
+
+
+@unittest.skipIf(SerialWorker is None, "PyQt5 is not installed")
+class TestPortScanner(unittest.TestCase):
+    def setUp(self):
+        self.app = application()
+        self.directory = tempfile.mkdtemp()
+        self.events = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_reports_the_attached_ports(self):
+        """Test that the background scan delivers the same list as comports()."""
+        import serial.tools.list_ports
+        scanner = PortScanner()
+        scanner.ports_found.connect(self.events.append)
+        scanner.start()
+        self.wait_for(lambda: self.events)
+        scanner.wait()
+        self.assertEqual(self.events, [sorted(port.device for port in serial.tools.list_ports.comports())])
+
+    def test_follows_hot_plug_events(self):
+        """Test that ports plugged into and removed from a watched directory are signalled."""
+        board = os.path.join(self.directory, "ttyACM0")
+        scanner = PortScanner(PortWatcher(self.directory, interval=0.01))
+        scanner.ports_found.connect(lambda ports: self.events.append(("found", board in ports)))
+        scanner.port_added.connect(lambda port: self.events.append(("added", port)))
+        scanner.port_removed.connect(lambda port: self.events.append(("removed", port)))
+        scanner.start()
+        try:
+            self.wait_for(lambda: self.events)
+            open(board, "w").close()
+            self.wait_for(lambda: len(self.events) == 2)
+            os.remove(board)
+            self.wait_for(lambda: len(self.events) == 3)
+        finally:
+            scanner.stop()
+        self.assertEqual(self.events, [("found", False), ("added", board), ("removed", board)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+@file tournament.py
+@ingroup client_side
+@brief Headless AI vs AI tournament runner.
+
+Plays games in-process with the engine instead of the board, where the AI vs
+AI loop waits a second per move pair. With --batch the games are played in
+lockstep by the NumPy engine of batch.py (random, greedy and perfect only).
+Example:
+
+    python tournament.py --games 1000000 --x greedy --o random --seed 1
+    python tournament.py --batch --games 100000000 --x greedy --o random
+"""
+import argparse
+import json
+import random
+import time
+
+from engine import SEARCH_TABLE, STRATEGIES, play_games
+
+
+def run_match(x_name, o_name, games, seed=None, batch=False):
+    """
+    @brief Play a match between two strategies and collect the statistics.
+    @param x_name Strategy name for X.
+    @param o_name Strategy name for O.
+    @param games Number of games.
+    @param seed Optional seed for reproducible results.
+    @param batch True to play the games with the NumPy batch engine.
+    @return Dictionary with the outcome counts, rates and throughput.
+    @throws KeyError If batch is set and a strategy has no batch version.
+    """
+    start = time.perf_counter()
+    if batch:
+        import numpy as np
+        from batch import BATCH_STRATEGIES, play_batches
+        draws, x_wins, o_wins = play_batches(BATCH_STRATEGIES[x_name], BATCH_STRATEGIES[o_name], games,
+                                             np.random.default_rng(seed))
+    else:
+        draws, x_wins, o_wins = play_games(STRATEGIES[x_name], STRATEGIES[o_name], games, random.Random(seed))
+    duration = time.perf_counter() - start
+    result = {
+        "x": x_name,
+        "o": o_name,
+        "games": games,
+        "x_wins": x_wins,
+        "o_wins": o_wins,
+        "draws": draws,
+        "x_win_rate": round(x_wins / games, 4) if games else 0.0,
+        "o_win_rate": round(o_wins / games, 4) if games else 0.0,
+        "draw_rate": round(draws / games, 4) if games else 0.0,
+        "duration_s": round(duration, 3),
+        "games_per_s": round(games / duration) if duration else 0,
+    }
+    if "search" in (x_name, o_name):
+        result["search_table"] = SEARCH_TABLE.stats()
+    return result
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run a headless Tic-Tac-Toe AI vs AI tournament.")
+    parser.add_argument('--games', type=int, default=100000, help="Games per pairing.")
+    parser.add_argument('--x', choices=sorted(STRATEGIES), help="Strategy for X (default: every strategy).")
+    parser.add_argument('--o', choices=sorted(STRATEGIES), help="Strategy for O (default: every strategy).")
+    parser.add_argument('--seed', type=int, help="Seed for reproducible runs.")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    parser.add_argument('--batch', action='store_true', help="Play with the NumPy batch engine (needs numpy).")
+    args = parser.parse_args()
+    if args.batch:
+        from batch import BATCH_STRATEGIES
+        for name in (args.x, args.o):
+            if name is not None and name not in BATCH_STRATEGIES:
+                parser.error(f"strategy {name} has no batch version "
+                             f"(choose from {', '.join(sorted(BATCH_STRATEGIES))})")
+    return args
+
+
+def main():
+    args = parse_arguments()
+    names = sorted(STRATEGIES)
+    if args.batch:
+        from batch import BATCH_STRATEGIES
+        names = sorted(BATCH_STRATEGIES)
+    x_names = [args.x] if args.x else names
+    o_names = [args.o] if args.o else names
+    results = [run_match(x, o, args.games, args.seed, args.batch) for x in x_names for o in o_names]
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print(f"{'X':<10} {'O':<10} {'games':>10} {'X wins':>8} {'O wins':>8} {'draws':>8} {'games/s':>10}")
+    for result in results:
+        print(f"{result['x']:<10} {result['o']:<10} {result['games']:>10} "
+              f"{result['x_win_rate']:>8.2%} {result['o_win_rate']:>8.2%} {result['draw_rate']:>8.2%} "
+              f"{result['games_per_s']:>10}")
+    if any("search_table" in result for result in results):
+        stats = SEARCH_TABLE.stats()
+        print(f"search table: {stats['size']}/{stats['capacity']} entries, {stats['hits']} hits, "
+              f"{stats['misses']} misses, {stats['evictions']} evictions, hit rate {stats['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
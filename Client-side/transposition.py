@@ -0,0 +1,84 @@
+"""
+@file transposition.py
+@ingroup client_side
+@brief Bounded transposition table for the AI search.
+
+Entries are keyed by the canonical base-3 position key (board.canonical()),
+so the eight symmetric variants of a position share one entry. The table
+holds at most @c capacity entries and evicts the least recently used one.
+"""
+from collections import OrderedDict
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    """
+    @ingroup client_side
+    @class TranspositionTable
+    @brief LRU-bounded map from canonical position key to a search result, with hit/miss counters.
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        @brief Create an empty table.
+        @param capacity Maximum number of entries kept.
+        """
+        self.capacity = max(1, capacity)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        @brief Look up a position and mark it as recently used.
+        @param key Canonical position key.
+        @return Stored entry, or None.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """
+        @brief Store a search result, evicting the least recently used entry when full.
+        @param key Canonical position key.
+        @param entry Tuple (depth, flag, score, move in the canonical orientation).
+        """
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        @brief Drop every entry and reset the counters.
+        """
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        @brief Counters of the table.
+        @return Dictionary with size, capacity, hits, misses, evictions and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
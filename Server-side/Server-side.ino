@@ -28,6 +28,107 @@ bool isFirstPlayerTurn = true;
 /** @brief Flag to control AI vs AI game flow. */
 bool aiGameRunning = false;  // New flag to control AI vs AI game flow
 
+/**
+ * @enum ProtocolMode
+ * @brief Encoding used on the serial link.
+ */
+enum ProtocolMode {
+  TEXT_PROTOCOL,
+  BINARY_PROTOCOL
+};
+
+/** @brief Current serial protocol, switched by the binary handshake. */
+ProtocolMode protocolMode = TEXT_PROTOCOL;
+
+/** @brief Largest payload of a binary frame. */
+const uint8_t MAX_FRAME_PAYLOAD = 8;
+
+/** @brief Binary command opcodes. */
+enum Opcode {
+  OP_NOP = 0x00,
+  OP_MODE = 0x01,
+  OP_MOVE = 0x02,
+  OP_RESET = 0x03,
+  OP_TEST_CONNECTION = 0x04,
+  OP_SAVE = 0x05,
+  OP_LOAD = 0x06,  ///< Without argument: from EEPROM; with a 3 byte snapshot: from the host
+  OP_SEQUENCE = 0x80  ///< Flag: the last payload byte is a sequence number
+};
+
+/** @brief Binary reply frame types (bits 7-6 of the flag byte). */
+enum FrameType {
+  FRAME_BOARD = 0,
+  FRAME_OK = 1,
+  FRAME_ERR = 2
+};
+
+/** @brief Flag byte bit set when a reply frame ends with a sequence number. */
+const uint8_t SEQUENCE_FLAG = 0x20;
+
+/** @brief Game status reported with the board (bits 1-0 of the flag byte). */
+enum BoardStatus {
+  STATUS_CONTINUE = 0,
+  STATUS_WIN = 1,
+  STATUS_DRAW = 2
+};
+
+/** @brief Acknowledgement codes. */
+enum OkCode {
+  OK_MODE_SET = 1,
+  OK_RESET = 2,
+  OK_CONNECTION = 3,
+  OK_SAVED = 4,
+  OK_BAUD = 5
+};
+
+/** @brief Error codes. */
+enum ErrorCode {
+  ERR_INVALID_MOVE = 1,
+  ERR_BAD_FRAME = 2,
+  ERR_NO_SAVE = 3,
+  ERR_BAD_STATE = 4,
+  ERR_BAD_BAUD = 5
+};
+
+/** @brief Size of a packed game snapshot in bytes (board, mode and turn flags). */
+const uint8_t SNAPSHOT_SIZE = 3;
+
+/** @brief EEPROM address of the saved game: marker, snapshot, CRC-8. */
+const int SAVE_ADDRESS = 0;
+
+/** @brief Marker byte in front of a saved game. */
+const uint8_t SAVE_MAGIC = 0x54;
+
+/** @brief Baud rates the host may switch to with BAUD<rate>. */
+const long BAUD_RATES[] = {9600, 19200, 38400, 57600, 115200};
+
+/** @brief Rate the board starts at. */
+const long SAFE_BAUD = 9600;
+
+/** @brief Time the host has to confirm a new rate before the board falls back. */
+const unsigned long BAUD_CONFIRM_MS = 1000;
+
+/** @brief Baud rate in use. */
+long currentBaud = SAFE_BAUD;
+
+/** @brief Last rate confirmed by the host with a connection test. */
+long confirmedBaud = SAFE_BAUD;
+
+/** @brief Set while a switch to currentBaud awaits confirmation. */
+bool baudPending = false;
+
+/** @brief millis() at the last unconfirmed switch. */
+unsigned long baudSwitchTime = 0;
+
+/** @brief Receive buffer for binary frames. */
+uint8_t frameBuffer[MAX_FRAME_PAYLOAD + 2];
+
+/** @brief Number of bytes currently held in frameBuffer. */
+uint8_t frameLength = 0;
+
+/** @brief Sequence number of the command being answered, or -1 for unsolicited replies. */
+int replySequence = -1;
+
 /**
  * @brief Helper function to check if three positions match.
  * @param a Index of the first position.
@@ -119,14 +220,253 @@ int calculateAIMove(int player) {
 }
 
 
+/**
+ * @brief Compute the CRC-8 (polynomial 0x07) of a buffer.
+ * @param data Bytes to checksum.
+ * @param length Number of bytes.
+ * @return The checksum.
+ */
+uint8_t crc8(const uint8_t *data, uint8_t length) {
+  uint8_t crc = 0;
+  for(uint8_t i = 0; i < length; i++) {
+    crc ^= data[i];
+    for(uint8_t bit = 0; bit < 8; bit++)
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+  }
+  return crc;
+}
+
+/**
+ * @brief Send a payload as a length-prefixed, CRC protected binary frame.
+ * @param payload Payload bytes.
+ * @param length Payload length.
+ */
+void sendFrame(const uint8_t *payload, uint8_t length) {
+  uint8_t frame[MAX_FRAME_PAYLOAD + 2];
+  memcpy(frame + 1, payload, length);
+  if(replySequence >= 0) {
+    frame[1] |= SEQUENCE_FLAG;
+    frame[1 + length++] = (uint8_t)replySequence;
+  }
+  frame[0] = length;
+  frame[length + 1] = crc8(frame, length + 1);
+  Serial.write(frame, length + 2);
+}
+
+/**
+ * @brief Send a text reply, prefixed with the sequence number of the command if it had one.
+ * @param line Reply text without the line terminator.
+ */
+void sendLine(const char *line) {
+  if(replySequence >= 0) {
+    Serial.print('#');
+    Serial.print(replySequence);
+    Serial.print(' ');
+  }
+  Serial.println(line);
+}
+
+/**
+ * @brief Report the board and game status to the host.
+ * @param status One of BoardStatus.
+ * @param winner Winning player for STATUS_WIN, otherwise 0.
+ */
+void sendBoard(uint8_t status, int winner) {
+  if(protocolMode == BINARY_PROTOCOL) {
+    uint32_t packed = 0;
+    for(int i = 0; i < 9; i++)
+      packed |= (uint32_t)board[i] << (2 * i);
+    uint8_t payload[4] = {
+      (uint8_t)((FRAME_BOARD << 6) | (winner << 2) | status),
+      (uint8_t)(packed & 0xFF),
+      (uint8_t)((packed >> 8) & 0xFF),
+      (uint8_t)((packed >> 16) & 0xFF)
+    };
+    sendFrame(payload, sizeof(payload));
+    return;
+  }
+
+  char line[26] = "BOARD:";  // "BOARD:" + 9 cells + ":CONTINUE" + NUL
+  for(int i = 0; i < 9; i++)
+    line[6 + i] = '0' + board[i];
+  line[15] = '\0';
+  if(status == STATUS_WIN) {
+    strcat(line, ":WIN:");
+    line[20] = '0' + winner;
+    line[21] = '\0';
+  } else {
+    strcat(line, status == STATUS_DRAW ? ":DRAW" : ":CONTINUE");
+  }
+  sendLine(line);
+}
+
+/**
+ * @brief Send an acknowledgement to the host.
+ * @param code One of OkCode.
+ */
+void sendOk(uint8_t code) {
+  if(protocolMode == BINARY_PROTOCOL) {
+    uint8_t payload[2] = {FRAME_OK << 6, code};
+    sendFrame(payload, sizeof(payload));
+    return;
+  }
+  if(code == OK_CONNECTION) sendLine("<connection_ok/>");
+  else if(code == OK_MODE_SET) sendLine("OK:MODE_SET");
+  else if(code == OK_SAVED) sendLine("OK:SAVED");
+  else if(code == OK_BAUD) sendLine("OK:BAUD");
+  else sendLine("OK:RESET");
+}
+
+/**
+ * @brief Send an error to the host.
+ * @param code One of ErrorCode.
+ */
+void sendError(uint8_t code) {
+  if(protocolMode == BINARY_PROTOCOL) {
+    uint8_t payload[2] = {FRAME_ERR << 6, code};
+    sendFrame(payload, sizeof(payload));
+    return;
+  }
+  if(code == ERR_INVALID_MOVE) sendLine("ERR:INVALID_MOVE");
+  else if(code == ERR_NO_SAVE) sendLine("ERR:NO_SAVE");
+  else if(code == ERR_BAD_STATE) sendLine("ERR:BAD_STATE");
+  else if(code == ERR_BAD_BAUD) sendLine("ERR:BAD_BAUD");
+  else sendLine("ERR:BAD_FRAME");
+}
+
+/**
+ * @brief Pack the game state into a snapshot.
+ *
+ * Bits 17-0 hold the board (2 bits per cell, cell 0 lowest), bits 19-18 the
+ * mode, bit 20 whether it is the first player's turn and bit 21 whether an
+ * AI vs AI game is running.
+ * @return The snapshot.
+ */
+uint32_t packSnapshot() {
+  uint32_t packed = 0;
+  for(int i = 0; i < 9; i++)
+    packed |= (uint32_t)board[i] << (2 * i);
+  packed |= ((uint32_t)currentMode & 3) << 18;
+  if(isFirstPlayerTurn) packed |= 1UL << 20;
+  if(aiGameRunning) packed |= 1UL << 21;
+  return packed;
+}
+
+/**
+ * @brief Restore the game state from a snapshot.
+ * @param packed Snapshot made by packSnapshot().
+ * @return False (and the state unchanged) if the snapshot is invalid.
+ */
+bool restoreSnapshot(uint32_t packed) {
+  uint8_t mode = (packed >> 18) & 3;
+  if(mode < MAN_VS_MAN || (packed >> 22) != 0) return false;
+  for(int i = 0; i < 9; i++)
+    if(((packed >> (2 * i)) & 3) == 3) return false;
+
+  for(int i = 0; i < 9; i++)
+    board[i] = (packed >> (2 * i)) & 3;
+  currentMode = (GameMode)mode;
+  isFirstPlayerTurn = (packed >> 20) & 1;
+  aiGameRunning = (packed >> 21) & 1;
+  return true;
+}
+
+/**
+ * @brief Write the current game to EEPROM; unchanged bytes are not rewritten.
+ */
+void saveGame() {
+  uint32_t packed = packSnapshot();
+  uint8_t data[SNAPSHOT_SIZE + 1] = {SAVE_MAGIC};
+  for(uint8_t i = 0; i < SNAPSHOT_SIZE; i++)
+    data[1 + i] = (packed >> (8 * i)) & 0xFF;
+  for(uint8_t i = 0; i < sizeof(data); i++)
+    EEPROM.update(SAVE_ADDRESS + i, data[i]);
+  EEPROM.update(SAVE_ADDRESS + sizeof(data), crc8(data, sizeof(data)));
+}
+
+/**
+ * @brief Read the game saved in EEPROM.
+ * @param packed Receives the snapshot.
+ * @return False if no valid game has been saved.
+ */
+bool readSavedGame(uint32_t *packed) {
+  uint8_t data[SNAPSHOT_SIZE + 2];
+  for(uint8_t i = 0; i < sizeof(data); i++)
+    data[i] = EEPROM.read(SAVE_ADDRESS + i);
+  if(data[0] != SAVE_MAGIC || crc8(data, SNAPSHOT_SIZE + 1) != data[SNAPSHOT_SIZE + 1]) return false;
+  *packed = 0;
+  for(uint8_t i = 0; i < SNAPSHOT_SIZE; i++)
+    *packed |= (uint32_t)data[1 + i] << (8 * i);
+  return true;
+}
+
+/**
+ * @brief Check whether the host may switch to a baud rate.
+ * @param rate Requested baud rate.
+ * @return True if the rate is one of BAUD_RATES.
+ */
+bool isSupportedBaud(long rate) {
+  for(uint8_t i = 0; i < sizeof(BAUD_RATES) / sizeof(BAUD_RATES[0]); i++)
+    if(BAUD_RATES[i] == rate) return true;
+  return false;
+}
+
+/**
+ * @brief Move the serial port to another baud rate once pending replies are sent.
+ * @param rate New baud rate.
+ */
+void setBaud(long rate) {
+  Serial.flush();
+  Serial.end();  // Bytes received at the old rate are dropped
+  Serial.begin(rate);
+  currentBaud = rate;
+}
+
+/**
+ * @brief Report the board if the game is over.
+ * @return True if a win or draw was reported.
+ */
+bool reportIfFinished() {
+  int winner = checkWinner();
+  if(winner > 0) {
+    sendBoard(STATUS_WIN, winner);
+    return true;
+  }
+  if(isBoardFull()) {
+    sendBoard(STATUS_DRAW, 0);
+    return true;
+  }
+  return false;
+}
+
 /**
  * @brief Process the received command.
- * @param command The received command as a string.
+ * @param command The received command as a string, optionally prefixed with "#<sequence> ".
  */
 void processCommand(String command) {
+  replySequence = -1;
+  if(command.startsWith("#")) {
+    int space = command.indexOf(' ');
+    if(space < 0) return;
+    replySequence = command.substring(1, space).toInt();
+    command = command.substring(space + 1);
+  }
+
   // Обробка команди тесту підключення
   if(command == "<test_connection/>") {
-    Serial.println("<connection_ok/>");
+    if(baudPending) {
+      confirmedBaud = currentBaud;
+      baudPending = false;
+    }
+    sendOk(OK_CONNECTION);
+    return;
+  }
+
+  // Перехід на бінарний протокол
+  if(command == "<test_connection binary=\"1\"/>") {
+    sendLine("<connection_ok binary=\"1\"/>");
+    protocolMode = BINARY_PROTOCOL;
+    frameLength = 0;
     return;
   }
 
@@ -135,14 +475,14 @@ void processCommand(String command) {
     memset(board, 0, sizeof(board));
     isFirstPlayerTurn = true;
     aiGameRunning = false;  // Reset AI game state on mode change
-    Serial.println("OK:MODE_SET");
+    sendOk(OK_MODE_SET);
     return;
   }
   
   if(command.startsWith("MOVE")) {
     int position = command.substring(4).toInt();
     if(position < 0 || position > 8 || board[position] != 0) {
-      Serial.println("ERR:INVALID_MOVE");
+      sendError(ERR_INVALID_MOVE);
       return;
     }
     
@@ -153,58 +493,159 @@ void processCommand(String command) {
       board[position] = 1;
     }
     
-    String response = "BOARD:";
-    for(int i = 0; i < 9; i++)
-      response += String(board[i]);
-      
-    int winner = checkWinner();
-    if(winner > 0) {
-      Serial.println(response + ":WIN:" + String(winner));
-      return;
-    }
-    if(isBoardFull()) {
-      Serial.println(response + ":DRAW");
-      return;
-    }
+    if(reportIfFinished()) return;
     
     if(currentMode != MAN_VS_MAN) {
       int aiMove = calculateAIMove(2);
       if(aiMove >= 0) {
         board[aiMove] = 2;
-        response = "BOARD:";
-        for(int i = 0; i < 9; i++)
-          response += String(board[i]);
-          
-        winner = checkWinner();
-        if(winner > 0) {
-          Serial.println(response + ":WIN:" + String(winner));
-          return;
-        }
-        if(isBoardFull()) {
-          Serial.println(response + ":DRAW");
-          return;
-        }
+        if(reportIfFinished()) return;
       }
     }
     
-    Serial.println(response + ":CONTINUE");
+    sendBoard(STATUS_CONTINUE, 0);
     return;
   }
   
+  if(command == "SAVE") {
+    saveGame();
+    sendOk(OK_SAVED);
+    return;
+  }
+
+  // LOAD restores the game saved in EEPROM, LOAD<6 hex digits> a snapshot sent by the host
+  if(command.startsWith("LOAD")) {
+    uint32_t packed = 0;
+    if(command.length() == 4) {
+      if(!readSavedGame(&packed)) {
+        sendError(ERR_NO_SAVE);
+        return;
+      }
+    } else {
+      if(command.length() != 4 + 2 * SNAPSHOT_SIZE) {
+        sendError(ERR_BAD_STATE);
+        return;
+      }
+      for(unsigned int i = 4; i < command.length(); i++) {
+        char c = command.charAt(i);
+        if(!isxdigit(c)) {
+          sendError(ERR_BAD_STATE);
+          return;
+        }
+        packed = (packed << 4) | (uint32_t)(c <= '9' ? c - '0' : (c | 0x20) - 'a' + 10);
+      }
+    }
+    if(!restoreSnapshot(packed)) {
+      sendError(ERR_BAD_STATE);
+      return;
+    }
+    if(!reportIfFinished()) sendBoard(STATUS_CONTINUE, 0);
+    return;
+  }
+
+  // Switch the baud rate; the host confirms the new rate with a connection test
+  if(command.startsWith("BAUD")) {
+    long rate = command.substring(4).toInt();
+    if(!isSupportedBaud(rate)) {
+      sendError(ERR_BAD_BAUD);
+      return;
+    }
+    sendOk(OK_BAUD);
+    setBaud(rate);
+    baudPending = true;
+    baudSwitchTime = millis();
+    return;
+  }
+
   if(command == "RESET") {
     memset(board, 0, sizeof(board));
     isFirstPlayerTurn = true;
     aiGameRunning = (currentMode == AI_VS_AI);  // Start AI game only on reset
-    Serial.println("OK:RESET");
+    sendOk(OK_RESET);
     return;
   }
 }
 
+/**
+ * @brief Decode a complete binary frame into a command and process it.
+ * @param payload Frame payload (opcode followed by its argument).
+ * @param length Payload length.
+ */
+void processFrame(const uint8_t *payload, uint8_t length) {
+  String prefix = "";
+  uint8_t opcode = payload[0];
+  if(opcode & OP_SEQUENCE) {
+    opcode &= ~OP_SEQUENCE;
+    prefix = "#" + String(payload[--length]) + " ";
+  }
+  uint8_t argument = length > 1 ? payload[1] : 0;
+  switch(opcode) {
+    case OP_MODE:
+      processCommand(prefix + "MODE" + String(argument));
+      break;
+    case OP_MOVE:
+      processCommand(prefix + "MOVE" + String(argument));
+      break;
+    case OP_RESET:
+      processCommand(prefix + "RESET");
+      break;
+    case OP_TEST_CONNECTION:
+      processCommand(prefix + "<test_connection/>");
+      break;
+    case OP_SAVE:
+      processCommand(prefix + "SAVE");
+      break;
+    case OP_LOAD: {
+      // The snapshot travels little-endian; LOAD takes it as big-endian hex digits
+      const char digits[] = "0123456789ABCDEF";
+      uint8_t count = length > 1 ? length - 1 : 0;
+      if(count > SNAPSHOT_SIZE) count = SNAPSHOT_SIZE;
+      char hex[2 * SNAPSHOT_SIZE + 1];
+      for(uint8_t i = 0; i < count; i++) {
+        uint8_t value = payload[count - i];
+        hex[2 * i] = digits[value >> 4];
+        hex[2 * i + 1] = digits[value & 0x0F];
+      }
+      hex[2 * count] = '\0';
+      processCommand(prefix + "LOAD" + hex);
+      break;
+    }
+    default:
+      break;  // OP_NOP and unknown opcodes are ignored
+  }
+}
+
+/**
+ * @brief Read available bytes in binary mode and process complete frames.
+ */
+void readBinaryFrames() {
+  while(Serial.available() > 0 && protocolMode == BINARY_PROTOCOL) {
+    uint8_t value = Serial.read();
+    if(frameLength == 0 && (value == 0 || value > MAX_FRAME_PAYLOAD)) {
+      // Not a frame: the host went back to the text protocol
+      protocolMode = TEXT_PROTOCOL;
+      return;
+    }
+    frameBuffer[frameLength++] = value;
+    if(frameLength < frameBuffer[0] + 2)
+      continue;
+
+    uint8_t length = frameBuffer[0];
+    frameLength = 0;
+    if(crc8(frameBuffer, length + 1) != frameBuffer[length + 1]) {
+      replySequence = -1;  // The sequence number of a corrupt frame cannot be trusted
+      sendError(ERR_BAD_FRAME);
+      continue;
+    }
+    processFrame(frameBuffer + 1, length);
+  }
+}
+
 /**
  * @brief Arduino setup function.
  */
 void setup() {
-  Serial.begin(9600);
+  Serial.begin(SAFE_BAUD);
   while(!Serial) {
     ; // Wait for serial port to connect
   }
@@ -214,7 +655,15 @@ void setup() {
  * @brief Arduino main loop function.
  */
 void loop() {
-  if(Serial.available() > 0) {
+  if(baudPending && millis() - baudSwitchTime >= BAUD_CONFIRM_MS) {
+    // The host never confirmed the new rate: go back to the last one that worked
+    setBaud(confirmedBaud);
+    baudPending = false;
+  }
+
+  if(protocolMode == BINARY_PROTOCOL) {
+    readBinaryFrames();
+  } else if(Serial.available() > 0) {
     String command = Serial.readStringUntil('\n');
     command.trim();
     processCommand(command);
@@ -223,24 +672,14 @@ void loop() {
   // AI vs AI mode logic
   if(currentMode == AI_VS_AI && aiGameRunning && !isBoardFull() && checkWinner() == 0) {
     delay(1000);  // Add delay between moves
+    replySequence = -1;  // AI moves are not replies to a command
     
     // X's move
     int aiMove = calculateAIMove(1);
     if(aiMove >= 0) {
       board[aiMove] = 1;
-      String response = "BOARD:";
-      for(int i = 0; i < 9; i++)
-        response += String(board[i]);
-        
-      int winner = checkWinner();
-      if(winner > 0) {
-        Serial.println(response + ":WIN:" + String(winner));
-        aiGameRunning = false;  // Stop AI game on win
-        return;
-      }
-      if(isBoardFull()) {
-        Serial.println(response + ":DRAW");
-        aiGameRunning = false;  // Stop AI game on draw
+      if(reportIfFinished()) {
+        aiGameRunning = false;  // Stop AI game on win or draw
         return;
       }
       
@@ -248,23 +687,12 @@ void loop() {
       aiMove = calculateAIMove(2);
       if(aiMove >= 0) {
         board[aiMove] = 2;
-        response = "BOARD:";
-        for(int i = 0; i < 9; i++)
-          response += String(board[i]);
-          
-        winner = checkWinner();
-        if(winner > 0) {
-          Serial.println(response + ":WIN:" + String(winner));
-          aiGameRunning = false;  // Stop AI game on win
-          return;
-        }
-        if(isBoardFull()) {
-          Serial.println(response + ":DRAW");
-          aiGameRunning = false;  // Stop AI game on draw
+        if(reportIfFinished()) {
+          aiGameRunning = false;  // Stop AI game on win or draw
           return;
         }
         
-        Serial.println(response + ":CONTINUE");
+        sendBoard(STATUS_CONTINUE, 0);
       }
     }
   }